@@ -0,0 +1,116 @@
+import numpy as np
+from scipy.cluster.vq import kmeans2
+
+from model_inputs import ModelInputs
+from solution import Solution
+
+
+class Aggregation:
+    """representative periods (e.g. typical days or weeks) of model inputs.
+
+    The timeline is cut into consecutive periods of period_length timesteps; the last period is shorter if the number
+    of timesteps is not a multiple of period_length. Every period is represented by one of the representative periods,
+    whose inputs are concatenated in inputs (period k holds the positions k*period_length, ..., (k+1)*period_length-1).
+    The weights count how often each timestep of the representative periods occurs in the full timeline.
+    """
+    def __init__(self, T, inputs, period_length, order, medoids):
+        self.T = T                              # timestep labels of the full timeline
+        self.inputs = inputs                    # ModelInputs of the representative periods, one after the other
+        self.period_length = period_length      # number of timesteps per period
+        self.order = order                      # array with the representative period of each period of the full timeline
+        self.medoids = medoids                  # array with the period of the full timeline chosen as each representative period
+        num_periods = len(order)
+        self.lengths = np.full(num_periods, period_length)
+        self.lengths[-1] = len(T) - (num_periods-1)*period_length
+        self.weights = np.zeros((len(medoids), period_length))
+        for k, length in zip(order, self.lengths):
+            self.weights[k,:length] += 1
+
+    @property
+    def num_periods(self):
+        return len(self.order)
+
+    @property
+    def num_representatives(self):
+        return len(self.medoids)
+
+    @property
+    def expand_index(self):
+        """array with the position in inputs of every timestep of the full timeline."""
+        return np.concatenate([k*self.period_length + np.arange(length) for k, length in zip(self.order, self.lengths)])
+
+    @property
+    def period_index(self):
+        """array with the period of every timestep of the full timeline."""
+        return np.repeat(np.arange(self.num_periods), self.lengths)
+
+    def expand(self, arr):
+        """map an array with one row per timestep of the representative periods to the full timeline."""
+        return np.asarray(arr)[self.expand_index]
+
+    def expand_solution(self, solution):
+        """map a solution of lp_matrix.build_basismodell_lp_aggregated to the full timeline, with H as absolute storage level SOC + H.
+
+        Reduced costs and duals are not expanded.
+        """
+        lp = solution.lp
+        names = list(lp.var) + (list(lp.expressions.con) if lp.expressions is not None else [])
+        values = {name: self.expand(arr) if solution.dims[name][0] == 'T' else arr for name, arr in solution.values.items() if name in names}
+        values['H'] = values['H'] + values['SOC'][self.period_index]                       # absolute storage level
+        return Solution(lp, values, solution.reduced_costs, solution.duals, solution.objective, axes={'T': self.T}, dims=solution.dims)
+
+    def expanded_inputs(self):
+        """get the inputs of the representative periods mapped to the full timeline, e.g. for costs.variable_costs."""
+        index = self.expand_index
+        return ModelInputs(self.T, self.inputs.S, self.inputs.sources, self.inputs.EE[index], self.inputs.EV[index])
+
+
+def aggregate(inputs, period_length, num_representatives, seed=0):
+    """cluster the periods of the model inputs into representative periods.
+
+    The periods are clustered with k-means on their generation and demand profiles, each profile scaled by its
+    maximum. Every cluster is represented by its medoid, the period closest to the cluster centre, so the
+    representative periods are historical periods with consistent generation and demand. A shorter last period
+    is assigned to the representative period that is closest over its length.
+
+    Arguments:
+        inputs -- model_inputs.ModelInputs of the full timeline
+        period_length -- number of timesteps per period, e.g. 24 for typical days or 168 for typical weeks
+        num_representatives -- number of representative periods
+        seed -- seed of the k-means initialization
+
+    Returns:
+        aggregation -- Aggregation
+
+    Side effects:
+        raises ValueError if period_length is not between 1 and the number of timesteps or num_representatives is below 1
+    """
+    num_timesteps = len(inputs)
+    if not 0 < period_length <= num_timesteps:
+        raise ValueError(str('The period length '+str(period_length)+' has to be between 1 and the number of timesteps '+str(num_timesteps)))
+    if num_representatives < 1:
+        raise ValueError(str('The number of representative periods '+str(num_representatives)+' has to be at least 1'))
+    num_full = num_timesteps // period_length
+    profiles = np.concatenate([inputs.EE.reshape(num_timesteps, -1), inputs.EV], axis=1)
+    scale = np.abs(profiles).max(axis=0)
+    profiles = profiles/np.where(scale > 0, scale, 1)
+    features = profiles[:num_full*period_length].reshape(num_full, -1)
+
+    if num_representatives >= num_full:
+        medoids = np.arange(num_full)
+        order = np.arange(num_full)
+    else:
+        centroids, labels = kmeans2(features, num_representatives, minit='++', seed=seed)
+        clusters = np.unique(labels)                                                        # k-means can leave clusters empty
+        medoids = np.array([np.flatnonzero(labels == k)[np.argmin(((features[labels == k] - centroids[k])**2).sum(axis=1))] for k in clusters])
+        order = np.searchsorted(clusters, labels)
+
+    if num_full*period_length < num_timesteps:                                              # shorter last period
+        length = num_timesteps - num_full*period_length
+        tail = profiles[num_full*period_length:].ravel()
+        heads = features.reshape(num_full, period_length, -1)[medoids, :length].reshape(len(medoids), -1)
+        order = np.append(order, np.argmin(((heads - tail)**2).sum(axis=1)))
+
+    positions = (medoids[:,None]*period_length + np.arange(period_length)).ravel()
+    representatives = ModelInputs(range(len(positions)), inputs.S, inputs.sources, inputs.EE[positions], inputs.EV[positions])
+    return Aggregation(inputs.T, representatives, period_length, order, medoids)
@@ -0,0 +1,728 @@
+### imports
+import os
+import sys
+import time
+import subprocess
+import resource
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import aggregation
+import costs
+import datageneration
+import decomposition
+import grb_model
+import helperfun
+import lp_matrix
+import lp_solvers
+import model_inputs
+import synthetic
+
+
+def benchmark_basismodell_build(settings, timeseries_2030, horizons=(8760, 17520)):
+    """compare the loop-based and the matrix-based model builder of the basismodell.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030, at least max(horizons) rows long
+        horizons -- numbers of timesteps to benchmark
+
+    Returns:
+        results -- dataframe with build time, solve time and objective value per horizon and builder
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+
+    results = []
+    for num_timesteps in horizons:
+        settings_horizon = dict(settings, timesteps=range(num_timesteps))
+        T = settings_horizon['timesteps']
+        EE = helperfun.make_EE_dict(settings_horizon, timeseries_2030)
+        EV = helperfun.make_EV_dict(settings_horizon, timeseries_2030)
+        for builder, solve in [('loop', grb_model.solve_basismodell), ('matrix', grb_model.solve_basismodell_matrix)]:
+            start = time.perf_counter()
+            model, _, _ = solve(T, S, S_neighbours, EE, EV, c, eta, ramp)
+            wall_time = time.perf_counter() - start
+            results.append({'timesteps': num_timesteps, 'builder': builder,
+                            'build_time': wall_time - model.Runtime,                    # everything outside of model.optimize(): model building and solution extraction
+                            'solve_time': model.Runtime,
+                            'objective': model.ObjVal})
+    return pd.DataFrame(results)
+
+
+def benchmark_model_inputs(settings, timeseries_2030):
+    """compare construction time and memory of the EE/EV dictionaries and of the array-backed ModelInputs.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+
+    Returns:
+        results -- dataframe with construction time and peak memory (in MB) per input format
+
+    Side effects:
+        None
+    """
+    def make_dicts():
+        return helperfun.make_EE_dict(settings, timeseries_2030), helperfun.make_EV_dict(settings, timeseries_2030)
+
+    results = []
+    for input_format, make in [('dicts', make_dicts), ('arrays', lambda: model_inputs.make_model_inputs(settings, timeseries_2030))]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        inputs = make()
+        construction_time = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append({'format': input_format, 'timesteps': len(settings['timesteps']),
+                        'construction_time': construction_time, 'peak_memory': peak/10**6})
+        del inputs
+    return pd.DataFrame(results)
+
+
+def benchmark_rolling_horizon(settings, timeseries_2030, limits, num_steps=168, t_horizon=24*7*2):
+    """compare the rolling horizon loop over solve_dispatch with the persistent, warm-started DispatchWindow engine.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030, at least num_steps + t_horizon rows long
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL as returned by helperfun.get_limits
+        num_steps -- number of rolling horizon steps to solve with both engines
+        t_horizon -- length of the rolling time horizon
+
+    Returns:
+        results -- dataframe with the wall time per engine and the extrapolated time for a whole year,
+                   and the maximum deviation of the committed storage levels
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    settings_horizon = dict(settings, timesteps=range(num_steps+t_horizon))
+    T = list(settings_horizon['timesteps'])
+    EE = helperfun.make_EE_dict(settings_horizon, timeseries_2030)
+    EV = helperfun.make_EV_dict(settings_horizon, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    HTL, ETL, GtPL, PtGL, HL = limits
+    H0 = {s: 0 for s in S}
+
+    start = time.perf_counter()
+    H0_loop = H0
+    H_loop = np.zeros((num_steps, len(S)))
+    for t in T[0:num_steps]:
+        _, V, _ = grb_model.solve_dispatch(T[t:t+t_horizon], S, S_neighbours, EE, EV, c, eta, ramp,
+                                           HTL, ETL, GtPL, PtGL, HL, H0_loop, last_step=False, rolling_horizon=True)
+        H0_loop = {s: V['H'][(t,s)] for s in S}
+        H_loop[t] = [H0_loop[s] for s in S]
+    time_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    V = grb_model.solve_rolling_horizon(T, S, S_neighbours, EE, EV, c, eta, ramp,
+                                        HTL, ETL, GtPL, PtGL, HL, H0, t_horizon, num_steps=num_steps)
+    time_window = time.perf_counter() - start
+
+    results = pd.DataFrame({'engine': ['loop', 'window'], 'wall_time': [time_loop, time_window]})
+    results['time_per_step'] = results['wall_time']/num_steps
+    results['extrapolated_year'] = results['time_per_step']*8760
+    results['max_H_deviation'] = [0.0, np.abs(H_loop - V['H']).max()]          # storage levels can differ for degenerate windows with equal costs
+    return results
+
+
+def benchmark_lookahead(settings, timeseries_2030, limits, resolutions=([(1, 24), (6, 96), (24, None)], [(1, 48), (24, None)]),
+                        num_steps=168, t_horizon=24*7*2):
+    """compare the rolling horizon with multi-resolution lookahead windows with the rolling horizon with hourly windows.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030, at least num_steps + t_horizon rows long
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL as returned by helperfun.get_limits
+        resolutions -- resolutions of the windows to benchmark, see lp_matrix.make_durations
+        num_steps -- number of rolling horizon steps to solve per resolution
+        t_horizon -- length of the rolling time horizon in hours
+
+    Returns:
+        results -- dataframe with the number of timesteps per window, wall time, speedup, variable costs of the committed
+                   steps and their relative error, and the mean absolute deviation of the committed dispatch of
+                   'H','GtP','PtG','EI','EX','ET','HT' from the hourly windows per resolution
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    settings_horizon = dict(settings, timesteps=range(num_steps+t_horizon))
+    T = list(settings_horizon['timesteps'])
+    inputs = model_inputs.make_model_inputs(settings_horizon, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    H0 = {s: 0 for s in S}
+    pairs = lp_matrix.make_links(S, S_neighbours)[0]
+
+    results = []
+    for resolution in [None] + list(resolutions):
+        start = time.perf_counter()
+        V = grb_model.solve_rolling_horizon(T, S, S_neighbours, inputs, inputs, c, eta, ramp, *limits, H0, t_horizon,
+                                            num_steps=num_steps, resolution=resolution)
+        wall_time = time.perf_counter() - start
+        if resolution is None:
+            V_hourly = V
+        results.append({'resolution': 'hourly' if resolution is None else str(resolution), 'wall_time': wall_time,
+                        'timesteps': t_horizon if resolution is None else len(lp_matrix.make_durations(t_horizon, resolution)),
+                        **_compare_dispatch(V, V_hourly, inputs.window(0, num_steps), c, pairs)})
+    results = pd.DataFrame(results).set_index('resolution')
+    results['speedup'] = results['wall_time'].iloc[0]/results['wall_time']
+    results['variable_costs_error'] = results['variable_costs']/results['variable_costs'].iloc[0] - 1     # relative to the hourly windows
+    return results
+
+
+def benchmark_commit_length(settings, timeseries_2030, limits, commit_lengths=(6, 24, 168), num_steps=24*365, t_horizon=24*7*2):
+    """compare the rolling horizon committing several timesteps per window with the rolling horizon committing one timestep.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030, at least num_steps + t_horizon rows long
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL as returned by helperfun.get_limits
+        commit_lengths -- numbers of timesteps committed per window to benchmark, see grb_model.solve_rolling_horizon
+        num_steps -- number of committed timesteps, e.g. a whole year
+        t_horizon -- length of the rolling time horizon
+
+    Returns:
+        results -- dataframe with the number of solves, wall time, speedup, variable costs of the committed steps and
+                   their relative error, and the mean absolute deviation of the committed dispatch of
+                   'H','GtP','PtG','EI','EX','ET','HT' from committing one timestep per window, per commit length
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    settings_horizon = dict(settings, timesteps=range(num_steps+t_horizon))
+    T = list(settings_horizon['timesteps'])
+    inputs = model_inputs.make_model_inputs(settings_horizon, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    H0 = {s: 0 for s in S}
+    pairs = lp_matrix.make_links(S, S_neighbours)[0]
+
+    results = []
+    for commit_length in [1] + list(commit_lengths):
+        start = time.perf_counter()
+        V = grb_model.solve_rolling_horizon(T, S, S_neighbours, inputs, inputs, c, eta, ramp, *limits, H0, t_horizon,
+                                            num_steps=num_steps, commit_length=commit_length)
+        wall_time = time.perf_counter() - start
+        if commit_length == 1:
+            V_single = V
+        results.append({'commit_length': commit_length, 'solves': -(-num_steps//commit_length), 'wall_time': wall_time,
+                        **_compare_dispatch(V, V_single, inputs.window(0, num_steps), c, pairs)})
+    results = pd.DataFrame(results).set_index('commit_length')
+    results['speedup'] = results['wall_time'].iloc[0]/results['wall_time']
+    results['variable_costs_error'] = results['variable_costs']/results['variable_costs'].iloc[0] - 1     # relative to committing one timestep
+    return results
+
+def _compare_dispatch(V, V_reference, inputs, c, pairs):
+    """get the variable costs of the committed rolling horizon results V and the mean absolute deviation of their dispatch from V_reference."""
+    result = {'variable_costs': costs.variable_costs(inputs, V, c, pairs).sum().sum()}
+    for key in ['H','GtP','PtG','EI','EX','ET','HT']:
+        result[key+'_deviation'] = np.abs(V[key] - V_reference[key]).mean()
+    return result
+
+
+def benchmark_parallel_rolling_horizon(settings, timeseries_2030, limits, segments=(2, 4, 8), t_warmup=24*7, t_horizon=24*7*2):
+    """compare the parallel rolling horizon (overlapping segments) with the sequential rolling horizon.
+
+    The segments are seeded with the storage levels of a perfect foresight dispatch (grb_model.solve_storage_seed).
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL as returned by helperfun.get_limits
+        segments -- numbers of segments to benchmark
+        t_warmup -- number of warm-up steps of each segment
+        t_horizon -- length of the rolling time horizon
+
+    Returns:
+        results -- dataframe with wall time, variable costs and their deviation from the sequential run per number of segments
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = list(settings['timesteps'])
+    EE = helperfun.make_EE_dict(settings, timeseries_2030)
+    EV = helperfun.make_EV_dict(settings, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    HTL, ETL, GtPL, PtGL, HL = limits
+    H0 = {s: 0 for s in S}
+
+    start = time.perf_counter()
+    V = grb_model.solve_rolling_horizon(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, t_horizon)
+    results = [{'segments': 1, 'wall_time': time.perf_counter() - start, 'variable_costs': V['Cv'].sum(), 'max_H_gap': 0.0}]
+
+    start = time.perf_counter()
+    H_seed = grb_model.solve_storage_seed(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0)
+    time_seed = time.perf_counter() - start
+    for num_segments in segments:
+        start = time.perf_counter()
+        V, H_gap = grb_model.solve_rolling_horizon_parallel(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0,
+                                                            t_horizon, H_seed, num_segments, t_warmup)
+        results.append({'segments': num_segments, 'wall_time': time.perf_counter() - start + time_seed,
+                        'variable_costs': V['Cv'].sum(), 'max_H_gap': np.abs(H_gap).max()})
+    results = pd.DataFrame(results)
+    results['cost_deviation'] = results['variable_costs']/results['variable_costs'][0] - 1            # relative to the sequential run
+    return results
+
+
+def benchmark_aggregation(settings, timeseries_2030, configurations=((24, 12), (24, 48), (168, 8))):
+    """compare the basismodell on representative periods with the full-resolution basismodell.
+
+    The total costs are the investment costs plus the variable costs of all timesteps but the first: in the
+    full-resolution model the hydrogen balance of the first timestep is not linked to the storage (6), so its
+    variable costs are bounded only by the lower bound of Cv and have no counterpart in the representative periods.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        configurations -- tuples (period length, number of representative periods) to benchmark
+
+    Returns:
+        results -- dataframe with wall time, speedup, total costs and the relative errors of the total costs and of
+                   the sums of 'HL','GtPL','PtGL','ETL','HTL' per configuration
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = settings['timesteps']
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    limits = ['HL','GtPL','PtGL','ETL','HTL']
+
+    def summarize(solution, wall_time):
+        result = {'wall_time': wall_time, 'total_costs': solution['Cv'][1:].sum() + solution['Cf'].sum()}
+        result.update({key: solution[key].sum() for key in limits})
+        return result
+
+    start = time.perf_counter()
+    _, solution = grb_model.solve_basismodell_arrays(T, S, S_neighbours, inputs, inputs, c, eta, ramp)
+    results = [dict(summarize(solution, time.perf_counter() - start), period_length=1, representatives=len(T))]
+    for period_length, num_representatives in configurations:
+        start = time.perf_counter()
+        agg = aggregation.aggregate(inputs, period_length, num_representatives)
+        _, solution = grb_model.solve_basismodell_aggregated(agg, S, S_neighbours, c, eta, ramp)
+        results.append(dict(summarize(solution, time.perf_counter() - start), period_length=period_length,
+                            representatives=agg.num_representatives))
+    results = pd.DataFrame(results).set_index(['period_length', 'representatives'])
+    results['speedup'] = results['wall_time'].iloc[0]/results['wall_time']
+    for key in ['total_costs'] + limits:
+        results[key+'_error'] = results[key]/results[key].iloc[0] - 1                    # relative to the full-resolution solve
+    return results
+
+
+def benchmark_backends(settings, timeseries_2030, limits, solvers=lp_solvers.SOLVERS):
+    """compare build and solve time of the solver backends for the basismodell and the dispatch model.
+
+    Arguments:
+        settings -- dictionary of settings; the models are built for settings['timesteps'], e.g. range(8760)
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL as returned by helperfun.get_limits, for the dispatch model
+        solvers -- solvers to benchmark, see lp_solvers.SOLVERS
+
+    Returns:
+        results -- dataframe with the time to build the sparse matrix, to load it into the solver and to solve it,
+                   and the objective value per model and solver
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = settings['timesteps']
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    HTL, ETL, GtPL, PtGL, HL = limits
+    H0 = {s: 0 for s in S}
+
+    results = []
+    for solver in solvers:
+        solution, info = lp_solvers.solve_basismodell(T, S, S_neighbours, inputs, inputs, c, eta, ramp, solver=solver, print_result=False)
+        results.append(dict(info, model='basismodell', timesteps=len(T), objective=solution.objective))
+        solution, info = lp_solvers.solve_dispatch(T, S, S_neighbours, inputs, inputs, c, eta, ramp,
+                                                   HTL, ETL, GtPL, PtGL, HL, H0, last_step=True, solver=solver)
+        results.append(dict(info, model='dispatch', timesteps=len(T), objective=solution.objective))
+    results = pd.DataFrame(results)[['model', 'solver', 'timesteps', 'build_time', 'load_time', 'solve_time', 'objective']]
+    results['total_time'] = results[['build_time', 'load_time', 'solve_time']].sum(axis=1)
+    return results
+
+
+def benchmark_network(settings, timeseries_2030, solver='gurobi'):
+    """compare size and solve time of the basismodell with the 'pairs' and the 'edges' network, see lp_matrix.make_links.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        solver -- solver to use, see lp_solvers.SOLVERS
+
+    Returns:
+        results -- dataframe with the number of links, variables, constraints and nonzeros, build and solve time and
+                   objective value per network
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = settings['timesteps']
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+
+    results = []
+    for network in ['pairs', 'edges']:
+        start = time.perf_counter()
+        lp = lp_matrix.build_basismodell_lp(T, S, S_neighbours, inputs, inputs, c, eta, ramp, network)
+        build_time = time.perf_counter() - start
+        solution, info = lp_solvers.solve_lp(lp, solver, print_result=False)
+        results.append({'network': network, 'countries': len(S), 'links': len(lp.axes['E']), 'variables': lp.num_vars,
+                        'constraints': lp.num_constrs, 'nonzeros': lp.A.nnz, 'build_time': build_time,
+                        'solve_time': info['load_time'] + info['solve_time'], 'objective': solution.objective})
+    return pd.DataFrame(results)
+
+
+def benchmark_compact(settings, timeseries_2030, horizons=(8760, 17520), network='pairs', solver='gurobi', options=None):
+    """compare the standard and the compact formulation of the basismodell, see lp_matrix._add_operation.
+
+    The compact formulation has no variables Cv and dH: the variable costs are part of the objective and the hydrogen
+    balance is substituted into the storage balance. Both have the same optimal objective value.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030, at least max(horizons) rows long
+        horizons -- numbers of timesteps to benchmark
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        solver -- solver to use, see lp_solvers.SOLVERS
+        options -- dictionary of solver specific parameters, e.g. {'Method': 2} to compare the barrier iterations
+
+    Returns:
+        results -- dataframe with the number of variables, constraints and nonzeros, build, load and solve time, simplex
+                   and barrier iterations and objective value per horizon and formulation
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+
+    results = []
+    for num_timesteps in horizons:
+        settings_horizon = dict(settings, timesteps=range(num_timesteps))
+        T = settings_horizon['timesteps']
+        inputs = model_inputs.make_model_inputs(settings_horizon, timeseries_2030)
+        for compact in [False, True]:
+            start = time.perf_counter()
+            lp = lp_matrix.build_basismodell_lp(T, S, S_neighbours, inputs, inputs, c, eta, ramp, network, compact)
+            build_time = time.perf_counter() - start
+            nonzeros = lp.A.nnz
+            solution, info = lp_solvers.solve_lp(lp, solver, print_result=False, options=options)
+            results.append({'timesteps': num_timesteps, 'formulation': 'compact' if compact else 'standard', 'variables': lp.num_vars,
+                            'constraints': lp.num_constrs, 'nonzeros': nonzeros, 'build_time': build_time, 'load_time': info['load_time'],
+                            'solve_time': info['solve_time'], 'simplex_iterations': info['simplex_iterations'],
+                            'barrier_iterations': info['barrier_iterations'], 'objective': solution.objective})
+    return pd.DataFrame(results)
+
+
+def benchmark_scaling(region_counts=(3, 5, 10, 20, 30, 50), num_timesteps=168, networks=('edges',), solver='gurobi', options=None):
+    """measure how size, build time, solve time and memory of the basismodell grow with the number of regions.
+
+    The models are built on synthetic regions, networks and timeseries, see synthetic.make_synthetic_case. The peak
+    memory is the memory allocated by python while the inputs and the sparse matrix are built and the solution is
+    extracted; the memory of the solver itself is not traced.
+
+    Arguments:
+        region_counts -- numbers of regions to benchmark
+        num_timesteps -- number of timesteps of every model
+        networks -- networks to benchmark, 'pairs' and/or 'edges', see lp_matrix.make_links
+        solver -- solver to use, see lp_solvers.SOLVERS
+        options -- dictionary of solver specific parameters, see lp_solvers.solve_lp
+
+    Returns:
+        results -- dataframe with the number of links, variables, constraints and nonzeros, build and solve time,
+                   peak memory (in MB) and objective value per number of regions and network
+
+    Side effects:
+        None
+    """
+    results = []
+    for num_regions in region_counts:
+        settings, timeseries_2030 = synthetic.make_synthetic_case(num_regions, num_timesteps)
+        S = settings['countries']
+        S_neighbours = settings['neighbours']
+        T = settings['timesteps']
+        c = datageneration.get_costs(settings)
+        eta = datageneration.get_efficiencies(settings)
+        ramp = datageneration.get_ramps(settings)
+        for network in networks:
+            tracemalloc.start()
+            start = time.perf_counter()
+            inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+            lp = lp_matrix.build_basismodell_lp(T, S, S_neighbours, inputs, inputs, c, eta, ramp, network)
+            build_time = time.perf_counter() - start
+            solution, info = lp_solvers.solve_lp(lp, solver, print_result=False, options=options)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append({'regions': num_regions, 'network': network, 'neighbours': len(S_neighbours), 'links': len(lp.axes['E']),
+                            'variables': lp.num_vars, 'constraints': lp.num_constrs, 'nonzeros': lp.A.nnz,
+                            'build_time': build_time, 'solve_time': info['load_time'] + info['solve_time'],
+                            'peak_memory': peak/10**6, 'objective': solution.objective})
+    return pd.DataFrame(results)
+
+
+def benchmark_memory(settings, timeseries_2030, solver='gurobi', configurations=(('loop', False), ('loop', True), ('matrix', False), ('matrix', True))):
+    """measure the peak memory of the basismodell with and without the lean mode of the model builders.
+
+    Every configuration is solved in a fresh worker process, whose peak resident set size (RSS) includes the memory
+    of the solver. The loop-based builder (grb_model.solve_basismodell) always uses gurobi.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        solver -- solver of the matrix-based builder, see lp_solvers.SOLVERS
+        configurations -- tuples (builder, lean) to benchmark; builder 'loop' or 'matrix'
+
+    Returns:
+        results -- dataframe with wall time, RSS of the worker before the solve, peak RSS and peak RSS increase
+                   (in MB) and objective value per builder and lean mode
+
+    Side effects:
+        None
+    """
+    results = []
+    for builder, lean in configurations:
+        with ProcessPoolExecutor(max_workers=1) as executor:                           # fresh process, so the peak RSS is that of this solve
+            result = executor.submit(_measure_memory, settings, timeseries_2030, builder, lean, solver).result()
+        results.append(dict(result, builder=builder, lean=lean))
+    results = pd.DataFrame(results).set_index(['builder', 'lean'])
+    results['rss_increase'] = results['peak_rss'] - results['baseline_rss']
+    return results
+
+def _measure_memory(settings, timeseries_2030, builder, lean, solver):
+    """solve the basismodell in a worker process and get its wall time, RSS before the solve, peak RSS (in MB) and objective value."""
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = settings['timesteps']
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss                      # in kB
+    start = time.perf_counter()
+    if builder == 'loop':
+        _, _, C = grb_model.solve_basismodell(T, S, S_neighbours, inputs, inputs, c, eta, ramp, lean=lean)
+        objective = sum(C['v'].values()) + sum(C['f'].values())
+    else:
+        solution, _ = lp_solvers.solve_basismodell(T, S, S_neighbours, inputs, inputs, c, eta, ramp, solver=solver, print_result=False, lean=lean)
+        objective = solution.objective
+    wall_time = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'wall_time': wall_time, 'baseline_rss': baseline/1024, 'peak_rss': peak/1024, 'objective': objective}
+
+
+def benchmark_resolve(settings, timeseries_2030, limits, factors=(0.8, 0.9, 1.1, 1.2)):
+    """compare re-solving a grb_model.ParametricModel in place with building and solving the dispatch model from scratch.
+
+    Every factor gives two variations of the dispatch model: all transport and power limits scaled by the factor, and the
+    costs of fuel cells and electrolysis ('GtP', 'PtG') scaled by the factor. Each variation is solved by the loop-based
+    builder (grb_model.solve_dispatch), by the matrix builder (grb_model.solve_dispatch_arrays) and by updating and
+    re-solving one ParametricModel from the previous optimal basis.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL as returned by helperfun.get_limits
+        factors -- scaling factors of the variations
+
+    Returns:
+        results -- dataframe with the mean build (or update) time, solve time and total time per variation and the
+                   share of the total time of the loop-based builder
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = list(settings['timesteps'])
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    HTL, ETL, GtPL, PtGL, HL = limits
+    H0 = {s: 0 for s in S}
+
+    variations = []
+    for factor in factors:
+        scaled = [{k: v*factor for k, v in limit.items()} for limit in (HTL, ETL, GtPL, PtGL)]
+        variations.append((c, dict(zip(['HTL', 'ETL', 'GtPL', 'PtGL'], scaled))))
+        variations.append((dict(c, GtP=c['GtP']*factor, PtG=c['PtG']*factor), {'HTL': HTL, 'ETL': ETL, 'GtPL': GtPL, 'PtGL': PtGL}))
+
+    results = []
+    for c_variation, limits_variation in variations:
+        start = time.perf_counter()
+        model, _, _ = grb_model.solve_dispatch(T, S, S_neighbours, inputs, inputs, c_variation, eta, ramp, *limits_variation.values(), HL, H0,
+                                               last_step=True, rolling_horizon=False)
+        total_time = time.perf_counter() - start
+        results.append({'method': 'loop', 'build_time': total_time - model.Runtime, 'solve_time': model.Runtime, 'total_time': total_time})
+        start = time.perf_counter()
+        model, _ = grb_model.solve_dispatch_arrays(T, S, S_neighbours, inputs, inputs, c_variation, eta, ramp, *limits_variation.values(), HL, H0,
+                                                   last_step=True)
+        total_time = time.perf_counter() - start
+        results.append({'method': 'matrix', 'build_time': total_time - model.Runtime, 'solve_time': model.Runtime, 'total_time': total_time})
+
+    parametric = grb_model.make_parametric_dispatch(T, S, S_neighbours, inputs, inputs, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step=True)
+    parametric.solve()                                                                  # optimal basis of the reference model
+    for c_variation, limits_variation in variations:
+        start = time.perf_counter()
+        parametric.update(c=c_variation, **limits_variation)
+        update_time = time.perf_counter() - start
+        parametric.solve()
+        total_time = time.perf_counter() - start
+        results.append({'method': 'parametric', 'build_time': update_time, 'solve_time': parametric.model.Runtime, 'total_time': total_time})
+
+    results = pd.DataFrame(results).groupby('method', sort=False).mean()
+    results['share_of_loop'] = results['total_time']/results.loc['loop', 'total_time']
+    return results
+
+
+def benchmark_decomposition(settings, timeseries_2030, block_counts=(4, 8, 16), solver='gurobi', tolerance=1e-4):
+    """compare the basismodell solved by temporal decomposition with the monolithic basismodell.
+
+    The total costs are the investment costs plus the variable costs of all timesteps but the first, see
+    benchmark_aggregation; the first timestep is in the first block of the decomposition, so both contain it alike.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        block_counts -- numbers of blocks to benchmark, see decomposition.make_blocks
+        solver -- solver of the monolithic model, the master problem and the blocks, see lp_solvers.SOLVERS
+        tolerance -- relative gap at which the decomposition stops, see decomposition.solve_basismodell_benders
+
+    Returns:
+        results -- dataframe with wall time, speedup, iterations, final gap, total costs and the relative errors of
+                   the total costs and of the sums of 'HL','GtPL','PtGL','ETL','HTL' per number of blocks
+
+    Side effects:
+        None
+    """
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = settings['timesteps']
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    c = datageneration.get_costs(settings)
+    eta = datageneration.get_efficiencies(settings)
+    ramp = datageneration.get_ramps(settings)
+    limits = ['HL','GtPL','PtGL','ETL','HTL']
+
+    start = time.perf_counter()
+    solution, _ = lp_solvers.solve_basismodell(T, S, S_neighbours, inputs, inputs, c, eta, ramp, solver=solver, print_result=False)
+    result = {'blocks': 1, 'wall_time': time.perf_counter() - start, 'iterations': 1, 'gap': 0.0,
+              'total_costs': solution.objective - solution['Cv'][0].sum()}
+    results = [dict(result, **{key: solution[key].sum() for key in limits})]
+    for num_blocks in block_counts:
+        V, info = decomposition.solve_basismodell_benders(T, S, S_neighbours, inputs, inputs, c, eta, ramp, num_blocks, solver=solver,
+                                                          tolerance=tolerance, print_result=False)
+        result = {'blocks': num_blocks, 'wall_time': info['solve_time'], 'iterations': info['iterations'], 'gap': info['gap'],
+                  'total_costs': info['objective'] - V['Cv'][0].sum()}
+        results.append(dict(result, **{key: V[key].sum() for key in limits}))
+    results = pd.DataFrame(results).set_index('blocks')
+    results['speedup'] = results['wall_time'].iloc[0]/results['wall_time']
+    for key in ['total_costs'] + limits:
+        results[key+'_error'] = results[key]/results[key].iloc[0] - 1                    # relative to the monolithic solve
+    return results
+
+
+STARTUP_COMMANDS = {'python': ['-c', 'pass'],
+                    'cli.py --help': ['cli.py', '--help'],
+                    'import helperfun': ['-c', 'import helperfun'],
+                    'basismodell modules': ['-c', 'import aggregation, costs, datageneration, lp_solvers, model_inputs, result_store'],
+                    'plotting libraries': ['-c', 'import helperfun, seaborn, matplotlib.pyplot; helperfun._setup_plotting()']}     # what every script imported before plotting was lazy
+
+def benchmark_startup(commands=STARTUP_COMMANDS, repeats=5):
+    """measure the cold-start time of the command line entry point and of the imports of a model run.
+
+    Every command runs in a fresh python interpreter, so module imports are not cached; the fastest of repeats runs is
+    reported to reduce the noise of the file system cache.
+
+    Arguments:
+        commands -- dictionary with the arguments of the python interpreter per label
+        repeats -- number of runs per command
+
+    Returns:
+        results -- dataframe with the fastest wall time per command, in seconds
+
+    Side effects:
+        raises RuntimeError if a command fails
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    results = dict()
+    for label, args in commands.items():
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable] + args, cwd=directory, capture_output=True)
+            times.append(time.perf_counter() - start)
+            if completed.returncode != 0:
+                raise RuntimeError(str('Startup command '+label+' failed: '+completed.stderr.decode()[-500:]))
+        results[label] = min(times)
+    return pd.DataFrame({'wall_time': results})
+
+
+if __name__ == '__main__':
+    ### settings
+    settings = dict()
+    settings['countries'] = ['DE', 'FR', 'NL']
+    settings['neighbours'] = [('DE', 'FR'),('DE','NL')]
+    settings['electricity_sources'] = ['wind','wind_onshore','wind_offshore','solar','otherRE','fossil','nuclear']
+    settings['reference_year'] = '2016-2018'                        # two years of data are needed for the 17520 timestep benchmark
+
+    print(benchmark_startup())
+    timeseries_2030 = datageneration.load_2030_timeseries(settings)
+    print(benchmark_model_inputs(dict(settings, timesteps=range(24*365*2)), timeseries_2030))
+    print(benchmark_basismodell_build(settings, timeseries_2030))
+    print(benchmark_network(dict(settings, timesteps=range(24*365)), timeseries_2030))
+    print(benchmark_compact(settings, timeseries_2030))
+    print(benchmark_aggregation(dict(settings, timesteps=range(24*365*2)), timeseries_2030))
+    print(benchmark_decomposition(dict(settings, timesteps=range(24*365*2)), timeseries_2030))
+    print(benchmark_memory(dict(settings, timesteps=range(24*365*2)), timeseries_2030))
+    print(benchmark_scaling())
+
+    settings['limits_source'] = 'basismodell'
+    print(benchmark_rolling_horizon(settings, timeseries_2030, helperfun.get_limits(settings)))
+    print(benchmark_lookahead(settings, timeseries_2030, helperfun.get_limits(settings)))
+    print(benchmark_commit_length(settings, timeseries_2030, helperfun.get_limits(settings)))
+    print(benchmark_backends(dict(settings, timesteps=range(24*365)), timeseries_2030, helperfun.get_limits(settings)))
+    print(benchmark_resolve(dict(settings, timesteps=range(24*365)), timeseries_2030, helperfun.get_limits(settings)))
+    print(benchmark_parallel_rolling_horizon(dict(settings, timesteps=range(24*365)), timeseries_2030, helperfun.get_limits(settings)))
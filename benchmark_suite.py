@@ -0,0 +1,238 @@
+### imports
+import os
+import json
+import time
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+import costs
+import datageneration
+import lp_matrix
+import lp_solvers
+import model_inputs
+import synthetic
+
+
+BENCHMARK_FILE = './data/internal_data/benchmarks.jsonl'                  # results of all suite runs, one json record per line
+PHASES = ['inputs', 'build', 'load', 'solve', 'extraction', 'postprocessing']
+
+
+def _commit():
+    """get the hash of the checked out git commit, or None outside of a git repository."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _case(num_regions, num_timesteps, seed):
+    """get settings, timeseries data, costs, efficiencies and ramps of a synthetic case."""
+    settings, timeseries_2030 = synthetic.make_synthetic_case(num_regions, num_timesteps, seed)
+    return (settings, timeseries_2030, datageneration.get_costs(settings), datageneration.get_efficiencies(settings),
+            datageneration.get_ramps(settings))
+
+def _postprocess(S, S_neighbours, inputs, V, c, links, limits=None):
+    """shape results like the master scripts: dataframes of the plotted variables and the cost breakdowns."""
+    V_df = {V_key: pd.DataFrame(V[V_key]) for V_key in ['H','GtP','PtG','EI','EX']}
+    for V_key in ['HT','ET']:
+        V_df[V_key] = pd.DataFrame(V[V_key][:,[links.index(x) if x in links else links.index(x[::-1]) for x in S_neighbours]],
+                                   columns=[str(x[0]+' --> '+x[1]) for x in S_neighbours])
+    costs_v = costs.variable_costs(inputs, V, c, links)
+    costs_f = costs.investment_costs(limits, c, S, links) if limits is not None else None
+    return V_df, costs_v, costs_f
+
+
+### models
+def _benchmark_basismodell(case, network, solver, options):
+    settings, timeseries_2030, c, eta, ramp = case
+    S, S_neighbours, T = settings['countries'], settings['neighbours'], settings['timesteps']
+    times = dict()
+    start = time.perf_counter()
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    times['inputs'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lp = lp_matrix.build_basismodell_lp(T, S, S_neighbours, inputs, inputs, c, eta, ramp, network)
+    times['build'] = time.perf_counter() - start
+    solution, info = lp_solvers.solve_lp(lp, solver, print_result=False, options=options)
+    times.update(load=info['load_time'], solve=info['solve_time'], extraction=info['extraction_time'])
+
+    start = time.perf_counter()
+    _postprocess(S, S_neighbours, inputs, solution.values, c, lp.axes['E'], solution.values)
+    times['postprocessing'] = time.perf_counter() - start
+    return times, lp, solution
+
+def _benchmark_dispatch(case, network, solver, options, limits):
+    settings, timeseries_2030, c, eta, ramp = case
+    S, S_neighbours, T = settings['countries'], settings['neighbours'], settings['timesteps']
+    HTL, ETL, GtPL, PtGL, HL = limits
+    times = dict()
+    start = time.perf_counter()
+    inputs = model_inputs.make_model_inputs(settings, timeseries_2030)
+    EE_cost, EE_sum, EV_arr = lp_matrix.make_input_arrays(T, S, inputs, inputs, c)
+    times['inputs'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lp = lp_matrix.build_dispatch_lp(list(T), S, S_neighbours, EE_cost, EE_sum, EV_arr, c, eta, ramp,
+                                     HTL, ETL, GtPL, PtGL, HL, {s: 0 for s in S}, True, network)
+    times['build'] = time.perf_counter() - start
+    solution, info = lp_solvers.solve_lp(lp, solver, print_result=False, options=options)
+    times.update(load=info['load_time'], solve=info['solve_time'], extraction=info['extraction_time'])
+
+    start = time.perf_counter()
+    _postprocess(S, S_neighbours, inputs, solution.values, c, lp.axes['E'])
+    times['postprocessing'] = time.perf_counter() - start
+    return times, lp, solution
+
+def _benchmark_rolling_horizon(case, network, limits, t_horizon, num_steps):
+    import grb_model                                                                    # needs gurobipy, so only imported here
+    settings, timeseries_2030, c, eta, ramp = case
+    S, S_neighbours = settings['countries'], settings['neighbours']
+    T = range(num_steps + t_horizon)                                                    # the last window ends t_horizon timesteps after the last step
+    times = dict.fromkeys(PHASES, 0.0)
+    start = time.perf_counter()
+    inputs = model_inputs.make_model_inputs(dict(settings, timesteps=T), timeseries_2030)
+    EE_cost, EE_sum, EV_arr = lp_matrix.make_input_arrays(T, S, inputs, inputs, c)
+    times['inputs'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    window = grb_model.DispatchWindow(t_horizon, S, S_neighbours, c, eta, ramp, *limits, network=network)
+    times['build'] = time.perf_counter() - start
+
+    lp = window.lp
+    V = {V_key: np.zeros((num_steps,) + idx.shape[1:]) for V_key, idx in lp.var.items()}
+    H0 = {s: 0 for s in S}
+    for step in range(num_steps):                                                       # same loop as grb_model.solve_rolling_horizon
+        start = time.perf_counter()
+        x = window.solve(EE_cost[step:step+t_horizon], EE_sum[step:step+t_horizon], EV_arr[step:step+t_horizon], H0)
+        wall_time = time.perf_counter() - start
+        times['solve'] += window.model.Runtime
+        times['load'] += wall_time - window.model.Runtime                                  # updating the data and the warm start basis
+        start = time.perf_counter()
+        for V_key, idx in lp.var.items():
+            V[V_key][step] = x[idx[0]]
+        H0 = dict(zip(S, V['H'][step]))
+        times['extraction'] += time.perf_counter() - start
+    if network == 'pairs':
+        V['ET'] = V['ETP'] - V['ETN']
+        V['HT'] = V['HTP'] - V['HTN']
+
+    start = time.perf_counter()
+    _postprocess(S, S_neighbours, inputs.select(T[:num_steps]), V, c, lp.axes['E'])
+    times['postprocessing'] = time.perf_counter() - start
+    return times, lp, V['Cv'].sum()
+
+
+def run_benchmark_suite(horizons=(168, 720, 8760, 17520), region_counts=(3, 10, 30), models=('basismodell', 'dispatch', 'rolling_horizon'),
+                        network='edges', solver='gurobi', options=None, t_horizon=24*7*2, seed=0, output=BENCHMARK_FILE):
+    """time the phases of the basismodell, the dispatch model and the rolling horizon on synthetic data.
+
+    Every model is run for every combination of horizon and number of regions on a synthetic case (see
+    synthetic.make_synthetic_case), so the suite runs offline and gives the same models on every machine. The phases are:
+        inputs -- making the model inputs from the timeseries dataframe
+        build -- building the sparse matrix (for the rolling horizon: the DispatchWindow model)
+        load -- loading the matrix into the solver (for the rolling horizon: updating data and warm start of every window)
+        solve -- solver time
+        extraction -- splitting the solution vectors into variable families (for the rolling horizon: committing every window)
+        postprocessing -- shaping the results into dataframes and calculating the costs, as in the master scripts
+    The dispatch models use the limits of the basismodell of the same case. The rolling horizon needs gurobi and solves
+    horizon windows of t_horizon timesteps each. The peak memory is the memory allocated by python during the run of
+    a model; the memory of the solver itself is not traced. A case that fails, e.g. because it is too large for the
+    solver license, is recorded with its error and the suite continues.
+
+    Arguments:
+        horizons -- numbers of timesteps to benchmark
+        region_counts -- numbers of regions to benchmark
+        models -- models to benchmark, any of 'basismodell', 'dispatch', 'rolling_horizon'
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        solver -- solver of the basismodell and the dispatch model, see lp_solvers.SOLVERS
+        options -- dictionary of solver specific parameters, see lp_solvers.solve_lp
+        t_horizon -- length of the rolling time horizon
+        seed -- seed of the synthetic cases
+        output -- path of the json lines file the results are appended to; if None, the results are not written
+
+    Returns:
+        results -- dataframe with one row per model, horizon and number of regions with the time of each phase ('<phase>_time'),
+                   the total time, the peak memory (in MB), the model size, the objective value and the error, if any
+
+    Side effects:
+        appends one json record per row of results to output
+    """
+    commit = _commit()
+    results = []
+    for num_regions in region_counts:
+        for num_timesteps in horizons:
+            case = _case(num_regions, num_timesteps + (t_horizon if 'rolling_horizon' in models else 0), seed)
+            case[0]['timesteps'] = range(num_timesteps)
+            limits = None
+            for model in models:
+                record = {'commit': commit, 'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'), 'model': model,
+                          'horizon': num_timesteps, 'regions': num_regions, 'network': network,
+                          'solver': 'gurobi' if model == 'rolling_horizon' else solver}
+                tracemalloc.start()
+                try:
+                    if model == 'basismodell':
+                        times, lp, solution = _benchmark_basismodell(case, network, solver, options)
+                        objective = solution.objective
+                        V, _ = solution.to_dicts()
+                        limits = (V['HTL'], V['ETL'], V['GtPL'], V['PtGL'], V['HL'])       # limits of the dispatch models
+                    elif limits is None:
+                        raise RuntimeError('the limits of the basismodell are needed but the basismodell was not solved')
+                    elif model == 'dispatch':
+                        times, lp, solution = _benchmark_dispatch(case, network, solver, options, limits)
+                        objective = solution.objective
+                    elif model == 'rolling_horizon':
+                        times, lp, objective = _benchmark_rolling_horizon(case, network, limits, t_horizon, num_timesteps)
+                    else:
+                        raise ValueError(str('Unknown model '+str(model)+', options: basismodell, dispatch, rolling_horizon'))
+                except Exception as error:                                              # record the failed case and go on with the next one
+                    record['error'] = str(type(error).__name__+': '+str(error))
+                else:
+                    record.update({str(phase+'_time'): times[phase] for phase in PHASES})
+                    record['total_time'] = sum(times.values())
+                    record.update(variables=lp.num_vars, constraints=lp.num_constrs, nonzeros=int(lp.A.nnz), objective=float(objective))
+                finally:
+                    record['peak_memory'] = tracemalloc.get_traced_memory()[1]/10**6
+                    tracemalloc.stop()
+                results.append(record)
+                print(str( model+', '+str(num_timesteps)+' timesteps, '+str(num_regions)+' regions: '
+                           +(record['error'] if 'error' in record else str(round(record['total_time'], 3))+' s') ))
+                if output is not None:
+                    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+                    with open(output, 'a') as f:
+                        f.write(json.dumps(record) + '\n')
+    return pd.DataFrame(results)
+
+
+def load_benchmarks(path=BENCHMARK_FILE):
+    """load the results of all suite runs written by run_benchmark_suite as dataframe."""
+    return pd.read_json(path, lines=True, dtype={'commit': str})
+
+def compare_benchmarks(results, baseline, candidate, columns=('total_time', 'solve_time', 'build_time', 'peak_memory')):
+    """compare the results of two commits, e.g. to find regressions.
+
+    Arguments:
+        results -- dataframe as returned by load_benchmarks
+        baseline, candidate -- commit hashes; for repeated runs of a commit the last run counts
+        columns -- measurements to compare
+
+    Returns:
+        comparison -- dataframe with one row per model, horizon, number of regions, network and solver and the ratio
+                      candidate/baseline of every measurement; ratios above 1 are regressions
+    """
+    keys = ['model', 'horizon', 'regions', 'network', 'solver']
+    runs = [results[results['commit'] == commit].groupby(keys)[list(columns)].last() for commit in (baseline, candidate)]
+    return (runs[1]/runs[0]).dropna(how='all')
+
+
+if __name__ == '__main__':
+    ### settings
+    settings = dict()
+    settings['horizons'] = (168, 720, 8760, 17520)           # numbers of timesteps
+    settings['region_counts'] = (3, 10, 30)                 # numbers of synthetic regions
+    settings['solver'] = 'gurobi'                           # options: 'gurobi', 'highs'
+
+    pd.set_option('display.width', 200)
+    results = run_benchmark_suite(settings['horizons'], settings['region_counts'], solver=settings['solver'])
+    print(results.drop(columns=['commit', 'timestamp']).to_string())
@@ -0,0 +1,65 @@
+import json
+import os
+import numpy as np
+
+
+STATE_FILE = 'state.json'       # step to continue from, storage levels at that step and parameters of the run
+
+
+class RollingHorizonCheckpoint:
+    """on-disk store of the committed results of a rolling horizon run, so a run can be resumed after a crash.
+
+    Every variable family is a memory-mapped .npy file with one row per committed step, which the rolling horizon
+    writes into directly instead of an in-memory array. save() flushes the files and then replaces the state file with
+    the step to continue from and the stored hydrogen H0 before that step, so the state never points past results that
+    are not on disk. A checkpoint is only resumed by a run with the same parameters.
+
+    The warm start basis of the solver is not saved: the resumed window is solved by a new model without the basis of
+    the previous window. Where a window has several optimal solutions, the resumed run can therefore commit another one
+    than an uninterrupted run, and as its storage levels then differ, all later windows can differ too. Every committed
+    window is still optimal for its H0, but the results of a resumed run are not bit-identical to those of an
+    uninterrupted run.
+    """
+    def __init__(self, directory, run, shapes):
+        """open the checkpoint in directory, or start a new one if directory holds no checkpoint of the same run.
+
+        Arguments:
+            directory -- directory of the checkpoint; created if missing
+            run -- dictionary with the parameters of the run, e.g. first and last step and t_horizon; json-serializable
+            shapes -- dictionary with the shape of the results of each variable family
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.run = json.loads(json.dumps(run))                                          # as read back from the state file
+        state = self._load_state()
+        resume = state is not None and state['run'] == self.run
+        self.step = state['step'] if resume else None                                   # step to continue from, None for a new run
+        self.H0 = state['H0'] if resume else None                                       # stored hydrogen before that step
+        self.V = dict()
+        for key, shape in shapes.items():
+            path = os.path.join(directory, key+'.npy')
+            if resume:
+                self.V[key] = np.lib.format.open_memmap(path, mode='r+')
+            else:
+                self.V[key] = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=shape)
+
+    def _load_state(self):
+        path = os.path.join(self.directory, STATE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save(self, step, H0):
+        """flush the results and record that the run continues at step with the stored hydrogen H0 (dictionary per country)."""
+        for arr in self.V.values():
+            arr.flush()
+        path = os.path.join(self.directory, STATE_FILE)
+        with open(path+'.tmp', 'w') as f:
+            json.dump({'run': self.run, 'step': int(step), 'H0': {s: float(h) for s, h in H0.items()}}, f)
+        os.replace(path+'.tmp', path)                                                   # atomic, a crash leaves the previous state
+        self.step, self.H0 = int(step), dict(H0)
+
+    def results(self):
+        """get the results as in-memory arrays."""
+        return {key: np.array(arr) for key, arr in self.V.items()}
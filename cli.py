@@ -0,0 +1,412 @@
+import sys
+import json
+import argparse
+
+
+### settings
+DEFAULT_SETTINGS = {
+    # process flow settings
+    'generate_2030_timeseries': False,          # if True, new timeseries data will be generated, if False it will be loaded from csv file
+    # model settings
+    'countries': ['DE', 'FR', 'NL'],            # list of countries which the model will consider
+    'neighbours': [('DE', 'FR'),('DE','NL')],
+    'network': 'pairs',                         # options: 'pairs', 'edges'
+    'electricity_sources': ['wind','wind_onshore','wind_offshore','solar','otherRE','fossil','nuclear'],
+    'solver': 'gurobi',                         # options: 'gurobi', 'highs'
+    'lean': False,                              # if True, the LP is freed once it is loaded into the solver
+    'compact': False,                           # if True, the LP has no variables Cv and dH; they are calculated after the solve
+    'aggregation': None,                        # options: None, (period length, number of representative periods)
+    'timesteps': None,                          # number of timesteps; None: the default of the model for reference_year, see default_timesteps
+    # data generation settings
+    'reference_year': '2016-2018',              # options: '2017', '2019', '2016-2018'
+    'export_2030_timeseries': False,            # if True, generated timeseries data will be exported to a csv-file
+    'fill_strategy': 'previous_week',           # options: 'previous_week', 'interpolate', 'seasonal_profile'
+    'cache_external_data': True,                # if True, the loaded external data is cached
+    'export_results': True,                     # if True, all results are written to one compressed result store, see result_store.py
+    'export_spreadsheets': [],                  # options: [], ['csv'], ['csv', 'xlsx']
+    # plot settings
+    'plot_variables': ['H','GtP','PtG','EI','EX','HT','ET'],
+    # settings specific to dispatch and rolling horizon model
+    'limits_source': 'basismodell',             # options: 'basismodell', 'recherche'
+    'limits_run': None,                         # None (last run of the basismodell) or input key of a basismodell run with a solve cache
+    'solve_cache': None,                        # None or directory of a solve cache, see solve_cache.py
+    'solve_cache_size_gb': 2,                   # size bound of the solve cache; least recently used solutions are removed beyond it
+    'rh_horizon': 24*7*2,                       # number of timesteps of each rolling horizon window
+    'rh_segments': 1,                           # 1 (sequential) or number of segments solved in parallel worker processes
+    'rh_warmup': 24*7,                          # number of steps each parallel segment is solved before its results are kept
+    'rh_resolution': None,                      # None (hourly) or list of (block_length, until), see lp_matrix.make_durations
+    'rh_commit_length': 1,                      # number of hours committed from each window
+    'rh_checkpoint': None,                      # None or directory of a checkpoint to save to and resume from
+    'rh_checkpoint_every': 168,                 # number of windows solved between two checkpoints
+    'telemetry_file': None,                     # None or path of a json lines file with one record per solve (per window for the rolling horizon)
+}
+TEXT_SETTINGS = ['limits_run', 'solve_cache', 'rh_checkpoint', 'telemetry_file']     # settings that are text or None, e.g. an input key that could be read as number
+MODELS = ['generate', 'basismodell', 'dispatch', 'rh']
+RESULTS_DIR = './data/internal_data/results/'
+OPERATION_VARIABLES = ['H','GtP','PtG','EI','EX','HT','ET']        # time-indexed results that are kept as dataframes
+LIMIT_VARIABLES = ['HTL','ETL','GtPL','PtGL','HL']
+
+def default_timesteps(settings, model):
+    """get the default number of timesteps of model for settings['reference_year']: two years for the reference
+    '2016-2018' (one year for the rolling horizon, plus one window), else one year."""
+    if settings['reference_year'] != '2016-2018':
+        return 24*365
+    if model == 'rh':
+        return 24*365 + settings['rh_horizon']
+    return 24*365*2
+
+def load_config(path=None, model='basismodell', overrides=None):
+    """get the settings of a run from a json config file.
+
+    Arguments:
+        path -- path of a json file with a dictionary of settings; settings it does not contain keep their value in DEFAULT_SETTINGS
+        model -- one of MODELS; sets the default timesteps
+        overrides -- dictionary of settings that take precedence over the config file
+
+    Returns:
+        settings -- dictionary of settings as used by the master scripts, e.g. with settings['timesteps'] as range object
+
+    Side effects:
+        raises ValueError for settings that are not in DEFAULT_SETTINGS
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    given = dict()
+    if path is not None:
+        with open(path) as f:
+            given.update(json.load(f))
+    given.update(overrides or dict())
+    unknown = [key for key in given if key not in DEFAULT_SETTINGS]
+    if unknown:
+        raise ValueError(str('Unknown settings: '+', '.join(unknown)))
+    settings.update(given)
+    settings['neighbours'] = [tuple(x) for x in settings['neighbours']]        # json has no tuples
+    if settings['aggregation'] is not None:
+        settings['aggregation'] = tuple(settings['aggregation'])
+    if settings['timesteps'] is None:
+        settings['timesteps'] = default_timesteps(settings, model)
+    settings['timesteps'] = range(settings['timesteps'])
+    return settings
+
+
+### runs
+def get_timeseries(settings):
+    """generate or load the timeseries_2030 dataframe, depending on settings['generate_2030_timeseries']."""
+    import datageneration
+
+    if settings['generate_2030_timeseries'] == True:
+        timeseries_ref, estimates_2030 = datageneration.load_external_data(settings)
+        return datageneration.create_2030_timeseries(settings, timeseries_ref, estimates_2030)
+    return datageneration.load_2030_timeseries(settings)
+
+def run_generate(settings):
+    """generate the timeseries_2030 data for settings['reference_year'] and export it to a csv-file.
+
+    Returns:
+        timeseries_2030 -- dataframe with timeseries data for 2030
+    """
+    import datageneration
+
+    settings = dict(settings, export_2030_timeseries=True)
+    timeseries_ref, estimates_2030 = datageneration.load_external_data(settings)
+    return datageneration.create_2030_timeseries(settings, timeseries_ref, estimates_2030)
+
+def _model_parameters(settings):
+    import datageneration
+
+    return datageneration.get_costs(settings), datageneration.get_efficiencies(settings), datageneration.get_ramps(settings)
+
+def _keep_2030(settings, costs_v, V_df):
+    """keep only the costs and results of 2030 of a two year optimization; the result store keeps the whole two year optimization."""
+    if settings['reference_year'] != '2016-2018':
+        return costs_v
+    for key in OPERATION_VARIABLES:
+        V_df[key] = V_df[key].iloc[int(8760/2):int(-8760/2),:]
+        V_df[key].index = list(range(8760))
+    return costs_v.iloc[int(8760/2):int(-8760/2)]
+
+def _metadata(settings, model, C, keys):
+    """get the metadata of a result store: the model, the settings keys and the costs per country."""
+    metadata = {'model': model, 'countries': settings['countries'], 'neighbours': settings['neighbours']}
+    metadata.update({key: settings[key] for key in keys})
+    metadata['costs'] = C['country'].to_dict()
+    return metadata
+
+def _solve_cache(settings):
+    import solve_cache
+
+    if settings['solve_cache'] is None:
+        return None
+    return solve_cache.SolveCache(settings['solve_cache'], int(settings['solve_cache_size_gb']*1024**3))
+
+def _solve_telemetry(settings):
+    import telemetry
+
+    if settings['telemetry_file'] is None:
+        return None
+    return telemetry.SolveTelemetry(settings['telemetry_file'])
+
+def _limits_metadata(settings, limits):
+    """record which limits a run used: their content hash ('limits_key') and, for limits of the basismodell, the input
+    key of the basismodell run they come from ('limits_run', None if that run was not cached), see helperfun.get_limits_path."""
+    import helperfun
+    import result_store
+    import solve_cache
+
+    metadata = {'limits_source': settings['limits_source'], 'limits_key': solve_cache.input_key(*limits)}
+    if settings['limits_source'] == 'basismodell':
+        with result_store.ResultStore(helperfun.get_limits_path(settings)) as basismodell:
+            metadata['limits_run'] = basismodell.metadata.get('input_key')
+    return metadata
+
+def _export(settings, directory, V_df):
+    import result_store
+
+    if settings['export_spreadsheets']:
+        result_store.export_spreadsheets(V_df, str(RESULTS_DIR+directory), settings['export_spreadsheets'])
+
+def run_basismodell(settings):
+    """solve the basismodell with the given settings, calculate its costs and export the results.
+
+    Arguments:
+        settings -- dictionary of settings, see DEFAULT_SETTINGS
+
+    Returns:
+        solution -- solution.Solution of the whole optimization
+        V_df -- dictionary of dataframes with the results, for the reference '2016-2018' only of 2030
+        C -- dictionary of costs, see costs.summarize_costs
+
+    Side effects:
+        writes the result store Basismodell/results.npz, which the dispatch and rolling horizon models take their
+        limits from, if settings['export_results'] == True
+    """
+    import aggregation
+    import costs
+    import lp_solvers
+    import model_inputs
+    import result_store
+    import solve_cache
+
+    timeseries_2030 = get_timeseries(settings)
+    T = settings['timesteps']
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    EE = EV = model_inputs.make_model_inputs(settings, timeseries_2030)     # array-backed generation and demand data
+    c, eta, ramp = _model_parameters(settings)
+
+    solve_telemetry = _solve_telemetry(settings)
+    if settings['aggregation'] is None:
+        solution, info = lp_solvers.solve_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp, solver=settings['solver'], network=settings['network'],
+                                                      lean=settings['lean'], cache=_solve_cache(settings), compact=settings['compact'],
+                                                      telemetry=solve_telemetry)
+    else:
+        representative_periods = aggregation.aggregate(EE, *settings['aggregation'])
+        solution, info = lp_solvers.solve_basismodell_aggregated(representative_periods, S, S_neighbours, c, eta, ramp, solver=settings['solver'],
+                                                                network=settings['network'], lean=settings['lean'], cache=_solve_cache(settings),
+                                                                compact=settings['compact'], telemetry=solve_telemetry)
+        EE = representative_periods.expanded_inputs()                 # the costs are calculated with the inputs the operation was optimized for
+    if solve_telemetry is not None:
+        solve_telemetry.close()
+    pairs = solution.axes['E']                                          # order of the columns of the transport results
+    V_df = solution.frames(OPERATION_VARIABLES+LIMIT_VARIABLES, S_neighbours)
+
+    costs_v = costs.variable_costs(EE, solution, c, pairs)
+    costs_f = costs.investment_costs(solution, c, S, pairs)
+    C = costs.summarize_costs(_keep_2030(settings, costs_v, V_df), costs_f)
+
+    if settings['export_results'] == True:
+        metadata = _metadata(settings, 'basismodell', C, ['network', 'solver', 'reference_year', 'aggregation'])
+        if settings['solve_cache'] is not None:                         # only a cached solution can be found by settings['limits_run']
+            metadata['input_key'] = info['input_key']                   # key of the solution in the solve cache
+        metadata['limits_key'] = solve_cache.input_key(*[dict(zip(solution.axes[solution.dims[V_key][0]], solution[V_key].tolist()))
+                                                         for V_key in LIMIT_VARIABLES])
+        result_store.write_solution(str(RESULTS_DIR+'Basismodell/results.npz'), solution, metadata)
+    _export(settings, 'Basismodell', V_df)
+    return solution, V_df, C
+
+def run_dispatch(settings):
+    """solve the dispatch model with the limits of settings['limits_source'], calculate its costs and export the results.
+
+    Returns:
+        solution, V_df, C -- see run_basismodell
+
+    Side effects:
+        writes the result store Dispatchmodell/results.npz, if settings['export_results'] == True
+    """
+    import costs
+    import helperfun
+    import lp_solvers
+    import model_inputs
+    import result_store
+
+    timeseries_2030 = get_timeseries(settings)
+    T = list(settings['timesteps'])
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    EE = EV = model_inputs.make_model_inputs(settings, timeseries_2030)     # array-backed generation and demand data
+    c, eta, ramp = _model_parameters(settings)
+    HTL, ETL, GtPL, PtGL, HL = helperfun.get_limits(settings)
+    H0 = {s: 0 for s in S}                                                  # each country has 0 H2 stored in t = 0
+
+    solve_telemetry = _solve_telemetry(settings)
+    solution, info = lp_solvers.solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp,
+                                               HTL, ETL, GtPL, PtGL, HL, H0, last_step=True, solver=settings['solver'], print_result=True,
+                                               network=settings['network'], lean=settings['lean'], cache=_solve_cache(settings),
+                                               compact=settings['compact'], telemetry=solve_telemetry)
+    if solve_telemetry is not None:
+        solve_telemetry.close()
+    pairs = solution.axes['E']                                          # order of the columns of the transport results
+    V_df = solution.frames(OPERATION_VARIABLES, S_neighbours)
+
+    costs_v = costs.variable_costs(EE, solution, c, pairs)
+    costs_f = costs.investment_costs({'HTL': HTL, 'ETL': ETL, 'GtPL': GtPL, 'PtGL': PtGL, 'HL': HL}, c, S, pairs)
+    C = costs.summarize_costs(_keep_2030(settings, costs_v, V_df), costs_f)
+
+    if settings['export_results'] == True:
+        metadata = _metadata(settings, 'dispatch', C, ['network', 'solver', 'reference_year'])
+        metadata['input_key'] = info['input_key']
+        metadata.update(_limits_metadata(settings, [HTL, ETL, GtPL, PtGL, HL]))
+        result_store.write_solution(str(RESULTS_DIR+'Dispatchmodell/results.npz'), solution, metadata)
+    _export(settings, 'Dispatchmodell', V_df)
+    return solution, V_df, C
+
+def run_rolling_horizon(settings):
+    """solve the rolling horizon model with the limits of settings['limits_source'], calculate its costs and export the results.
+
+    For the reference '2016-2018', the year starts in the middle of the two year timeseries with the stored hydrogen of
+    the basismodell, which is read from its result store. The rolling horizon is only built with gurobi in the standard
+    formulation, see grb_model.solve_rolling_horizon.
+
+    Returns:
+        V -- dictionary of arrays with the committed values
+        V_df, C -- see run_basismodell
+
+    Side effects:
+        writes the result store RH_Modell/results.npz, if settings['export_results'] == True; raises ValueError if
+        settings['solver'], settings['lean'] or settings['compact'] ask for something the rolling horizon does not support
+    """
+    import pandas as pd
+
+    import costs
+    import grb_model
+    import helperfun
+    import lp_matrix
+    import model_inputs
+    import result_store
+    from solution import make_frame
+
+    unsupported = [str(key+'='+str(settings[key])) for key, default in [('solver', 'gurobi'), ('lean', False), ('compact', False)]
+                   if settings[key] != default]
+    if unsupported:
+        raise ValueError(str('Settings not supported by the rolling horizon: '+', '.join(unsupported)))
+
+    timeseries_2030 = get_timeseries(settings)
+    T = list(settings['timesteps'])
+    if settings['reference_year'] == '2016-2018':
+        timeseries_2030 = timeseries_2030.iloc[int(8760/2):int(8760/2)+len(T),:]
+        timeseries_2030.index = T
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    EE = EV = model_inputs.make_model_inputs(settings, timeseries_2030)     # array-backed generation and demand data
+    c, eta, ramp = _model_parameters(settings)
+    HTL, ETL, GtPL, PtGL, HL = helperfun.get_limits(settings)
+    if settings['reference_year'] == '2016-2018':
+        with result_store.ResultStore(str(RESULTS_DIR+'Basismodell/results.npz')) as basismodell:   # only the blocks of H that are needed are read
+            H0 = dict(zip(basismodell.axes['S'], basismodell.read('H', int(8760/2), int(8760/2)+1)[0].tolist()))
+            H_seed = basismodell.read('H', int(8760/2), int(8760/2)+len(T))[:,[basismodell.axes['S'].index(s) for s in S]]
+        H0 = {s: H0[s] for s in S}                                              # each country has as much H2 stored in t = 0 as they have in the same timestep when using the basic model
+    else:
+        H0 = {s: 0 for s in S}                                                  # each country has 0 H2 stored in t = 0 (and t = 8760)
+
+    t_horizon = settings['rh_horizon']
+    solve_telemetry = _solve_telemetry(settings)
+    if settings['rh_segments'] == 1:
+        V = grb_model.solve_rolling_horizon(T, S, S_neighbours, EE, EV, c, eta, ramp,
+                                            HTL, ETL, GtPL, PtGL, HL, H0, t_horizon, network=settings['network'], telemetry=solve_telemetry,
+                                            resolution=settings['rh_resolution'], commit_length=settings['rh_commit_length'],
+                                            checkpoint=settings['rh_checkpoint'], checkpoint_every=settings['rh_checkpoint_every'])
+    else:
+        if settings['reference_year'] != '2016-2018':                      # segments start with the storage levels of a perfect foresight dispatch
+            H_seed = grb_model.solve_storage_seed(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, network=settings['network'],
+                                                  telemetry=solve_telemetry)
+        V, H_gap = grb_model.solve_rolling_horizon_parallel(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0,
+                                                            t_horizon, H_seed, settings['rh_segments'], settings['rh_warmup'], network=settings['network'],
+                                                            telemetry=solve_telemetry, resolution=settings['rh_resolution'],
+                                                            commit_length=settings['rh_commit_length'], checkpoint=settings['rh_checkpoint'],
+                                                            checkpoint_every=settings['rh_checkpoint_every'])
+        print('Difference of stored hydrogen between the end of each segment and the warm-up of the next segment:')
+        print(pd.DataFrame(H_gap, columns=S))
+    if solve_telemetry is not None:
+        solve_telemetry.close()
+
+    pairs = lp_matrix.make_links(S, S_neighbours, settings['network'])[0]       # order of the columns of the transport results
+    dims = {V_key: ('T','E') if V_key in ['ETP','ETN','HTP','HTN','ET','HT'] else ('T','S') for V_key in V}
+    axes = {'T': range(len(V['H'])), 'S': S, 'E': pairs}
+    V_df = dict()
+    for V_key in OPERATION_VARIABLES:
+        V_df[V_key] = make_frame(V[V_key], dims[V_key], axes, S_neighbours).reindex(range(8760))
+
+    costs_v = costs.variable_costs(EE.window(0, len(V['H'])), V, c, pairs)     # costs of the committed timesteps
+    costs_f = costs.investment_costs({'HTL': HTL, 'ETL': ETL, 'GtPL': GtPL, 'PtGL': PtGL, 'HL': HL}, c, S, pairs)
+    C = costs.summarize_costs(costs_v, costs_f)
+
+    if settings['export_results'] == True:
+        metadata = _metadata(settings, 'rolling_horizon', C, ['network', 'reference_year', 'rh_horizon', 'rh_segments', 'rh_resolution',
+                                                              'rh_commit_length'])
+        metadata.update(_limits_metadata(settings, [HTL, ETL, GtPL, PtGL, HL]))
+        result_store.write_results(str(RESULTS_DIR+'RH_Modell/results.npz'), V, dims, axes, metadata)
+    _export(settings, 'RH_Modell', V_df)
+    return V, V_df, C
+
+RUNS = {'generate': run_generate, 'basismodell': run_basismodell, 'dispatch': run_dispatch, 'rh': run_rolling_horizon}
+
+
+### command line
+def _parse_value(key, text):
+    """parse the value of a --set option: as text for text settings, e.g. reference_year=2017, else
+    as json, e.g. timesteps=168 or aggregation=[24,12]; text that is no json is kept as text."""
+    if isinstance(DEFAULT_SETTINGS.get(key), str) or key in TEXT_SETTINGS:
+        return None if text == 'null' else text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def main(argv=None):
+    """run a model from the command line, e.g.
+
+        python cli.py generate --config config.json
+        python cli.py basismodell --config config.json
+        python cli.py dispatch --config config.json --set reference_year=2017
+        python cli.py rh --config config.json --plot
+
+    The settings are read from a json config file (see config.json) on top of DEFAULT_SETTINGS. The models and the
+    plotting libraries are only imported by the subcommand that needs them, so the entry point also starts quickly on
+    headless batch workers.
+    """
+    parser = argparse.ArgumentParser(prog='cli.py', description='Generate the 2030 timeseries or solve one of the models.')
+    parser.add_argument('model', choices=MODELS, help='generate: 2030 timeseries, basismodell, dispatch or rh: rolling horizon model')
+    parser.add_argument('-c', '--config', help='json file with settings, see DEFAULT_SETTINGS in cli.py')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='KEY=VALUE', help='override a setting of the config file')
+    parser.add_argument('--plot', action='store_true', help="plot settings['plot_variables'] after the run")
+    args = parser.parse_args(argv)
+
+    overrides = dict()
+    for item in args.set:
+        key, sep, value = item.partition('=')
+        if not sep:
+            parser.error(str('--set expects KEY=VALUE, got '+item))
+        overrides[key] = _parse_value(key, value)
+    try:
+        settings = load_config(args.config, args.model, overrides)
+    except ValueError as error:
+        parser.error(str(error))
+
+    result = RUNS[args.model](settings)
+    if args.plot and args.model != 'generate':
+        import helperfun
+
+        helperfun.plot_results(result[1], settings['plot_variables'], settings['countries'])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from model_inputs import COST_SOURCES
+
+
+VARIABLE_COST_TECHNOLOGIES = ['EE_'+source for source in COST_SOURCES] + ['EE_import','EE_export','H_import','H_export','GtP','PtG','H','ET','HT']
+INVESTMENT_COST_TECHNOLOGIES = ['HL','GtPL','PtGL','ETL','HTL']
+
+
+def _as_array(values, labels):
+    """get values given as dictionary keyed by labels or as array in the order of labels as array.
+
+    Pairs of countries missing in a dictionary take the value of the reversed pair, else zero, so transport limits
+    of either network (see lp_matrix.make_links) can be used.
+    """
+    if isinstance(values, dict):
+        return np.array([values[label] if label in values or not isinstance(label, tuple) else values.get(label[::-1], 0.0)
+                         for label in labels], dtype=float)
+    return np.asarray(values, dtype=float)
+
+def _origin_matrix(S, pairs, end_sign):
+    """get a matrix of shape (pairs, S) that adds up values of pairs of countries in the country each pair starts in.
+
+    A pair whose reversed pair is not part of pairs (an edge of the 'edges' network, see lp_matrix.make_links) stands
+    for both directions, so its values are also added, multiplied by end_sign, in the country it ends in.
+    """
+    M = np.zeros((len(pairs), len(S)))
+    M[np.arange(len(pairs)), [S.index(s) for (s,_) in pairs]] = 1
+    for i, (s, s2) in enumerate(pairs):
+        if (s2,s) not in pairs:
+            M[i, S.index(s2)] = end_sign
+    return M
+
+
+def variable_costs(EE, V, c, pairs):
+    """calculate the variable costs (2) per timestep, country and technology.
+
+    Arguments:
+        EE -- model_inputs.ModelInputs with the generation of the same timesteps as V
+        V -- dictionary of arrays with optimal values; shape (T, S) for 'H','GtP','PtG','EI','EX','HI','HX' and (T, pairs) for 'ET','HT'
+        c -- dictionary of costs
+        pairs -- list of ordered pairs of countries (or of edges) in the order of the columns of the transport variables
+
+    Returns:
+        costs_v -- dataframe with one row per timestep and one column per (country, technology)
+
+    Side effects:
+        None
+    """
+    S = EE.S
+    parts = dict()
+    for source in COST_SOURCES:
+        parts['EE_'+source] = EE.generation(source)*c['EE_'+source]
+    parts['EE_import'] = V['EI']*c['EE_import']
+    parts['EE_export'] = -V['EX']*c['EE_export']
+    parts['H_import'] = V['HI']*c['H_import']
+    parts['H_export'] = -V['HX']*c['H_export']
+    for key in ['GtP','PtG','H']:
+        parts[key] = V[key]*c[key]
+    M = _origin_matrix(S, pairs, -1)
+    for key in ['ET','HT']:
+        parts[key] = (0.5*c[key]*V[key]) @ M                                              # half of the transport costs are paid by the country the pair starts in
+
+    costs_v = np.stack([parts[key] for key in VARIABLE_COST_TECHNOLOGIES], axis=2)
+    return pd.DataFrame(costs_v.reshape(len(EE.T), -1), index=EE.T,
+                        columns=pd.MultiIndex.from_product([S, VARIABLE_COST_TECHNOLOGIES], names=['country','technology']))
+
+def investment_costs(V, c, S, pairs):
+    """calculate the investment costs (3) per country and technology.
+
+    Arguments:
+        V -- dictionary with the limits 'HL','GtPL','PtGL' per country and 'ETL','HTL' per pair, as dictionaries or arrays
+        c -- dictionary of costs
+        S -- list of countries
+        pairs -- list of ordered pairs of countries (or of edges) in the order of the transport limits
+
+    Returns:
+        costs_f -- dataframe with one row per country and one column per technology
+
+    Side effects:
+        None
+    """
+    M = _origin_matrix(S, pairs, 1)
+    costs_f = dict()
+    for key in ['HL','GtPL','PtGL']:
+        costs_f[key] = _as_array(V[key], S)*c[key]
+    for key in ['ETL','HTL']:
+        costs_f[key] = (_as_array(V[key], pairs)*c[key]) @ M
+    return pd.DataFrame(costs_f, index=S)[INVESTMENT_COST_TECHNOLOGIES]
+
+def summarize_costs(costs_v, costs_f):
+    """summarize variable and investment costs and print the totals.
+
+    Arguments:
+        costs_v -- dataframe as returned by variable_costs
+        costs_f -- dataframe as returned by investment_costs
+
+    Returns:
+        C -- dictionary with the hourly costs ('hourly'), the variable and investment costs per country ('country'),
+             the costs per technology ('technology'), the variable costs per timestep and country as dictionary ('v'),
+             the investment costs per country as dictionary ('f') and the breakdowns costs_v and costs_f
+
+    Side effects:
+        prints the variable, investment and total costs
+    """
+    C_v_country = costs_v.T.groupby(level='country', sort=False).sum().T                   # variable costs per timestep and country
+    C = dict()
+    C['hourly'] = C_v_country.sum(axis=1)
+    C['country'] = pd.DataFrame({'variable': C_v_country.sum(), 'investment': costs_f.sum(axis=1)})
+    C['technology'] = pd.concat([costs_v.T.groupby(level='technology', sort=False).sum().sum(axis=1), costs_f.sum()])
+    C['v'] = C_v_country.stack().to_dict()
+    C['f'] = costs_f.sum(axis=1).to_dict()
+    C['v_breakdown'] = costs_v
+    C['f_breakdown'] = costs_f
+    C_v = C['hourly'].sum()
+    C_f = costs_f.to_numpy().sum()
+    print(str( 'Variable costs: '+str(C_v)+'; Investment costs: '+str(C_f)+'; Sum: '+str(C_v+C_f) ))
+    return C
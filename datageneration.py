@@ -1,12 +1,74 @@
+import os
+import hashlib
 import pandas as pd
 import numpy as np
-from tqdm import tqdm
 
 
+### reference periods of the historical timeseries data: first timestep (UTC) and number of timesteps
+REFERENCE_PERIODS = {'2019': ('2018-12-30 23:00', 8760),
+                     '2017': ('2016-12-31 22:00', 8760),
+                     '2016-2018': ('2016-06-30 22:00', 8760*2)}                                                    # 2017 and half of 2016 and 2018
+
+CACHE_DIR = './data/internal_data/cache/'
+
+### regions: columns of the historical timeseries data each 2030 timeseries is scaled from, and constant values that
+### replace the estimates of estimates_2030. Without a 'wind' profile, wind is the sum of wind_onshore and wind_offshore;
+### with a 'wind' profile, wind_onshore and wind_offshore are 0. The profiles of the sources in 'scale_first' are
+### multiplied by the precomputed factor estimate/profile sum, as in the original code of these regions.
+REGIONS = {'DE': {'profiles': {'wind_onshore': 'DE_wind_onshore_profile', 'wind_offshore': 'DE_wind_offshore_profile',
+                               'solar': 'DE_solar_profile', 'load': 'DE_load_actual_entsoe_transparency'},
+                  'constants': {'nuclear': 0}},                                                                     # nuclear phase-out
+           'FR': {'profiles': {'wind': 'FR_wind_onshore_generation_actual', 'solar': 'FR_solar_generation_actual',
+                               'load': 'FR_load_actual_entsoe_transparency'},
+                  'scale_first': ['wind', 'solar']},
+           'NL': {'profiles': {'wind': 'NL_wind_generation_actual', 'solar': 'NL_solar_generation_actual',
+                               'load': 'NL_load_actual_entsoe_transparency'},
+                  'scale_first': ['wind', 'solar']}}
+
+GENERATION_SOURCES = ['wind','wind_onshore','wind_offshore','solar','otherRE','fossil','nuclear']                  # columns of timeseries_2030 per country, followed by load
+CONSTANT_SOURCES = ['otherRE','fossil','nuclear']                                                                  # sources with constant generation each timestep
+EE_SUM_SOURCES = ['wind','solar','otherRE','fossil','nuclear']                                                     # sources adding up to the column <country>_EE_sum
+
 ### load data
+def load_cached(source, cache_key, read):
+    """read a dataframe with read(), or from the cache if it has already been read from the same source file with the same settings.
+
+    The cache is a parquet file named after the sha256 hash of the source file and of cache_key.
+
+    Arguments:
+        source -- path of the source file
+        cache_key -- settings the dataframe depends on, besides the content of the source file
+        read -- function without arguments reading the dataframe from source
+
+    Returns:
+        df -- dataframe
+
+    Side effects:
+        writes the dataframe to the cache, if it was not read from the cache
+    """
+    key = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(2**20), b''):
+            key.update(chunk)
+    key.update(repr(cache_key).encode())
+    cache_file = os.path.join(CACHE_DIR, os.path.splitext(os.path.basename(source))[0] + '_' + key.hexdigest()[:16] + '.parquet')
+    if os.path.exists(cache_file):
+        return pd.read_parquet(cache_file)
+    df = read()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache_file)
+    except ImportError:
+        print('Caching '+source+' needs pyarrow or fastparquet; continuing without cache.')
+    return df
+
 def load_external_data(settings):
     """load external data.
 
+    Only the needed columns of the timeseries csv-file are parsed, and the reference year is selected by its timestamps
+    (see REFERENCE_PERIODS). If settings['cache_external_data'] == True, the results are cached, so repeated runs do not
+    parse the csv- and xlsx-files again.
+
     Arguments:
         settings -- dictionary of settings
 
@@ -16,33 +78,85 @@ def load_external_data(settings):
 
 
     Side effects:
-        None
+        if settings['cache_external_data'] == True, the loaded data is written to the cache in CACHE_DIR
     """
-    timeseries_ref = pd.read_csv('./data/external_data/time_series_60min_singleindex.csv', sep = ',', header = 0, index_col=1)               # import timeseries data
-    columns = ['DE_solar_capacity','DE_solar_profile','DE_wind_capacity','DE_wind_profile','DE_load_actual_entsoe_transparency'
-               ,'DE_wind_onshore_profile','DE_wind_offshore_profile','FR_load_actual_entsoe_transparency'
-               ,'FR_solar_generation_actual','FR_wind_onshore_generation_actual','NL_load_actual_entsoe_transparency'
-               ,'NL_solar_generation_actual','NL_wind_generation_actual']                                                       # specify which columns to keep
-    timeseries_ref = timeseries_ref[columns]                                                                                  # filter columns
-    
-    if settings['reference_year'] == '2019':
-        timeseries_ref = timeseries_ref.iloc[35064-24:43824-24,:]                                                                 # keep only 2019
-    elif settings['reference_year'] == '2017':
-        timeseries_ref = timeseries_ref.iloc[17543:17543+8760,:]
-    elif settings['reference_year'] == '2016-2018':
-        timeseries_ref = timeseries_ref.iloc[13127:13127+8760*2,:]                                                              # keep 2017 and half of 2016 and 2018
-    
-    timeseries_ref = timeseries_ref.astype(float)
-    
-    estimates_2030 = pd.read_excel('./data/external_data/estimates_2030.xlsx', header=0, index_col=0)
-    estimates_2030 = estimates_2030.iloc[14:,:]                                                                                 # keep only relevant rows
-    estimates_2030 = estimates_2030.astype(float)
+    for s in settings['countries']:
+        if s not in REGIONS:
+            raise ValueError(str('No reference data configured for country '+s+'; add it to datageneration.REGIONS or use synthetic.make_synthetic_case.'))
+    columns = [column for s in settings['countries'] for column in REGIONS[s]['profiles'].values()]                   # specify which columns to keep
+    start, num_timesteps = REFERENCE_PERIODS[settings['reference_year']]
+    start = pd.Timestamp(start, tz='UTC')
+
+    def read_timeseries():
+        timeseries_ref = pd.read_csv('./data/external_data/time_series_60min_singleindex.csv', sep = ',', header = 0,
+                                     usecols=['utc_timestamp']+columns, dtype={column: float for column in columns},
+                                     index_col='utc_timestamp', parse_dates=['utc_timestamp'])                           # import needed columns of timeseries data
+        timeseries_ref = timeseries_ref.loc[start:start+pd.Timedelta(hours=num_timesteps-1), columns]                 # keep only the reference year
+        return timeseries_ref.astype(float)
+
+    def read_estimates():
+        estimates_2030 = pd.read_excel('./data/external_data/estimates_2030.xlsx', header=0, index_col=0)
+        estimates_2030 = estimates_2030.iloc[14:,:]                                                                     # keep only relevant rows
+        return estimates_2030.astype(float)
+
+    if settings['cache_external_data'] == True:
+        timeseries_ref = load_cached('./data/external_data/time_series_60min_singleindex.csv', (columns, start, num_timesteps), read_timeseries)
+        estimates_2030 = load_cached('./data/external_data/estimates_2030.xlsx', None, read_estimates)
+    else:
+        timeseries_ref = read_timeseries()
+        estimates_2030 = read_estimates()
     
     return timeseries_ref, estimates_2030
 
+### fill missing values
+def fill_missing_values(timeseries, strategy='previous_week'):
+    """fill missing values of a timeseries dataframe column by column.
+
+    options for strategy:
+        'previous_week' -- take the value from the same hour one week earlier, repeated until the gap is filled; missing
+                           values in the first week take the value from the same hour of the last week of the timeseries
+        'interpolate' -- interpolate linearly between the neighbouring values
+        'seasonal_profile' -- take the mean of all values of the column in the same hour of the week
+
+    Arguments:
+        timeseries -- dataframe with hourly timeseries data
+        strategy -- fill strategy, see options above
+
+    Returns:
+        timeseries -- dataframe with filled values
+        num_filled -- series with the number of filled values per column
+
+    Side effects:
+        None
+    """
+    week = 7*24
+    timeseries = timeseries.copy()
+    num_missing = timeseries.isnull().sum()
+    for column in num_missing.index[num_missing > 0]:
+        values = timeseries[column].to_numpy(dtype=float, copy=True)
+        if strategy == 'previous_week':
+            missing = np.isnan(values[:week])
+            values[:week][missing] = values[-week:][missing]                                   # first week: same hour of the last week
+            num_weeks = -(-len(values)//week)
+            weeks = np.full(num_weeks*week, np.nan)
+            weeks[:len(values)] = values
+            weeks = pd.DataFrame(weeks.reshape(num_weeks, week)).ffill().to_numpy()            # one row per week, so filling forward takes the value from one week earlier
+            values = weeks.ravel()[:len(values)]
+        elif strategy == 'interpolate':
+            values = pd.Series(values).interpolate(limit_direction='both').to_numpy()
+        elif strategy == 'seasonal_profile':
+            hour_of_week = np.arange(len(values)) % week
+            profile = pd.Series(values).groupby(hour_of_week).mean().reindex(range(week)).to_numpy()
+            values = np.where(np.isnan(values), profile[hour_of_week], values)
+        else:
+            raise ValueError("Unknown fill strategy '" + strategy + "'. Options: 'previous_week', 'interpolate', 'seasonal_profile'.")
+        timeseries[column] = values
+    num_filled = num_missing - timeseries.isnull().sum()
+    return timeseries, num_filled
+
 ### create estimated timeseries for 2030
 def create_2030_timeseries(settings, timeseries_ref, estimates_2030):
-    """create 2030 timeseries data.
+    """create 2030 timeseries data for the countries settings['countries'], from the reference columns configured in REGIONS.
 
     Arguments:
         settings -- dictionary of settings
@@ -55,56 +169,44 @@ def create_2030_timeseries(settings, timeseries_ref, estimates_2030):
     Side effects:
         if settings['export_2030_timeseries'] == True, generated timeseries data will be exported to a csv-file
     """
-    timeseries_2030 = pd.DataFrame(columns=['DE_wind','DE_wind_onshore','DE_wind_offshore','DE_solar','DE_otherRE','DE_fossil','DE_nuclear','DE_load'
-                                            ,'FR_wind','FR_wind_onshore','FR_wind_offshore','FR_solar','FR_otherRE','FR_fossil','FR_nuclear','FR_load'
-                                            ,'NL_wind','NL_wind_onshore','NL_wind_offshore','NL_solar','NL_otherRE','NL_fossil','NL_nuclear','NL_load']
-                                   ,index=settings['timesteps'])
+    S = settings['countries']
+    timeseries_2030 = pd.DataFrame(columns=[str(s+'_'+source) for s in S for source in GENERATION_SOURCES+['load']], index=settings['timesteps'])
     
     if settings['reference_year'] == '2016-2018':
         num_years = 2
     else:
         num_years = 1
     
-    # fill columns with constant values each timestep
-    timeseries_2030['DE_otherRE'] = estimates_2030.loc['otherRE','DE']/(24*365)
-    timeseries_2030['DE_fossil'] = estimates_2030.loc['fossil','DE']/(24*365)
-    timeseries_2030['DE_nuclear'] = 0
-    timeseries_2030['FR_otherRE'] = estimates_2030.loc['otherRE','FR']/(24*365)
-    timeseries_2030['FR_fossil'] = estimates_2030.loc['fossil','FR']/(24*365)
-    timeseries_2030['FR_nuclear'] = estimates_2030.loc['nuclear','FR']/(24*365)
-    timeseries_2030['NL_otherRE'] = estimates_2030.loc['otherRE','NL']/(24*365)
-    timeseries_2030['NL_fossil'] = estimates_2030.loc['fossil','NL']/(24*365)
-    timeseries_2030['NL_nuclear'] = estimates_2030.loc['nuclear','NL']/(24*365)
+    for s in S:
+        region = REGIONS[s]
+        constants = region.get('constants', dict())
+        # fill columns with constant values each timestep
+        for source in CONSTANT_SOURCES:
+            if source in constants:
+                timeseries_2030[s+'_'+source] = constants[source]
+            else:
+                timeseries_2030[s+'_'+source] = estimates_2030.loc[source,s]/(24*365)
+        # fill columns with variable values each timestep, scaled to the estimated yearly values; the sources in
+        # 'scale_first' compute the scaling factor first, as they always did, so the timeseries stay bit-identical
+        for source, column in region['profiles'].items():
+            profile = timeseries_ref[column]
+            if source in region.get('scale_first', []):
+                timeseries_2030[s+'_'+source] = list(profile * (estimates_2030.loc[source,s]/profile.sum()*num_years))
+            else:
+                timeseries_2030[s+'_'+source] = list(profile/profile.sum()*estimates_2030.loc[source,s]*num_years)
+        if 'wind' in region['profiles']:
+            timeseries_2030[s+'_wind_onshore'] = 0
+            timeseries_2030[s+'_wind_offshore'] = 0
+        else:
+            timeseries_2030[s+'_wind'] = timeseries_2030[s+'_wind_onshore'] + timeseries_2030[s+'_wind_offshore']
     
-    # fill columns with variable values each timestep
-    timeseries_2030['DE_wind_onshore'] = list(timeseries_ref['DE_wind_onshore_profile']/timeseries_ref['DE_wind_onshore_profile'].sum()*estimates_2030.loc['wind_onshore','DE']*num_years)
-    timeseries_2030['DE_wind_offshore'] = list(timeseries_ref['DE_wind_offshore_profile']/timeseries_ref['DE_wind_offshore_profile'].sum()*estimates_2030.loc['wind_offshore','DE']*num_years)
-    timeseries_2030['DE_wind'] = timeseries_2030['DE_wind_onshore'] + timeseries_2030['DE_wind_offshore']
-    timeseries_2030['DE_solar'] = list(timeseries_ref['DE_solar_profile']/timeseries_ref['DE_solar_profile'].sum()*estimates_2030.loc['solar','DE']*num_years)
-    timeseries_2030['DE_load'] = list(timeseries_ref['DE_load_actual_entsoe_transparency']/timeseries_ref['DE_load_actual_entsoe_transparency'].sum()*estimates_2030.loc['load','DE']*num_years)
-    
-    timeseries_2030['FR_wind'] = list(timeseries_ref['FR_wind_onshore_generation_actual'] * (estimates_2030.loc['wind','FR']/timeseries_ref['FR_wind_onshore_generation_actual'].sum()*num_years) )
-    timeseries_2030['FR_wind_onshore'] = 0
-    timeseries_2030['FR_wind_offshore'] = 0
-    timeseries_2030['FR_solar'] = list(timeseries_ref['FR_solar_generation_actual'] * (estimates_2030.loc['solar','FR']/timeseries_ref['FR_solar_generation_actual'].sum()*num_years) )
-    timeseries_2030['FR_load'] = list(timeseries_ref['FR_load_actual_entsoe_transparency']/timeseries_ref['FR_load_actual_entsoe_transparency'].sum()*estimates_2030.loc['load','FR']*num_years)
-    
-    timeseries_2030['NL_wind'] = list(timeseries_ref['NL_wind_generation_actual'] * (estimates_2030.loc['wind','NL']/timeseries_ref['NL_wind_generation_actual'].sum()*num_years) )
-    timeseries_2030['NL_wind_onshore'] = 0
-    timeseries_2030['NL_wind_offshore'] = 0
-    timeseries_2030['NL_solar'] = list(timeseries_ref['NL_solar_generation_actual'] * (estimates_2030.loc['solar','NL']/timeseries_ref['NL_solar_generation_actual'].sum()*num_years) )
-    timeseries_2030['NL_load'] = list(timeseries_ref['NL_load_actual_entsoe_transparency']/timeseries_ref['NL_load_actual_entsoe_transparency'].sum()*estimates_2030.loc['load','NL']*num_years)
-    
-    # get missing data by using the data from the same column from one week earlier (7*24 timesteps)
-    for i in tqdm(range(len(timeseries_2030)), ascii=True, desc='Estimating missing values while creating timeseries_2030 dataframe:'):
-        for j in range(len(timeseries_2030.columns)):
-            if np.isnan(timeseries_2030.iloc[i,j]):
-                timeseries_2030.iloc[i,j] = timeseries_2030.iloc[i-7*24,j]
-    print( 'While creating timeseries_2030 dataframe, ' + str(timeseries_2030.isnull().sum().sum()) + ' missing values have been estimated by taking the values from the same hour one week prior.' )
-
-    timeseries_2030['DE_EE_sum'] = timeseries_2030['DE_wind'] + timeseries_2030['DE_solar'] + timeseries_2030['DE_otherRE'] + timeseries_2030['DE_fossil'] + timeseries_2030['DE_nuclear']
-    timeseries_2030['FR_EE_sum'] = timeseries_2030['FR_wind'] + timeseries_2030['FR_solar'] + timeseries_2030['FR_otherRE'] + timeseries_2030['FR_fossil'] + timeseries_2030['FR_nuclear']
-    timeseries_2030['NL_EE_sum'] = timeseries_2030['NL_wind'] + timeseries_2030['NL_solar'] + timeseries_2030['NL_otherRE'] + timeseries_2030['NL_fossil'] + timeseries_2030['NL_nuclear']
+    # get missing data, by default by using the data from the same column from one week earlier (7*24 timesteps)
+    timeseries_2030, num_filled = fill_missing_values(timeseries_2030, settings['fill_strategy'])
+    print( 'While creating timeseries_2030 dataframe, ' + str(num_filled.sum()) + ' missing values have been estimated with the fill strategy ' + settings['fill_strategy'] + ':' )
+    print( num_filled[num_filled > 0].to_string() )
+
+    for s in S:
+        timeseries_2030[s+'_EE_sum'] = sum(timeseries_2030[s+'_'+source] for source in EE_SUM_SOURCES)
 
     # export data
     if settings['export_2030_timeseries'] == True:
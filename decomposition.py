@@ -0,0 +1,334 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+import lp_matrix
+import lp_solvers
+
+
+LIMITS = ['HL','GtPL','PtGL','ETL','HTL']       # investment variables of the master problem
+COUPLING = {'H': 'HL', 'GtP': 'GtPL', 'PtG': 'PtGL'}    # variables coupling consecutive blocks by storage (7) and ramps (16)-(19), with their limits
+MASTER_OPTIONS = {'gurobi': {}, 'highs': {'presolve': 'off'}}  # the master problem is small, and its cuts have large right hand sides that HiGHS' postsolve does not recover accurately
+LEVEL = 0.3                                     # the next point is the one closest to the best point whose master objective is at most lower bound + LEVEL*gap
+MAX_SCALE = 10                                  # limits and coupling values are at most MAX_SCALE times their typical size, see _Master._scale
+OPERATION = ['H','dH','GtP','PtG','EI','EX','HT','ET','HTP','HTN','ETP','ETN','Cv']     # time-indexed variable families kept of the block solutions
+
+
+### blocks
+def make_blocks(T, num_blocks):
+    """split the timesteps T into num_blocks blocks of consecutive timesteps of (almost) equal length.
+
+    Returns:
+        blocks -- list of lists of timesteps
+    """
+    if not 1 <= num_blocks <= len(T):
+        raise ValueError(str('The number of blocks has to be between 1 and the number of timesteps, got '+str(num_blocks)))
+    return [list(block) for block in np.array_split(np.asarray(T), num_blocks)]
+
+
+### workers
+_shared = dict()                        # inputs shared by all blocks of a worker process, set once by _init_worker
+
+def _init_worker(shared):
+    _shared.clear()
+    _shared.update(shared)
+
+def _solve_block(task):
+    """solve the operation of one block with fixed limits and coupling values.
+
+    Returns:
+        objective -- operational costs of the block
+        gradient -- dictionary with the reduced costs of the fixed variables, i.e. the derivatives of objective
+        values -- dictionary with the arrays of the time-indexed variable families
+        solve_time -- time to build and solve the block
+    """
+    b, limits, previous, following = task
+    start = time.perf_counter()
+    lp = lp_matrix.build_block_lp(_shared['blocks'][b], _shared['S'], _shared['S_neighbours'], _shared['EE'], _shared['EV'],
+                                  _shared['c'], _shared['eta'], _shared['ramp'], limits, previous, following, _shared['network'])
+    solution, _ = lp_solvers.solve_lp(lp, _shared['solver'], reduced_costs=True, print_result=False, options=_shared['options'])
+    gradient = {name: solution.reduced_costs[name] for name in solution.reduced_costs if name in LIMITS or name.endswith(('_previous', '_following'))}
+    values = {name: solution[name] for name in OPERATION if name in solution.values}
+    return solution.objective, gradient, values, time.perf_counter() - start
+
+
+def _solve_block_alone(b):
+    """solve one block as a basismodell of its own, with the investment costs of its share of the timesteps.
+
+    Returns:
+        limits -- dictionary with the arrays of the optimal limits of the block
+    """
+    block = _shared['blocks'][b]
+    share = len(block)/sum(len(other) for other in _shared['blocks'])
+    c = dict(_shared['c'], **{name: _shared['c'][name]*share for name in LIMITS})
+    lp = lp_matrix.build_basismodell_lp(block, _shared['S'], _shared['S_neighbours'], _shared['EE'], _shared['EV'], c,
+                                        _shared['eta'], _shared['ramp'], _shared['network'])
+    solution, _ = lp_solvers.solve_lp(lp, _shared['solver'], print_result=False, options=_shared['options'])
+    return {name: solution[name] for name in LIMITS}
+
+
+### master problem
+class _Master:
+    """master problem of the Benders decomposition: limits, coupling values between the blocks and one cut bound theta per block.
+
+    The master vector x is laid out as the families of LIMITS, then coupling with one row per boundary between two
+    blocks, then theta. Every cut of block b bounds theta[b] from below by a linearization of the operational costs
+    of block b in the limits and its two neighbouring boundaries. The solver gets the master problem in units of the
+    typical size of the variables, with theta relative to the costs of the blocks at the first point, so that all its
+    coefficients are of similar size.
+    """
+    def __init__(self, blocks, S, S_neighbours, c, network, peak, coupling):
+        self.S, self.S_neighbours, self.c, self.network, self.coupling = S, S_neighbours, c, network, coupling
+        self.lengths = np.array([len(block) for block in blocks])
+        self.num_blocks = len(blocks)
+        self.lp = self._build()                                         # in the units of x
+        self.size = self.lp.num_vars
+        self.scale = self._scale(peak)
+        self.cuts = []                                                  # tuples (block, objective, gradient vector, point)
+
+    def _build(self, scale=None, unit=1.0, weight=1.0):
+        """build the master problem without cuts, with the variables in units of scale (dictionary with an array per
+        family), theta in units of unit and the objective multiplied by weight."""
+        scale = scale or dict()
+        links, l_from, l_to, l_closed = lp_matrix.make_links(self.S, self.S_neighbours, self.network)
+        lp = lp_matrix.LinearProgram("master problem of the temporal decomposition")
+        lp.set_axis('S', self.S)
+        lp.set_axis('E', links)
+        lp.set_axis('B', range(self.num_blocks-1))                      # boundary b lies between block b and b+1
+        lp.set_axis('blocks', range(self.num_blocks))
+        factor = 2.0 if self.network == 'edges' else 1.0                # both countries of an edge pay for its capacity, see lp_matrix._add_investment
+        for name in ['HL','GtPL','PtGL']:
+            lp.add_var(name, ('S',), obj=weight*self.c[name]*scale.get(name, 1.0)/unit)                      # (3) - investment costs
+        for name in ['ETL','HTL']:
+            lp.add_var(name, ('E',), ub=np.where(l_closed, 0.0, np.inf), obj=weight*factor*self.c[name]*scale.get(name, 1.0)/unit)    # (11), (15) - no transport between non-neighbours
+        for name in self.coupling:
+            lp.add_var(name, ('B','S'))
+        lp.add_var('theta', ('blocks',), lb=-np.inf, obj=weight)       # bounded by the cuts, as every block has a cut before the first solve
+        for name in self.coupling:                                      # (20)-(22) at the boundaries
+            rows = lp.add_constr(name+'_limit', (self.num_blocks-1, len(self.S)), '<')
+            lp.add_coef(rows, lp.var[name], scale.get(name, 1.0))
+            lp.add_coef(rows, lp.var[COUPLING[name]][None], -np.asarray(scale.get(COUPLING[name], 1.0))[None])
+        return lp
+
+    def _scale(self, peak):
+        """get the typical size of every master variable: the peak demand for powers, times the block length for stored hydrogen.
+
+        Arguments:
+            peak -- array with the peak electricity demand of every country
+        """
+        links, l_from, l_to, _ = lp_matrix.make_links(self.S, self.S_neighbours, self.network)
+        scale = np.ones(self.size)
+        for name in ['GtPL','PtGL']:
+            scale[self.lp.var[name]] = peak
+        for name in ['ETL','HTL']:
+            scale[self.lp.var[name]] = np.maximum(peak[l_from], peak[l_to])
+        scale[self.lp.var['HL']] = peak*self.lengths.max()
+        for name in self.coupling:
+            scale[self.lp.var[name]] = scale[self.lp.var[COUPLING[name]]][None]
+        return np.maximum(scale, 1.0)
+
+    def split(self, x):
+        """get the limits and the previous and following coupling values of every block out of the master vector x."""
+        limits = {name: x[self.lp.var[name]] for name in LIMITS}
+        coupling = [{name: x[self.lp.var[name][k]] for name in self.coupling} for k in range(self.num_blocks-1)]
+        return [(b, limits, coupling[b-1] if b > 0 else None, coupling[b] if b < self.num_blocks-1 else None) for b in range(self.num_blocks)]
+
+    def investment_costs(self, x):
+        theta = self.lp.var['theta'][0]
+        return float(self.lp.obj[:theta] @ x[:theta])
+
+    def add_cut(self, b, objective, gradient, x):
+        """add the cut theta[b] >= objective + g (x' - x) made of the gradient of block b at the master vector x."""
+        g = np.zeros(self.size)
+        for name, values in gradient.items():
+            if name in LIMITS:
+                g[self.lp.var[name]] += values
+            elif name.endswith('_previous'):
+                g[self.lp.var[name[:-len('_previous')]][b-1]] += values
+            else:
+                g[self.lp.var[name[:-len('_following')]][b]] += values
+        self.cuts.append((b, objective, g, x))
+
+    def solve(self, solver, level=None, center=None):
+        """solve the master problem with all cuts so far, or, if level is given, project center onto its level set.
+
+        The projection is the point closest to center, in the maximum norm relative to the scale of the variables,
+        whose objective of the master problem is at most level.
+
+        Returns:
+            objective -- objective of the master problem, a lower bound of the objective of the basismodell; None for the projection
+            x -- master vector
+        """
+        theta = self.lp.var['theta']
+        offset = np.array([next(objective for b2, objective, _, _ in self.cuts if b2 == b) for b in range(self.num_blocks)])
+        unit = max(abs(offset.sum()), 1.0)                              # theta = offset + unit*theta of the solver, x = scale*x of the solver
+        scale = self.scale.copy()
+        scale[theta] = unit
+        lp = self._build({name: scale[idx] for name, idx in self.lp.var.items()}, unit, 0.0 if level is not None else 1.0)
+        for name in lp.var:                                             # small compared to the blocks, so it is rebuilt with all cuts at once
+            if name != 'theta':
+                lp.set_bounds(name, ub=np.minimum(self.lp.ub[self.lp.var[name]]/scale[self.lp.var[name]], MAX_SCALE))
+
+        G = np.array([g for _, _, g, _ in self.cuts])*scale/unit
+        G[:,theta] = 0.0
+        norm = np.maximum(np.abs(G).max(axis=1), 1.0)                  # scale every cut to coefficients of at most 1
+        rhs = np.array([(objective - offset[b] - g @ x)/unit for b, objective, g, x in self.cuts])
+        rows = lp.add_constr('cuts', (len(self.cuts),), '>', rhs/norm)
+        lp.add_coef(rows[:,None], np.arange(self.size)[None], -G/norm[:,None])
+        lp.add_coef(rows, theta[[b for b, _, _, _ in self.cuts]], 1/norm)
+        if level is not None:
+            obj = self.lp.obj*scale/unit
+            obj[theta] = 1.0
+            lp.add_coef(lp.add_constr('level', (1,), '<', (level - offset.sum())/unit), np.arange(self.size), obj)
+            distance = lp.add_var('distance', (), obj=1.0)
+            finite = np.arange(theta[0])
+            for name, sense, sign in [('distance_up', '<', -1.0), ('distance_down', '>', 1.0)]:  # |x - center| <= distance*scale
+                rows = lp.add_constr(name, finite.shape, sense, center[finite]/scale[finite])
+                lp.add_coef(rows, finite, 1.0)
+                lp.add_coef(rows, distance, sign)
+        solution, _ = lp_solvers.solve_lp(lp, solver, print_result=False, options=MASTER_OPTIONS[solver])
+
+        x = np.concatenate([np.ravel(solution[name]) for name in self.lp.var])
+        x[:theta[0]] = np.clip(x[:theta[0]], self.lp.lb[:theta[0]]/scale[:theta[0]], MAX_SCALE)*scale[:theta[0]]
+        x[:theta[0]] = np.minimum(x[:theta[0]], self.lp.ub[:theta[0]])
+        x[theta] = offset + unit*x[theta]
+        for name in self.coupling:                                      # remove the tolerances of the solver, so that the blocks are feasible
+            x[self.lp.var[name]] = np.minimum(x[self.lp.var[name]], x[self.lp.var[COUPLING[name]]][None])
+        return (unit*solution.objective + offset.sum() if level is None else None), x
+
+
+def solve_basismodell_benders(T, S, S_neighbours, EE, EV, c, eta, ramp, num_blocks, solver='gurobi', options=None, network='pairs',
+                              tolerance=1e-4, max_iterations=500, num_workers=None, threads=None, print_result=True):
+    """solve the basismodell by Benders decomposition into a master problem with the limits and blocks of consecutive timesteps.
+
+    The master problem chooses the investment limits 'HL','GtPL','PtGL','ETL','HTL' and the stored hydrogen at the end
+    of every block but the last one; with ramps below 1 also the power of fuel cells and electrolysis there, as the
+    ramps (16)-(19) then couple the blocks, too. Given these, the blocks are independent LPs (see
+    lp_matrix.build_block_lp), solved in parallel worker processes. The reduced costs of the fixed variables of a
+    block are the derivatives of its operational costs, which make a cut of the master problem.
+
+    The master problem with all cuts gives a lower bound, the best point evaluated so far an upper bound. Instead of
+    the minimum of the master problem, which jumps between extreme points, the next point is the one closest to the
+    best point whose master objective is at most lower bound + LEVEL*gap (level method). The first point has the
+    largest limits of the blocks solved alone and no hydrogen stored between the blocks. The loop stops when the gap
+    is below tolerance, relative to the upper bound. Limits and coupling values are assumed to be at most MAX_SCALE
+    times their typical size, see _Master._scale.
+
+    Every block can follow any limits and coupling values, as the imports and exports balance the electricity and
+    hydrogen, so no feasibility cuts are needed, provided the ramps let the fuel cells and electrolysis change from
+    any power to any other within a block, i.e. each block has at least 1/ramp timesteps.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp -- see grb_model.solve_basismodell; EE and EV can be ModelInputs
+        num_blocks -- number of blocks, see make_blocks
+        solver -- solver of the master problem and the blocks, see lp_solvers.SOLVERS
+        options -- dictionary of solver specific parameters for the blocks, see lp_solvers.solve_lp
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        tolerance -- relative gap between upper and lower bound at which the loop stops
+        max_iterations -- maximum number of master problem solves
+        num_workers -- number of worker processes for the blocks; default: number of cores, at most one per block; 1 solves in this process
+        threads -- number of solver threads per block; default: number of cores divided by num_workers
+        print_result -- if True, the bounds of every iteration are printed
+
+    Returns:
+        V -- dictionary with the arrays of the best solution found: the time-indexed variable families of OPERATION with
+             shape (T, S) or (T, E) and the limits with shape (S,) or (E,)
+        info -- dictionary with 'objective' (upper bound), 'lower_bound', 'gap', 'iterations', 'solve_time' (wall time)
+                and 'history', a list with the bounds and the wall time of the master problem and the blocks per iteration
+
+    Side effects:
+        raises ValueError if a block is too short for the ramps
+    """
+    blocks = make_blocks(T, num_blocks)
+    if min(ramp['fuelcell'], ramp['electrolysis']) >= 1:
+        coupling = ['H']                                                # the ramps can not bind, as the power is below its limit anyway
+    else:
+        coupling = list(COUPLING)
+        if num_blocks > 1 and min(len(block) for block in blocks) * min(ramp['fuelcell'], ramp['electrolysis']) < 1:
+            raise ValueError(str('Every block needs at least 1/ramp timesteps, got blocks of '+str(min(len(block) for block in blocks))+' timesteps'))
+    if num_workers is None:
+        num_workers = min(os.cpu_count(), num_blocks)
+    if threads is None:
+        threads = max(1, os.cpu_count()//num_workers)
+    block_options = dict(options or dict())
+    block_options.setdefault(lp_solvers.THREADS_OPTION[solver], threads)
+
+    shared = {'blocks': blocks, 'S': S, 'S_neighbours': S_neighbours, 'EE': EE, 'EV': EV, 'c': c, 'eta': eta, 'ramp': ramp,
+              'network': network, 'solver': solver, 'options': block_options}
+    master = _Master(blocks, S, S_neighbours, c, network, lp_matrix.make_input_arrays(T, S, EE, EV, c)[2].max(axis=0), coupling)
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(shared,)) if num_workers > 1 else None
+    if executor is None:
+        _init_worker(shared)
+
+    def evaluate(x):
+        """solve all blocks at the master vector x, add their cuts and get the objective of the basismodell at x."""
+        tasks = master.split(x)
+        results = list(executor.map(_solve_block, tasks)) if executor is not None else [_solve_block(task) for task in tasks]
+        for b, (block_objective, gradient, _, _) in enumerate(results):
+            master.add_cut(b, block_objective, gradient, x)
+        return master.investment_costs(x) + sum(result[0] for result in results), results
+
+    try:
+        block_start = time.perf_counter()
+        alone = list(executor.map(_solve_block_alone, range(num_blocks))) if executor is not None else [_solve_block_alone(b) for b in range(num_blocks)]
+        center = np.zeros(master.size)                                  # first point: the largest limits of the blocks solved alone, nothing stored
+        for name in LIMITS:
+            center[master.lp.var[name]] = np.max([limits[name] for limits in alone], axis=0)
+        upper_bound, results = evaluate(center)
+        best = (center, results)
+        lower_bound, history = -np.inf, []
+        for iteration in range(max_iterations):
+            block_time = time.perf_counter() - block_start
+            master_start = time.perf_counter()
+            lower_bound = max(lower_bound, master.solve(solver)[0])
+            gap = (upper_bound - lower_bound)/max(abs(upper_bound), 1e-9)
+            history.append({'iteration': iteration, 'lower_bound': lower_bound, 'upper_bound': upper_bound, 'gap': gap,
+                            'block_time': block_time, 'master_time': time.perf_counter() - master_start,
+                            'max_block_time': max(result[3] for result in results)})
+            if print_result:
+                print(str('Iteration '+str(iteration)+': lower bound '+str(round(lower_bound, 1))+', upper bound '+str(round(upper_bound, 1))
+                          +', gap '+str(round(100*gap, 4))+' %'))
+            if gap <= tolerance:
+                break
+
+            _, x = master.solve(solver, lower_bound + LEVEL*(upper_bound - lower_bound), best[0])
+            history[-1]['master_time'] = time.perf_counter() - master_start
+            block_start = time.perf_counter()
+            objective, results = evaluate(x)
+            if objective < upper_bound:
+                upper_bound, best = objective, (x, results)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    x, results = best
+    V = {name: np.concatenate([values[name] for _, _, values, _ in results]) for name in results[0][2]}
+    V.update(master.split(x)[0][1])
+    info = {'objective': upper_bound, 'lower_bound': lower_bound, 'gap': gap, 'iterations': len(history),
+            'solve_time': time.perf_counter() - start, 'history': history}
+    return V, info
+
+
+if __name__ == '__main__':
+    import datageneration
+    import model_inputs
+
+    ### settings
+    settings = dict()
+    settings['countries'] = ['DE', 'FR', 'NL']
+    settings['neighbours'] = [('DE', 'FR'),('DE','NL')]
+    settings['electricity_sources'] = ['wind','wind_onshore','wind_offshore','solar','otherRE','fossil','nuclear']
+    settings['reference_year'] = '2016-2018'    # options: '2017', '2019', '2016-2018'
+    settings['timesteps'] = range(24*365*2) if settings['reference_year'] == '2016-2018' else range(24*365)
+    settings['solver'] = 'gurobi'               # options: 'gurobi', 'highs'
+    settings['num_blocks'] = 8                  # number of blocks of consecutive timesteps, e.g. 8 blocks of about three months
+
+    timeseries_2030 = datageneration.load_2030_timeseries(settings)
+    EE = EV = model_inputs.make_model_inputs(settings, timeseries_2030)
+    V, info = solve_basismodell_benders(settings['timesteps'], settings['countries'], settings['neighbours'], EE, EV,
+                                        datageneration.get_costs(settings), datageneration.get_efficiencies(settings),
+                                        datageneration.get_ramps(settings), settings['num_blocks'], solver=settings['solver'])
+    print(str('Objective '+str(round(info['objective'], 1))+' after '+str(info['iterations'])+' iterations in '
+              +str(round(info['solve_time'], 1))+' s, gap '+str(round(100*info['gap'], 4))+' %'))
@@ -1,8 +1,56 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from gurobipy import *
-
-def solve_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp):
-    # Model
-    model = Model("optimal sizing and operation of energy system")
+from tqdm import tqdm
+
+import lp_matrix
+import lp_solvers
+import solve_cache
+from checkpoint import RollingHorizonCheckpoint
+from model_inputs import ModelInputs
+from solution import extract_solution
+from telemetry import SolveTelemetry
+
+
+def _optimize(model, telemetry):
+    """optimize model, through telemetry if given; returns the wall time of the optimization and the phases seen by telemetry."""
+    if telemetry is not None:
+        return telemetry.optimize(model)
+    start = time.perf_counter()
+    model.optimize()
+    return time.perf_counter() - start, None
+
+def _name(lean, fmt, *args):
+    """get the name of a variable of the loop-based model builders; in lean mode variables stay unnamed."""
+    return "" if lean else fmt % args
+
+def _make_model(name, lean):
+    """make a gurobi model; in lean mode in its own environment, so _dispose frees both deterministically.
+
+    Returns:
+        model -- gurobi model
+        env -- gurobi environment of the model, None for the default environment
+    """
+    if not lean:
+        return Model(name), None
+    env = Env()
+    return Model(name, env=env), env
+
+def _dispose(model, env):
+    """free the gurobi model and, if it has its own, its environment."""
+    model.dispose()
+    if env is not None:
+        env.dispose()
+
+def solve_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp, telemetry=None, lean=False):
+    start = time.perf_counter()
+    if isinstance(EE, ModelInputs):                                                     # this builder works on the EE and EV dictionaries
+        EE, EV = EE.select(T).make_dicts()
+
+    # Model; in lean mode the variables are unnamed and the model is freed after the values are extracted, and None is returned instead
+    model, env = _make_model("optimal sizing and operation of energy system", lean)
     
     ### initialize variables
     C = dict()              # costs
@@ -28,37 +76,37 @@ def solve_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp):
 
     for t in T:
         for s in S:
-            C['v'][t,s] = model.addVar(lb=-10**9,name="Cv_%s_%s" % (t,s), vtype = "c")            # variable cost in timestep t and location s
+            C['v'][t,s] = model.addVar(lb=-10**9,name=_name(lean, "Cv_%s_%s", t,s), vtype = "c")    # variable cost in timestep t and location s
 
     for s in S:
-        C['f'][s] = model.addVar(lb=-10**9,name="Cf_%s" % (s), vtype = "c")                       # investment cost in location s
+        C['f'][s] = model.addVar(lb=-10**9,name=_name(lean, "Cf_%s", s), vtype = "c")    # investment cost in location s
 
     for t in T:
         for s in S:
-            H[t,s] = model.addVar(lb=0.0, name="H_%s_%s" % (t,s), vtype = "c")          # stored hydrogen in timestep t and location s
-            dH[t,s] = model.addVar(lb=-10**9,name="dH_%s_%s" % (t,s), vtype = "c")      # change of stored hydrogen in timestep t and location s
-            GtP[t,s] = model.addVar(lb=0.0, name="GtP_%s_%s" % (t,s), vtype = "c")      # gas to power in timestep t and location s
-            PtG[t,s] = model.addVar(lb=0.0, name="PtG_%s_%s" % (t,s), vtype = "c")      # power to gas in timestep t and location s
-            EI[t,s] = model.addVar(lb=0.0, name="EI%s_%s" % (t,s), vtype = "c")         # electricity imports in timestep t and location s            
-            EX[t,s] = model.addVar(lb=0.0, name="EX%s_%s" % (t,s), vtype = "c")         # electricity exports in timestep t and location s
-            HI[t,s] = model.addVar(lb=0.0, name="EI%s_%s" % (t,s), vtype = "c")         # hydrogen imports in timestep t and location s            
-            HX[t,s] = model.addVar(lb=0.0, name="EX%s_%s" % (t,s), vtype = "c")         # hydrogen exports in timestep t and location s 
+            H[t,s] = model.addVar(lb=0.0, name=_name(lean, "H_%s_%s", t,s), vtype = "c")        # stored hydrogen in timestep t and location s
+            dH[t,s] = model.addVar(lb=-10**9,name=_name(lean, "dH_%s_%s", t,s), vtype = "c")    # change of stored hydrogen in timestep t and location s
+            GtP[t,s] = model.addVar(lb=0.0, name=_name(lean, "GtP_%s_%s", t,s), vtype = "c")    # gas to power in timestep t and location s
+            PtG[t,s] = model.addVar(lb=0.0, name=_name(lean, "PtG_%s_%s", t,s), vtype = "c")    # power to gas in timestep t and location s
+            EI[t,s] = model.addVar(lb=0.0, name=_name(lean, "EI%s_%s", t,s), vtype = "c")       # electricity imports in timestep t and location s            
+            EX[t,s] = model.addVar(lb=0.0, name=_name(lean, "EX%s_%s", t,s), vtype = "c")       # electricity exports in timestep t and location s
+            HI[t,s] = model.addVar(lb=0.0, name=_name(lean, "EI%s_%s", t,s), vtype = "c")       # hydrogen imports in timestep t and location s            
+            HX[t,s] = model.addVar(lb=0.0, name=_name(lean, "EX%s_%s", t,s), vtype = "c")       # hydrogen exports in timestep t and location s 
             for s2 in S:
                 if s2 != s:
-                    ETP[t,(s,s2)] = model.addVar(lb=0.0,name="ETP_%s_%s_%s" % (t,s,s2), vtype = "c")   # positive electricity transport in timestep to from s1 to s2
-                    HTP[t,(s,s2)] = model.addVar(lb=0.0,name="HTP_%s_%s_%s" % (t,s,s2), vtype = "c")   # positive hydrogen transport in timestep to from s1 to s2
-                    ETN[t,(s,s2)] = model.addVar(lb=0.0,name="ETN_%s_%s_%s" % (t,s,s2), vtype = "c")   # negative electricity transport in timestep to from s1 to s2
-                    HTN[t,(s,s2)] = model.addVar(lb=0.0,name="HTN_%s_%s_%s" % (t,s,s2), vtype = "c")   # negative hydrogen transport in timestep to from s1 to s2
+                    ETP[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "ETP_%s_%s_%s", t,s,s2), vtype = "c")    # positive electricity transport in timestep to from s1 to s2
+                    HTP[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "HTP_%s_%s_%s", t,s,s2), vtype = "c")    # positive hydrogen transport in timestep to from s1 to s2
+                    ETN[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "ETN_%s_%s_%s", t,s,s2), vtype = "c")    # negative electricity transport in timestep to from s1 to s2
+                    HTN[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "HTN_%s_%s_%s", t,s,s2), vtype = "c")    # negative hydrogen transport in timestep to from s1 to s2
         
 
     for s in S:
-        HL[s] = model.addVar(lb=0.0, name="HL_%s" % (s), vtype = "c")                   # hydrogen storage limit at location s
-        GtPL[s] = model.addVar(lb=0.0, name="GtPL_%s" % (s), vtype = "c")               # gas to power (fuel cell) limit at location s
-        PtGL[s] = model.addVar(lb=0.0, name="PtGL_%s" % (s), vtype = "c")               # power to gas (electrolyzer) limit at location s
+        HL[s] = model.addVar(lb=0.0, name=_name(lean, "HL_%s", s), vtype = "c")        # hydrogen storage limit at location s
+        GtPL[s] = model.addVar(lb=0.0, name=_name(lean, "GtPL_%s", s), vtype = "c")    # gas to power (fuel cell) limit at location s
+        PtGL[s] = model.addVar(lb=0.0, name=_name(lean, "PtGL_%s", s), vtype = "c")    # power to gas (electrolyzer) limit at location s
         for s2 in S:
             if s2 != s:
-                ETL[(s,s2)] = model.addVar(lb=0.0, name="ETL_%s_%s" % (s,s2), vtype = "c")    # electricity transport limit between s1 and s2
-                HTL[(s,s2)] = model.addVar(lb=0.0, name="HTL_%s_%s" % (s,s2), vtype = "c")    # hydrogen transport limit between s1 and s2
+                ETL[(s,s2)] = model.addVar(lb=0.0, name=_name(lean, "ETL_%s_%s", s,s2), vtype = "c")    # electricity transport limit between s1 and s2
+                HTL[(s,s2)] = model.addVar(lb=0.0, name=_name(lean, "HTL_%s_%s", s,s2), vtype = "c")    # hydrogen transport limit between s1 and s2
 
     model.update()                                                                      # Update the model to make variables known. From now on, no variables should be added.
 
@@ -123,8 +171,10 @@ def solve_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp):
 
     ### set objective and solve
     model.setObjective(quicksum( ( C['f'][s] + quicksum( C['v'][t,s] for t in T ) ) for s in S ), GRB.MINIMIZE)                         # (1) - objective function
-    model.optimize()
+    build_time = time.perf_counter() - start
+    optimize_time, phases = _optimize(model, telemetry)
     model.printQuality()
+    start = time.perf_counter()
     
     ### save variables in dict to be returned by the function
     V = dict()
@@ -147,19 +197,122 @@ def solve_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp):
     V['PtGL'] = PtGL
     
     for V_key, _ in V.items():
-        V[V_key] = {k: v.x for k, v in V[V_key].items()}                # get variables as dicts with normal values
+        V[V_key] = model.getAttr('X', V[V_key])                         # get variables as dicts with normal values, one batched call per variable family
     for C_key, _ in C.items():
-        C[C_key] = {k: v.x for k, v in C[C_key].items()}                # get variables as dicts with normal values
+        C[C_key] = model.getAttr('X', C[C_key])                         # get variables as dicts with normal values, one batched call per variable family
     V['ET'] = {k: V['ETP'][k] - V['ETN'][k] for k in V['ETP'].keys()}   # get ET variable by calculating ET = ETP - ETN
     V['HT'] = {k: V['HTP'][k] - V['HTN'][k] for k in V['HTP'].keys()}   # get ET variable by calculating ET = ETP - ETN
 
+    if telemetry is not None:
+        telemetry.record(model, 'basismodell', build_time, optimize_time, time.perf_counter() - start, phases)
+    if lean:
+        _dispose(model, env)
+        model = None
     return model, V, C
 
 
-def solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp,
-             HTL, ETL, GtPL, PtGL, HL, H0, last_step, rolling_horizon, print_result=False):
+def solve_basismodell_arrays(T, S, S_neighbours, EE, EV, c, eta, ramp, reduced_costs=False, duals=False, network='pairs', telemetry=None, lean=False,
+                             compact=False):
+    """solve the basismodell with the vectorized (matrix-based) model builder and get the solution as arrays.
+
+    Builds the same formulation as solve_basismodell, equations (1)-(22), but from numpy arrays and a sparse
+    constraint matrix (see lp_matrix.build_basismodell_lp) instead of one addVar/addConstr call per variable
+    and constraint.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp -- see solve_basismodell
+        reduced_costs -- if True, also get the reduced costs of all variables
+        duals -- if True, also get the dual values of all constraints
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        telemetry -- telemetry.SolveTelemetry that records the solve, if given
+        lean -- if True, lower the peak memory: the LP is released once it is loaded into gurobi (see lp_matrix.LinearProgram.release),
+                and the model and its own environment are freed as soon as the solution is extracted
+        compact -- if True, without the variables Cv and dH, see lp_matrix._add_operation; Cv and dH are calculated after the solve
+
+    Returns:
+        model -- solved gurobi model; None in lean mode
+        solution -- solution.Solution with one array per variable family
+    """
+    start = time.perf_counter()
+    lp = lp_matrix.build_basismodell_lp(T, S, S_neighbours, EE, EV, c, eta, ramp, network, compact)
+
     # Model
-    model = Model("optimal operation of energy system")
+    model, env = _make_model(lp.name, lean)
+    x, constrs = lp_solvers.load_gurobi(model, lp)                                      # (1) - objective function
+    if lean:
+        lp.release()
+    build_time = time.perf_counter() - start
+    optimize_time, phases = _optimize(model, telemetry)
+    model.printQuality()
+
+    start = time.perf_counter()
+    solution = extract_solution(lp, x, constrs, reduced_costs, duals)
+    solution.objective = model.ObjVal
+    if telemetry is not None:
+        telemetry.record(model, 'basismodell', build_time, optimize_time, time.perf_counter() - start, phases)
+    if lean:
+        _dispose(model, env)
+        model = None
+    return model, solution
+
+
+def solve_basismodell_matrix(T, S, S_neighbours, EE, EV, c, eta, ramp, compact=False):
+    """solve the basismodell with the vectorized (matrix-based) model builder.
+
+    Takes and returns the same objects as solve_basismodell, see solve_basismodell_arrays; compact see there.
+    """
+    model, solution = solve_basismodell_arrays(T, S, S_neighbours, EE, EV, c, eta, ramp, compact=compact)
+    V, C = solution.to_dicts()                                                          # get variables as dicts with normal values
+    return model, V, C
+
+
+def solve_basismodell_aggregated(aggregation, S, S_neighbours, c, eta, ramp, reduced_costs=False, duals=False, network='pairs', telemetry=None,
+                                 compact=False):
+    """solve the basismodell on representative periods and expand the solution to the full timeline.
+
+    See lp_matrix.build_basismodell_lp_aggregated for the formulation. The time-indexed results are mapped from the
+    representative periods back to every timestep of the full timeline, with H as absolute storage level SOC + H.
+
+    Arguments:
+        aggregation -- aggregation.Aggregation with the representative periods
+        S, S_neighbours, c, eta, ramp -- see solve_basismodell
+        reduced_costs -- if True, also get the reduced costs of all variables (not expanded)
+        duals -- if True, also get the dual values of all constraints (not expanded)
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        telemetry -- telemetry.SolveTelemetry that records the solve, if given
+        compact -- see solve_basismodell_arrays
+
+    Returns:
+        model -- solved gurobi model
+        solution -- solution.Solution with one array per variable family; time-indexed families cover the full timeline
+    """
+    start = time.perf_counter()
+    lp = lp_matrix.build_basismodell_lp_aggregated(aggregation, S, S_neighbours, c, eta, ramp, network, compact)
+
+    # Model
+    model = Model(lp.name)
+    x, constrs = lp_solvers.load_gurobi(model, lp)                                      # (1) - objective function
+    build_time = time.perf_counter() - start
+    optimize_time, phases = _optimize(model, telemetry)
+    model.printQuality()
+
+    start = time.perf_counter()
+    solution = extract_solution(lp, x, constrs, reduced_costs, duals)
+    solution.objective = model.ObjVal
+    solution = aggregation.expand_solution(solution)
+    if telemetry is not None:
+        telemetry.record(model, 'basismodell_aggregated', build_time, optimize_time, time.perf_counter() - start, phases)
+    return model, solution
+
+
+def solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp,
+             HTL, ETL, GtPL, PtGL, HL, H0, last_step, rolling_horizon, print_result=False, telemetry=None, commit_length=1, lean=False):
+    start = time.perf_counter()
+    if isinstance(EE, ModelInputs):                                                     # this builder works on the EE and EV dictionaries
+        EE, EV = EE.select(T).make_dicts()
+
+    # Model; in lean mode the variables are unnamed and the model is freed after the values are extracted, and None is returned instead
+    model, env = _make_model("optimal operation of energy system", lean)
     if not print_result:
         model.setParam('OutputFlag', False)
     
@@ -183,24 +336,24 @@ def solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp,
 
     for t in T:
         for s in S:
-            C['v'][t,s] = model.addVar(lb=-10**9,name="Cv_%s_%s" % (t,s), vtype = "c")            # variable cost in timestep t and location s
+            C['v'][t,s] = model.addVar(lb=-10**9,name=_name(lean, "Cv_%s_%s", t,s), vtype = "c")    # variable cost in timestep t and location s
 
     for t in T:
         for s in S:
-            H[t,s] = model.addVar(lb=0.0, name="H_%s_%s" % (t,s), vtype = "c")          # stored hydrogen in timestep t and location s
-            dH[t,s] = model.addVar(lb=-10**9,name="dH_%s_%s" % (t,s), vtype = "c")      # change of stored hydrogen in timestep t and location s
-            GtP[t,s] = model.addVar(lb=0.0, name="GtP_%s_%s" % (t,s), vtype = "c")      # gas to power in timestep t and location s
-            PtG[t,s] = model.addVar(lb=0.0, name="PtG_%s_%s" % (t,s), vtype = "c")      # power to gas in timestep t and location s
-            EI[t,s] = model.addVar(lb=0.0, name="EI%s_%s" % (t,s), vtype = "c")         # energy imports in timestep t and location s            
-            EX[t,s] = model.addVar(lb=0.0, name="EX%s_%s" % (t,s), vtype = "c")         # energy exports in timestep t and location s
-            HI[t,s] = model.addVar(lb=0.0, name="EI%s_%s" % (t,s), vtype = "c")         # hydrogen imports in timestep t and location s            
-            HX[t,s] = model.addVar(lb=0.0, name="EX%s_%s" % (t,s), vtype = "c")         # hydrogen exports in timestep t and location s 
+            H[t,s] = model.addVar(lb=0.0, name=_name(lean, "H_%s_%s", t,s), vtype = "c")        # stored hydrogen in timestep t and location s
+            dH[t,s] = model.addVar(lb=-10**9,name=_name(lean, "dH_%s_%s", t,s), vtype = "c")    # change of stored hydrogen in timestep t and location s
+            GtP[t,s] = model.addVar(lb=0.0, name=_name(lean, "GtP_%s_%s", t,s), vtype = "c")    # gas to power in timestep t and location s
+            PtG[t,s] = model.addVar(lb=0.0, name=_name(lean, "PtG_%s_%s", t,s), vtype = "c")    # power to gas in timestep t and location s
+            EI[t,s] = model.addVar(lb=0.0, name=_name(lean, "EI%s_%s", t,s), vtype = "c")       # energy imports in timestep t and location s            
+            EX[t,s] = model.addVar(lb=0.0, name=_name(lean, "EX%s_%s", t,s), vtype = "c")       # energy exports in timestep t and location s
+            HI[t,s] = model.addVar(lb=0.0, name=_name(lean, "EI%s_%s", t,s), vtype = "c")       # hydrogen imports in timestep t and location s            
+            HX[t,s] = model.addVar(lb=0.0, name=_name(lean, "EX%s_%s", t,s), vtype = "c")       # hydrogen exports in timestep t and location s 
             for s2 in S:
                 if s2 != s:
-                    ETP[t,(s,s2)] = model.addVar(lb=0.0,name="ETP_%s_%s_%s" % (t,s,s2), vtype = "c")   # positive electricity transport in timestep to from s1 to s2
-                    HTP[t,(s,s2)] = model.addVar(lb=0.0,name="HTP_%s_%s_%s" % (t,s,s2), vtype = "c")   # positive hydrogen transport in timestep to from s1 to s2
-                    ETN[t,(s,s2)] = model.addVar(lb=0.0,name="ETN_%s_%s_%s" % (t,s,s2), vtype = "c")   # negative electricity transport in timestep to from s1 to s2
-                    HTN[t,(s,s2)] = model.addVar(lb=0.0,name="HTN_%s_%s_%s" % (t,s,s2), vtype = "c")   # negative hydrogen transport in timestep to from s1 to s2
+                    ETP[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "ETP_%s_%s_%s", t,s,s2), vtype = "c")    # positive electricity transport in timestep to from s1 to s2
+                    HTP[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "HTP_%s_%s_%s", t,s,s2), vtype = "c")    # positive hydrogen transport in timestep to from s1 to s2
+                    ETN[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "ETN_%s_%s_%s", t,s,s2), vtype = "c")    # negative electricity transport in timestep to from s1 to s2
+                    HTN[t,(s,s2)] = model.addVar(lb=0.0,name=_name(lean, "HTN_%s_%s_%s", t,s,s2), vtype = "c")    # negative hydrogen transport in timestep to from s1 to s2
 
     model.update()                                                                      # Update the model to make variables known. From now on, no variables should be added.
 
@@ -252,7 +405,9 @@ def solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp,
 
     ### set objective and solve
     model.setObjective(quicksum( ( quicksum( C['v'][t,s] for t in T ) ) for s in S ), GRB.MINIMIZE)                                     # (1) - objective function
-    model.optimize()
+    build_time = time.perf_counter() - start
+    optimize_time, phases = _optimize(model, telemetry)
+    start = time.perf_counter()
     
     ### save variables in dict to be returned by the function
     if last_step == True:
@@ -283,15 +438,16 @@ def solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp,
         V['ETN'] = ETN
         V['HTP'] = HTP
         V['HTN'] = HTN
+        committed = set(T[:commit_length])                     # timesteps whose results are kept
         V_result = dict()
         for V_key, _ in V.items():
             V_result[V_key] = dict()
-            for (t,s), value in V[V_key].items():               # filter for results of first timestep
-                if t == T[0]:
+            for (t,s), value in V[V_key].items():               # filter for results of the first commit_length timesteps
+                if t in committed:
                     V_result[V_key][(t,s)] = value
         
     for V_key, _ in V_result.items():
-        V_result[V_key] = {k: v.x for k, v in V_result[V_key].items()}                              # get variables as dicts with normal values
+        V_result[V_key] = model.getAttr('X', V_result[V_key])                                       # get variables as dicts with normal values, one batched call per variable family
     V_result['ET'] = {k: V_result['ETP'][k] - V_result['ETN'][k] for k in V_result['ETP'].keys()}   # get ET variable by calculating ET = ETP - ETN
     V_result['HT'] = {k: V_result['HTP'][k] - V_result['HTN'][k] for k in V_result['HTP'].keys()}   # get ET variable by calculating ET = ETP - ETN
     
@@ -299,6 +455,451 @@ def solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp,
         C = None
     else:
         for C_key, _ in C.items():
-            C[C_key] = {k: v.x for k, v in C[C_key].items()}                # get variables as dicts with normal values
+            C[C_key] = model.getAttr('X', C[C_key])                         # get variables as dicts with normal values, one batched call per variable family
     
-    return model, V_result, C
\ No newline at end of file
+    if telemetry is not None:
+        telemetry.record(model, 'dispatch', build_time, optimize_time, time.perf_counter() - start, phases)
+    if lean:
+        _dispose(model, env)
+        model = None
+    return model, V_result, C
+
+
+def solve_dispatch_arrays(T, S, S_neighbours, EE, EV, c, eta, ramp,
+             HTL, ETL, GtPL, PtGL, HL, H0, last_step, print_result=False, reduced_costs=False, duals=False, network='pairs', telemetry=None,
+             lean=False, compact=False):
+    """solve the dispatch model with the vectorized (matrix-based) model builder and get the solution as arrays.
+
+    Same formulation as solve_dispatch, see lp_matrix.build_dispatch_lp.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step, print_result -- see solve_dispatch
+        reduced_costs -- if True, also get the reduced costs of all variables
+        duals -- if True, also get the dual values of all constraints
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        telemetry -- telemetry.SolveTelemetry that records the solve, if given
+        lean, compact -- see solve_basismodell_arrays
+
+    Returns:
+        model -- solved gurobi model; None in lean mode
+        solution -- solution.Solution with one array per variable family
+    """
+    start = time.perf_counter()
+    EE_cost, EE_sum, EV_arr = lp_matrix.make_input_arrays(T, S, EE, EV, c)
+    lp = lp_matrix.build_dispatch_lp(list(T), S, S_neighbours, EE_cost, EE_sum, EV_arr, c, eta, ramp,
+                                     HTL, ETL, GtPL, PtGL, HL, H0, last_step, network, compact=compact)
+    model, env = _make_model(lp.name, lean)
+    if not print_result:
+        model.setParam('OutputFlag', False)
+    x, constrs = lp_solvers.load_gurobi(model, lp)                                      # (1) - objective function
+    if lean:
+        lp.release()
+    build_time = time.perf_counter() - start
+    optimize_time, phases = _optimize(model, telemetry)
+
+    start = time.perf_counter()
+    solution = extract_solution(lp, x, constrs, reduced_costs, duals)
+    solution.objective = model.ObjVal
+    if telemetry is not None:
+        telemetry.record(model, 'dispatch', build_time, optimize_time, time.perf_counter() - start, phases)
+    if lean:
+        _dispose(model, env)
+        model = None
+    return model, solution
+
+
+
+class ParametricModel:
+    """gurobi model of a lp_matrix.LinearProgram that is changed in place and re-solved from the previous optimal basis.
+
+    The model is described by a build function that makes the LinearProgram from keyword parameters, e.g. the costs c or
+    the limits HTL, ETL, GtPL, PtGL, HL. update() builds the LinearProgram again with the changed parameters, which only
+    takes numpy operations, and hands the differences to gurobi: changed bounds, objective coefficients, right hand
+    sides and matrix coefficients (e.g. the costs in (2) and (3)). Gurobi keeps the basis of the last solve, so the
+    next solve() is warm started. Parameters that change the structure of the model, e.g. the timesteps or the network,
+    need a new ParametricModel.
+    """
+    def __init__(self, build, params, print_result=False, telemetry=None, label='parametric'):
+        """build the model from build(**params); params are the parameters that can be changed by update()."""
+        start = time.perf_counter()
+        self.build = build
+        self.params = dict(params)
+        self.lp = build(**self.params)
+        self.model = Model(self.lp.name)
+        if not print_result:
+            self.model.setParam('OutputFlag', False)
+        self.x, self.constrs = lp_solvers.load_gurobi(self.model, self.lp)              # (1) - objective function
+        self._arrays = self._get_arrays(self.lp)
+        self._vars = None                                                               # single variables and constraints for chgCoeff, made on first use
+        self._constrs = None
+        self.telemetry = telemetry
+        self.label = label
+        self.build_time = time.perf_counter() - start                                  # time of the last build or update
+
+    @staticmethod
+    def _get_arrays(lp):
+        return {'lb': lp.lb, 'ub': lp.ub, 'obj': lp.obj, 'rhs': lp.rhs, 'sense': lp.sense, 'A': lp.A}
+
+    def update(self, **params):
+        """change parameters of the model in place, e.g. update(c=c) or update(HTL=HTL, ETL=ETL).
+
+        Returns:
+            changes -- dictionary with the number of changed bounds ('lb', 'ub'), objective coefficients ('obj'),
+                       right hand sides ('rhs') and matrix coefficients ('A')
+
+        Side effects:
+            raises ValueError if the changed parameters change the structure of the model
+        """
+        start = time.perf_counter()
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise ValueError(str('Unknown parameters '+', '.join(sorted(unknown))+', options: '+', '.join(self.params)))
+        new_params = dict(self.params, **params)
+        lp = self.build(**new_params)
+        new = self._get_arrays(lp)
+        old = self._arrays
+        if new['A'].shape != old['A'].shape or not np.array_equal(new['sense'], old['sense']):
+            raise ValueError('The changed parameters change the structure of the model; build a new ParametricModel instead.')
+
+        changes = dict()
+        for key, attr, target in [('lb', 'LB', self.x), ('ub', 'UB', self.x), ('obj', 'Obj', self.x), ('rhs', 'RHS', self.constrs)]:
+            changed = np.flatnonzero(new[key] != old[key])
+            if len(changed):
+                setattr(target[changed], attr, new[key][changed])
+            changes[key] = len(changed)
+        diff = (new['A'] - old['A']).tocoo()
+        changed = np.flatnonzero(diff.data)
+        if len(changed):
+            if self._vars is None:
+                self._vars = self.x.tolist()
+                self._constrs = self.constrs.tolist()
+            rows, cols = diff.row[changed], diff.col[changed]
+            values = np.asarray(new['A'][rows, cols]).ravel()
+            for i, j, value in zip(rows.tolist(), cols.tolist(), values.tolist()):
+                self.model.chgCoeff(self._constrs[i], self._vars[j], value)
+        changes['A'] = len(changed)
+        if lp.offset != self.lp.offset:                                                 # constant of the objective, e.g. of the compact formulation
+            self.model.ObjCon = lp.offset
+
+        self.params = new_params
+        self.lp = lp
+        self._arrays = new
+        self.build_time = time.perf_counter() - start
+        return changes
+
+    def solve(self, reduced_costs=False, duals=False):
+        """solve the model, warm started from the basis of the previous solve, if any.
+
+        Returns:
+            solution -- solution.Solution with one array per variable family
+        """
+        optimize_time, phases = _optimize(self.model, self.telemetry)
+        if self.model.Status != GRB.OPTIMAL:
+            raise RuntimeError(str('gurobi did not find an optimal solution, status '+str(self.model.Status)))
+        start = time.perf_counter()
+        solution = extract_solution(self.lp, self.x, self.constrs, reduced_costs, duals)
+        solution.objective = self.model.ObjVal
+        if self.telemetry is not None:
+            self.telemetry.record(self.model, self.label, self.build_time, optimize_time, time.perf_counter() - start, phases)
+        self.build_time = 0.0
+        return solution
+
+
+def make_parametric_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp, network='pairs', print_result=False, telemetry=None, compact=False):
+    """build the basismodell as ParametricModel, with the costs c, efficiencies eta and ramps ramp as parameters.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp -- see solve_basismodell
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        print_result -- if False, the solver log is suppressed
+        telemetry -- telemetry.SolveTelemetry that records every solve, if given
+        compact -- see solve_basismodell_arrays
+
+    Returns:
+        model -- ParametricModel; e.g. model.update(c=dict(c, PtGL=10)) and model.solve()
+    """
+    def build(c, eta, ramp):
+        return lp_matrix.build_basismodell_lp(T, S, S_neighbours, EE, EV, c, eta, ramp, network, compact)
+    return ParametricModel(build, {'c': c, 'eta': eta, 'ramp': ramp}, print_result, telemetry, 'basismodell')
+
+def make_parametric_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step, network='pairs',
+                             print_result=False, telemetry=None, compact=False):
+    """build the dispatch model as ParametricModel, with c, eta, ramp, the limits HTL, ETL, GtPL, PtGL, HL and H0 as parameters.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step -- see solve_dispatch
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        print_result -- if False, the solver log is suppressed
+        telemetry -- telemetry.SolveTelemetry that records every solve, if given
+        compact -- see solve_basismodell_arrays
+
+    Returns:
+        model -- ParametricModel; e.g. model.update(HTL=HTL) and model.solve()
+    """
+    def build(c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0):
+        EE_cost, EE_sum, EV_arr = lp_matrix.make_input_arrays(T, S, EE, EV, c)
+        return lp_matrix.build_dispatch_lp(list(T), S, S_neighbours, EE_cost, EE_sum, EV_arr, c, eta, ramp,
+                                           HTL, ETL, GtPL, PtGL, HL, H0, last_step, network, compact=compact)
+    params = {'c': c, 'eta': eta, 'ramp': ramp, 'HTL': HTL, 'ETL': ETL, 'GtPL': GtPL, 'PtGL': PtGL, 'HL': HL, 'H0': H0}
+    return ParametricModel(build, params, print_result, telemetry, 'dispatch')
+
+class DispatchWindow:
+    """dispatch model of one rolling horizon window that is built once and re-solved for every shifted window.
+
+    Only the time-varying data is updated when the window moves on: the right hand sides of the variable costs (2)
+    and the electricity energy balance (4), and the initial storage H0 in (6). Each solve is warm started from the
+    basis of the previous window, shifted by the number of committed timesteps.
+
+    With a resolution, the window is hourly only at its start and aggregates the later hours into longer timesteps
+    (multi-resolution lookahead, see lp_matrix.make_durations and lp_matrix.build_dispatch_lp), which makes the model
+    of each window smaller while the far end of the horizon still steers the storage.
+    """
+    def __init__(self, t_horizon, S, S_neighbours, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, print_result=False, network='pairs', telemetry=None,
+                 resolution=None, commit_length=1):
+        """build the dispatch model for windows of t_horizon hours; the data is set by solve().
+
+        If telemetry (telemetry.SolveTelemetry) is given, every solve is recorded with label 'rolling_horizon'; its build_time
+        is the time to update the data and the warm start basis, plus the time to build the model for the first solve.
+        If resolution (see lp_matrix.make_durations) is given, its first commit_length timesteps have to last one hour each,
+        as they are committed.
+        """
+        start = time.perf_counter()
+        self.durations = None if resolution is None else lp_matrix.make_durations(t_horizon, resolution)
+        if self.durations is not None and (self.durations[:commit_length] != 1).any():
+            raise ValueError(str('The first '+str(commit_length)+' timesteps of the rolling horizon window are committed and have to last one hour each'))
+        zeros = np.zeros((t_horizon if self.durations is None else len(self.durations), len(S)))
+        self.lp = lp_matrix.build_dispatch_lp(list(range(len(zeros))), S, S_neighbours, zeros, zeros, zeros, c, eta, ramp,
+                                              HTL, ETL, GtPL, PtGL, HL, {s: 0 for s in S}, last_step=False, network=network,
+                                              durations=self.durations)
+        self.S = S
+        self.rhs = self.lp.rhs
+        self.model = Model(self.lp.name)
+        if not print_result:
+            self.model.setParam('OutputFlag', False)
+        self.x, self.constrs = lp_solvers.load_gurobi(self.model, self.lp)              # (1) - objective function; standard formulation, as solve() sets the right hand sides of Cv
+        self.basis = None
+        self.telemetry = telemetry
+        self.build_time = time.perf_counter() - start                                  # added to the build time of the first recorded solve
+
+    def solve(self, EE_cost, EE_sum, EV_arr, H0, shift=1, step=None):
+        """solve the window with the given data.
+
+        Arguments:
+            EE_cost, EE_sum, EV_arr -- arrays of shape (t_horizon, S) with the hourly data of the window, see lp_matrix.make_input_arrays
+            H0 -- dictionary with stored hydrogen before the first timestep of the window
+            shift -- number of timesteps the window moved on since the last solve; used to shift the previous basis
+            step -- step of the rolling horizon, for the telemetry record
+
+        Returns:
+            x -- solution vector; lp.values(x, name) gives the values of a variable family
+        """
+        start = time.perf_counter()
+        if self.durations is not None:                                                  # hourly averages over the timesteps of the window
+            EE_cost, EE_sum, EV_arr = (lp_matrix.aggregate_window(arr, self.durations) for arr in (EE_cost, EE_sum, EV_arr))
+        self.rhs[self.lp.con['Cv']] = EE_cost
+        self.rhs[self.lp.con['balance_E']] = EV_arr - EE_sum
+        self.rhs[self.lp.con['H_start']] = [H0[s] for s in self.S]
+        self.constrs.RHS = self.rhs
+
+        if self.basis is not None:                                                      # warm start from the shifted basis of the previous window
+            var_perm, con_perm = self.lp.shift_permutation(shift)
+            self.x.VBasis = self.basis[0][var_perm]
+            self.constrs.CBasis = self.basis[1][con_perm]
+        build_time = time.perf_counter() - start + self.build_time
+        self.build_time = 0.0
+        optimize_time, phases = _optimize(self.model, self.telemetry)
+
+        start = time.perf_counter()
+        try:
+            self.basis = (self.x.VBasis, self.constrs.CBasis)
+        except GurobiError:                                                             # no basis available, e.g. barrier without crossover
+            self.basis = None
+        x = self.x.X
+        if self.telemetry is not None:
+            self.telemetry.record(self.model, 'rolling_horizon', build_time, optimize_time, time.perf_counter() - start, phases, step=step)
+        return x
+
+
+def _solve_segment(S, S_neighbours, c, eta, ramp, limits, EE_cost, EE_sum, EV_arr, H0, t_horizon, first, last, threads=None, progress=True, network='pairs',
+                   telemetry=None, resolution=None, commit_length=1, checkpoint=None, checkpoint_every=168):
+    """solve the rolling horizon windows starting at the steps first, first+commit_length, ... before last with one DispatchWindow.
+
+    The committed values are written into arrays allocated for all steps of the segment; with checkpoint, these are
+    memory-mapped files of a RollingHorizonCheckpoint that is saved every checkpoint_every windows and at the end, and
+    a segment with a checkpoint of the same run continues after its last saved window without solving the earlier ones.
+    The run is identified by its parameters and a content hash of its inputs (costs, efficiencies, ramps, limits, data
+    and H0, see solve_cache.input_key), so a checkpoint of other inputs is not resumed but started anew. For how a
+    resumed run can differ from an uninterrupted one, see checkpoint.RollingHorizonCheckpoint.
+
+    Arguments:
+        S, S_neighbours, c, eta, ramp -- see solve_rolling_horizon
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL
+        EE_cost, EE_sum, EV_arr -- arrays of shape (T, S), see lp_matrix.make_input_arrays
+        H0 -- dictionary with stored hydrogen before timestep first
+        t_horizon -- length of the rolling time horizon
+        first, last -- first and last (exclusive) step of the segment
+        threads -- number of threads gurobi may use; default: gurobi decides
+        progress -- if True, show a progress bar
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        telemetry -- telemetry.SolveTelemetry that records every window, if given
+        resolution -- resolution of the windows, see DispatchWindow; default hourly
+        commit_length -- number of timesteps committed from each window, the window then moves on by as many steps
+        checkpoint -- directory of a RollingHorizonCheckpoint to save the committed values to and to resume from; default none
+        checkpoint_every -- number of windows solved between two checkpoints
+
+    Returns:
+        V -- dictionary of arrays with the committed values of the steps first, ..., last-1
+    """
+    window = DispatchWindow(t_horizon, S, S_neighbours, c, eta, ramp, *limits, network=network, telemetry=telemetry, resolution=resolution,
+                            commit_length=commit_length)
+    if threads is not None:
+        window.model.setParam('Threads', threads)
+
+    V_keys = list(window.lp.var.keys())                                                # all variable families are indexed by time
+    shapes = {V_key: (int(last-first),) + window.lp.var[V_key].shape[1:] for V_key in V_keys}      # int, as numpy scalars make the header of a checkpoint file unreadable
+    start = first
+    if checkpoint is None:
+        V = {V_key: np.zeros(shape) for V_key, shape in shapes.items()}
+    else:
+        run = {'S': S, 'network': network, 't_horizon': t_horizon, 'first': int(first), 'last': int(last), 'commit_length': commit_length,
+               'resolution': resolution, 'inputs': solve_cache.input_key(c, eta, ramp, limits, EE_cost, EE_sum, EV_arr, H0)}
+        store = RollingHorizonCheckpoint(checkpoint, run, shapes)
+        V = store.V
+        if store.step is not None:                                                      # resume after the last saved window
+            start, H0 = store.step, store.H0
+    for n, step in enumerate(tqdm(range(start, last, commit_length), ascii=True, desc='solving rolling horizon optimization:', disable=not progress)):
+        x = window.solve(EE_cost[step:step+t_horizon], EE_sum[step:step+t_horizon], EV_arr[step:step+t_horizon], H0, shift=commit_length, step=step)
+        k = min(commit_length, last-step)                                               # the last window of the segment may commit fewer timesteps
+        for V_key in V_keys:                                                            # keep results of the first k timesteps of the window
+            V[V_key][step-first:step-first+k] = x[window.lp.var[V_key][:k]]
+        H0 = dict(zip(S, V['H'][step-first+k-1]))                                       # update H0 for next window
+        if checkpoint is not None and ((n+1) % checkpoint_every == 0 or step+k == last):
+            store.save(step+k, H0)
+    if checkpoint is not None:
+        V = store.results()
+    if network == 'pairs':
+        V['ET'] = V['ETP'] - V['ETN']                                                   # get ET variable by calculating ET = ETP - ETN
+        V['HT'] = V['HTP'] - V['HTN']                                                   # get HT variable by calculating HT = HTP - HTN
+    return V
+
+def _solve_segment_recorded(segment, phase_times, *args, **kwargs):
+    """solve a segment like _solve_segment in a worker process and return its values and its telemetry records."""
+    telemetry = SolveTelemetry(phase_times=phase_times, context={'segment': segment})
+    V = _solve_segment(*args, telemetry=telemetry, **kwargs)
+    return V, telemetry.records
+
+
+def solve_rolling_horizon(T, S, S_neighbours, EE, EV, c, eta, ramp,
+             HTL, ETL, GtPL, PtGL, HL, H0, t_horizon, num_steps=None, network='pairs', telemetry=None, resolution=None, commit_length=1,
+             checkpoint=None, checkpoint_every=168):
+    """solve the dispatch model with a rolling horizon, keeping the first commit_length timesteps of each window.
+
+    Solves the same windows as calling solve_dispatch(..., last_step=False, rolling_horizon=True, commit_length=commit_length)
+    for every window T[t:t+t_horizon], t = 0, commit_length, ..., but the model is only built once (see DispatchWindow)
+    and each window is warm started from the previous one. Each window reaches the same optimal objective as
+    solve_dispatch with the same storage levels H0, but where a window is degenerate, i.e. has several optimal solutions,
+    it can commit another optimal dispatch, and the later windows then start from other storage levels.
+    Committing more timesteps per window divides the number of solves by commit_length.
+
+    Arguments:
+        T -- list of timesteps
+        S -- list of countries
+        S_neighbours -- list of neighbouring countries
+        EE, EV -- dictionaries with hourly electricity generation and demand data for each country
+        c, eta, ramp -- dictionaries of costs, efficiencies and ramps
+        HTL, ETL, GtPL, PtGL, HL -- dictionaries with transport, power and storage limits
+        H0 -- dictionary with stored hydrogen before the first timestep
+        t_horizon -- length of the rolling time horizon
+        num_steps -- number of windows to solve; default len(T) - t_horizon
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        telemetry -- telemetry.SolveTelemetry that records every window with its step, if given
+        resolution -- list of pairs (block_length, until) for a window that is hourly only at its start, see lp_matrix.make_durations;
+                      default hourly over the whole window
+        commit_length -- number of timesteps committed from each window, e.g. 1, 6, 24 or 168; the window then moves on by as many steps
+        checkpoint -- directory to save the committed values to every checkpoint_every windows, see checkpoint.RollingHorizonCheckpoint;
+                      a run with the same parameters, inputs and checkpoint resumes after the last saved window
+        checkpoint_every -- number of windows solved between two checkpoints
+
+    Returns:
+        V -- dictionary of arrays with the committed values; shape (num_steps, S) for 'Cv','H','dH','GtP','PtG','EI','EX','HI','HX'
+             and (num_steps, links) for 'ET','HT' (and 'ETP','ETN','HTP','HTN' for network 'pairs') with links as in lp_matrix.make_links
+    """
+    if num_steps is None:
+        num_steps = len(T) - t_horizon
+    EE_cost, EE_sum, EV_arr = lp_matrix.make_input_arrays(T[:num_steps+t_horizon], S, EE, EV, c)
+    return _solve_segment(S, S_neighbours, c, eta, ramp, (HTL, ETL, GtPL, PtGL, HL), EE_cost, EE_sum, EV_arr, H0, t_horizon, 0, num_steps,
+                          network=network, telemetry=telemetry, resolution=resolution, commit_length=commit_length,
+                          checkpoint=checkpoint, checkpoint_every=checkpoint_every)
+
+
+def solve_storage_seed(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, network='pairs', telemetry=None):
+    """solve the dispatch model once over all timesteps (perfect foresight) to get a storage trajectory.
+
+    The trajectory is a cheap estimate of the storage levels the rolling horizon will reach and is used as
+    starting point for the segments of solve_rolling_horizon_parallel.
+
+    Returns:
+        H_seed -- array of shape (T, S) with the stored hydrogen in each timestep
+    """
+    _, solution = solve_dispatch_arrays(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step=False, network=network,
+                                        telemetry=telemetry)
+    return solution['H']
+
+
+def solve_rolling_horizon_parallel(T, S, S_neighbours, EE, EV, c, eta, ramp,
+             HTL, ETL, GtPL, PtGL, HL, H0, t_horizon, H_seed, num_segments, t_warmup, num_workers=None, num_steps=None, network='pairs',
+             telemetry=None, resolution=None, commit_length=1, checkpoint=None, checkpoint_every=168):
+    """solve the rolling horizon in overlapping segments of the year, one worker process per segment.
+
+    Each segment starts t_warmup steps before its first committed step with the storage levels of the seed
+    trajectory H_seed, e.g. the storage results of the basismodell or of solve_storage_seed. The results of
+    the warm-up steps are discarded and the committed steps of all segments are stitched together.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, t_horizon, num_steps, network, resolution, commit_length,
+        checkpoint_every -- see solve_rolling_horizon
+        H_seed -- array of shape (T, S) with the estimated stored hydrogen in each timestep
+        num_segments -- number of segments the steps are split into
+        t_warmup -- number of steps each segment (except the first) is solved before its first committed step
+        num_workers -- number of worker processes; default num_segments
+        checkpoint -- directory with one checkpoint per segment, see solve_rolling_horizon
+        telemetry -- telemetry.SolveTelemetry that records every window with its step and segment, if given; the
+                     records are collected in the workers and added after all segments are solved
+
+    Returns:
+        V -- dictionary of arrays like solve_rolling_horizon
+        H_gap -- array of shape (num_segments-1, S) with the difference of the stored hydrogen at each stitch between
+                 the end of a segment and the end of the warm-up of the next segment
+    """
+    if num_steps is None:
+        num_steps = len(T) - t_horizon
+    if num_workers is None:
+        num_workers = num_segments
+    EE_cost, EE_sum, EV_arr = lp_matrix.make_input_arrays(T[:num_steps+t_horizon], S, EE, EV, c)
+    limits = (HTL, ETL, GtPL, PtGL, HL)
+    bounds = np.linspace(0, num_steps, num_segments+1).round().astype(int)               # first committed step of each segment
+    starts = [max(0, first - t_warmup) for first in bounds[:-1]]                        # first solved step of each segment
+
+    threads = max(1, os.cpu_count()//num_workers)                                       # do not oversubscribe the cores
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = []
+        for segment, (start, last) in enumerate(zip(starts, bounds[1:])):
+            H0_segment = H0 if start == 0 else dict(zip(S, H_seed[start-1]))
+            args = (S, S_neighbours, c, eta, ramp, limits, EE_cost, EE_sum, EV_arr, H0_segment, t_horizon, start, last, threads, False, network)
+            kwargs = {'resolution': resolution, 'commit_length': commit_length, 'checkpoint_every': checkpoint_every,
+                      'checkpoint': None if checkpoint is None else os.path.join(checkpoint, str('segment_'+str(segment)))}
+            if telemetry is None:
+                futures.append(executor.submit(_solve_segment, *args, **kwargs))
+            else:
+                futures.append(executor.submit(_solve_segment_recorded, segment, telemetry.phase_times, *args, **kwargs))
+        segments = [future.result() for future in tqdm(futures, ascii=True, desc='solving rolling horizon segments:')]
+    if telemetry is not None:
+        for _, records in segments:
+            telemetry.extend(records)
+        segments = [V_segment for V_segment, _ in segments]
+
+    V = {V_key: np.concatenate([V_segment[V_key][first-start:] for V_segment, start, first in zip(segments, starts, bounds[:-1])])
+         for V_key in segments[0].keys()}                                               # stitch results, dropping the warm-up steps
+    H_gap = np.array([V['H'][first-1] - (V_segment['H'][first-start-1] if first > start else H_seed[start-1])
+                      for V_segment, start, first in zip(segments[1:], starts[1:], bounds[1:-1])]).reshape(-1, len(S))
+    return V, H_gap
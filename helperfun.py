@@ -1,17 +1,25 @@
+import os
 import pandas as pd
 import numpy as np
 from tqdm import tqdm
-import pickle
 
-import seaborn as sns
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib.style as style
-style.use('fivethirtyeight')
+import result_store
+import solve_cache
 
-# Enable high resolution plots
-from IPython.display import set_matplotlib_formats
-set_matplotlib_formats('retina')
+
+LIMITS_FILE = './data/internal_data/results/Basismodell/results.npz'      # result store of the last run of the basismodell, see get_limits
+
+
+def _setup_plotting():
+    """set the plot style; the plotting libraries are only imported when a plot is made, so the models also run without display."""
+    import matplotlib.style as style
+
+    style.use('fivethirtyeight')
+    try:
+        from IPython.display import set_matplotlib_formats
+        set_matplotlib_formats('retina')                    # enable high resolution plots
+    except ImportError:
+        pass                                                # not run in IPython
 
 def plot_dataframe(df, plot_title, x_name, y_name, legend_loc, legend_labels):
     """plot a dataframe using the given specifications
@@ -20,12 +28,36 @@ def plot_dataframe(df, plot_title, x_name, y_name, legend_loc, legend_labels):
         
     example: helperfun.plot_dataframe(timeseries_2030[['DE_load', 'DE_wind']], 'Titel', 'timesteps', 'load and wind', 'lower right', ['load','wind'])
     """
+    _setup_plotting()
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
     ax = sns.lineplot(data=df)
     ax.set(xlabel=x_name, ylabel=y_name)
     plt.title(plot_title)
     plt.legend(loc=legend_loc, labels=legend_labels)
     #plt.xticks(rotation=45)
-    plt.show(ax)
+    plt.show()
+    return None
+
+def plot_results(V_df, plot_variables, S):
+    """plot the results of a model run.
+
+    Arguments:
+        V_df -- dictionary of dataframes with the results, e.g. as returned by cli.run_basismodell
+        plot_variables -- list of the variables to plot
+        S -- list of countries
+
+    Returns:
+        None
+    """
+    for V_key in plot_variables:
+        if V_key in ['H','GtP','PtG','EI','EX']:
+            plot_dataframe(V_df[V_key][S], str(V_key+' values for each country' ), 'timesteps', str(V_key+' values' ), 'best', S)
+        elif V_key in ['HT','ET']:
+            plot_dataframe(V_df[V_key], str(V_key+' values for each pair of countries' ), 'timesteps', 'values', 'best', V_df[V_key].columns)
+        else:
+            print(str('Plotting the '+V_key+' variable has not been implemented yet.'))
     return None
 
 def make_EE_dict(settings, timeseries_2030):
@@ -82,20 +114,17 @@ def make_V_df_from_V_dict(settings, V):
     Side effects:
         None
     """
+    S = settings['countries']
     S_neighbours = settings['neighbours']
     V_df = dict()
     for V_key in settings['plot_variables']:
         if V_key in ['H','GtP','PtG','EI','EX']:
-            V_df[V_key] = pd.DataFrame(columns=['DE', 'FR', 'NL'], index=range(8760))
-            for (row, column), value in tqdm( V[V_key].items(), ascii=True, desc=str('building '+V_key+' dataframe from '+V_key+' dict' )):
-                V_df[V_key].loc[row, column] = value
-            V_df[V_key] = V_df[V_key].astype('float')
+            print(str('building '+V_key+' dataframe from '+V_key+' dict'))
+            V_df[V_key] = pd.Series(V[V_key]).unstack()[S].astype('float')                    # keys (t,s) become rows t and columns s
         elif V_key in ['HT','ET']:
-            V_df[V_key] = pd.DataFrame(columns=[str(x[0]+' --> '+x[1]) for x in S_neighbours], index=range(8760))
-            for (row, (s1,s2)), value in tqdm( V[V_key].items(), ascii=True, desc=str('building '+V_key+' dataframe from '+V_key+' dict' )):
-                if (s1,s2) in S_neighbours:
-                    V_df[V_key].loc[row, str(s1+' --> '+s2)] = value
-            V_df[V_key] = V_df[V_key].astype('float')
+            print(str('building '+V_key+' dataframe from '+V_key+' dict'))
+            index = pd.MultiIndex.from_tuples([(t, str(s1+' --> '+s2)) for (t,(s1,s2)) in V[V_key].keys()])
+            V_df[V_key] = pd.Series(list(V[V_key].values()), index=index).unstack()[[str(x[0]+' --> '+x[1]) for x in S_neighbours]].astype('float')
         elif V_key in ['HTL','ETL']:
             print(str('building '+V_key+' dataframe from '+V_key+' dictionary'))
             V_df[V_key] = dict()
@@ -110,6 +139,25 @@ def make_V_df_from_V_dict(settings, V):
             print(str('Building a dataframe for the '+V_key+' variable has not been implemented yet.'))
     return V_df
     
+def get_limits_path(settings):
+    """get the result store the limits of the basismodell are taken from.
+
+    If settings['limits_run'] is the input key of a basismodell solution in the solve cache (see
+    solve_cache.SolveCache), the limits are taken from that solution, so a run can be repeated with exactly the same
+    limits; otherwise from the last run of the basismodell, LIMITS_FILE.
+
+    Side effects:
+        raises FileNotFoundError if the solution settings['limits_run'] is not in the solve cache
+    """
+    if settings.get('limits_run') is not None:
+        directory = settings.get('solve_cache') or solve_cache.CACHE_DIR
+        path = solve_cache.cache_path(settings['limits_run'], directory)
+        if not os.path.exists(path):
+            raise FileNotFoundError(str('No basismodell solution '+settings['limits_run']+' in the solve cache '+directory+
+                                        ', it was not cached or has been evicted'))
+        return path
+    return LIMITS_FILE
+
 def get_limits(settings):
     """get limits for rolling horizon optimization.
 
@@ -124,12 +172,9 @@ def get_limits(settings):
         None
     """
     if settings['limits_source'] == 'basismodell':
-        limits = pickle.load( open( './data/internal_data/optimal_limits/limits.p', "rb" ) )
-        HTL = limits['HTL']
-        ETL = limits['ETL']
-        GtPL = {k: v[0] for k, v in limits['GtPL'].items()}
-        PtGL = {k: v[0] for k, v in limits['PtGL'].items()}
-        HL = {k: v[0] for k, v in limits['HL'].items()}
+        with result_store.ResultStore(get_limits_path(settings)) as results:
+            HTL, ETL, GtPL, PtGL, HL = [dict(zip(results.axes[results.dims[V_key][0]], results.read(V_key).tolist()))
+                                        for V_key in ['HTL','ETL','GtPL','PtGL','HL']]
     elif settings['limits_source'] == 'recherche':
         print("settings['limits_source'] == 'recherche' wurde noch nicht implementiert")
     else:
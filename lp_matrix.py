@@ -0,0 +1,776 @@
+import numpy as np
+import scipy.sparse as sp
+
+from model_inputs import COST_SOURCES, ModelInputs
+
+
+class LinearProgram:
+    """sparse linear program, assembled block by block from numpy index arrays.
+
+    Every variable family (e.g. H indexed by (time, region) or ETP indexed by (time, edge)) is added with a single
+    add_var call, every constraint family with a single add_constr call. Both return arrays of column or row
+    indices in the shape of their dimensions, so coefficients can be attached with numpy broadcasting via add_coef
+    instead of one python call per variable or constraint.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.axes = dict()          # dimension name -> list of labels, e.g. 'T' -> timesteps, 'S' -> countries, 'E' -> edges
+        self.dims = dict()          # variable family -> tuple of dimension names
+        self.var = dict()           # variable family -> array of column indices
+        self.con = dict()           # constraint family -> array of row indices
+        self.timed = set()          # constraint families whose first axis runs over the timesteps
+        self.num_vars = 0
+        self.num_constrs = 0
+        self.offset = 0.0           # constant of the objective, e.g. the costs of the given generation in the compact formulation
+        self.expressions = None     # LinearProgram of the families that are expressions of the variables instead of variables, see add_expression
+        self._lb = []
+        self._ub = []
+        self._obj = []
+        self._rows = []
+        self._cols = []
+        self._vals = []
+        self._sense = []
+        self._rhs = []
+
+    def set_axis(self, dim, labels):
+        self.axes[dim] = list(labels)
+
+    def shape(self, dims):
+        return tuple(len(self.axes[dim]) for dim in dims)
+
+    def add_var(self, name, dims, lb=0.0, ub=np.inf, obj=0.0):
+        """add a variable family with one variable per element of the given dimensions.
+
+        Arguments:
+            name -- name of the variable family
+            dims -- tuple of dimension names, e.g. ('T','S')
+            lb, ub, obj -- lower bound, upper bound and objective coefficient; scalars or arrays broadcastable to the shape of dims
+
+        Returns:
+            idx -- array of column indices with the shape of dims
+        """
+        shape = self.shape(dims)
+        size = int(np.prod(shape))
+        idx = np.arange(self.num_vars, self.num_vars + size).reshape(shape)
+        self._lb.append(np.broadcast_to(np.asarray(lb, dtype=float), shape).ravel())
+        self._ub.append(np.broadcast_to(np.asarray(ub, dtype=float), shape).ravel())
+        self._obj.append(np.broadcast_to(np.asarray(obj, dtype=float), shape).ravel())
+        self.num_vars += size
+        self.dims[name] = tuple(dims)
+        self.var[name] = idx
+        return idx
+
+    def set_bounds(self, name, lb=None, ub=None):
+        """replace the lower and/or upper bounds of the variable family name; scalars or arrays broadcastable to its shape."""
+        k = list(self.var).index(name)                                                      # families are stored in the order they were added
+        shape = self.var[name].shape
+        if lb is not None:
+            self._lb[k] = np.broadcast_to(np.asarray(lb, dtype=float), shape).ravel()
+        if ub is not None:
+            self._ub[k] = np.broadcast_to(np.asarray(ub, dtype=float), shape).ravel()
+
+    def fix(self, name, values):
+        """fix the variables of the family name to values by setting both bounds."""
+        self.set_bounds(name, values, values)
+
+    def add_constr(self, name, shape, sense, rhs=0.0, timed=False):
+        """add a constraint family; the coefficients are attached afterwards with add_coef.
+
+        Arguments:
+            name -- name of the constraint family
+            shape -- shape of the constraint family, e.g. (len(T)-1, len(S))
+            sense -- '<', '>' or '='
+            rhs -- right hand side; scalar or array broadcastable to shape
+            timed -- True if the first axis of shape runs over the timesteps (all of them or all but the first)
+
+        Returns:
+            rows -- array of row indices with the given shape
+        """
+        size = int(np.prod(shape))
+        rows = np.arange(self.num_constrs, self.num_constrs + size).reshape(shape)
+        self._sense.append(np.full(size, sense))
+        self._rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), shape).ravel())
+        self.num_constrs += size
+        self.con[name] = rows
+        if timed:
+            self.timed.add(name)
+        return rows
+
+    def add_expression(self, name, dims, const=0.0):
+        """add a family of linear expressions of the variables, e.g. the variable costs Cv in the compact formulation.
+
+        The expressions are not part of the LP. They are the rows of the separate LinearProgram self.expressions, which
+        shares the variable families, so their coefficients are attached with self.expressions.add_coef; their values
+        const + coefficients times the solution are calculated with evaluate.
+
+        Arguments:
+            name -- name of the family
+            dims -- tuple of dimension names, e.g. ('T','S')
+            const -- constant of the expressions; scalar or array broadcastable to the shape of dims
+
+        Returns:
+            rows -- array of row indices of self.expressions with the shape of dims
+        """
+        if self.expressions is None:
+            self.expressions = LinearProgram(self.name+'_expressions')
+            self.expressions.var = self.var
+        rows = self.expressions.add_constr(name, self.shape(dims), '=', const)
+        self.expressions.dims[name] = tuple(dims)
+        return rows
+
+    def _expression_matrix(self):
+        e = self.expressions
+        return sp.csr_matrix((np.concatenate(e._vals), (np.concatenate(e._rows), np.concatenate(e._cols))),
+                             shape=(e.num_constrs, self.num_vars))
+
+    def add_expression_constr(self, name, expression, index, sense, rhs=0.0):
+        """add the constraints expression[index] sense rhs on the expression family expression, see add_expression.
+
+        Returns:
+            rows -- array of row indices with the shape of expression[index]
+        """
+        expr_rows = np.atleast_1d(self.expressions.con[expression][index])
+        A = self._expression_matrix()[expr_rows.ravel()].tocoo()
+        rows = self.add_constr(name, expr_rows.shape, sense, np.asarray(rhs, dtype=float) - self.expressions.rhs[expr_rows])
+        self.add_coef(rows.ravel()[A.row], A.col, A.data)
+        return rows
+
+    def evaluate(self, x):
+        """get the values of the expression families (see add_expression) for the solution vector x.
+
+        Returns:
+            values -- dictionary with one array per expression family, with the shape of its dimensions
+        """
+        if self.expressions is None:
+            return dict()
+        y = self._expression_matrix() @ np.asarray(x) + self.expressions.rhs
+        return {name: y[rows] for name, rows in self.expressions.con.items()}
+
+    def add_coef(self, rows, cols, coef):
+        """add coefficients coef for the variables cols in the constraints rows (all three are broadcast against each other)."""
+        rows, cols, coef = np.broadcast_arrays(rows, cols, np.asarray(coef, dtype=float))
+        self._rows.append(rows.ravel())
+        self._cols.append(cols.ravel())
+        self._vals.append(coef.ravel())
+
+    @property
+    def A(self):
+        return sp.csr_matrix((np.concatenate(self._vals), (np.concatenate(self._rows), np.concatenate(self._cols))),
+                             shape=(self.num_constrs, self.num_vars))
+
+    @property
+    def lb(self):
+        return np.concatenate(self._lb)
+
+    @property
+    def ub(self):
+        return np.concatenate(self._ub)
+
+    @property
+    def obj(self):
+        return np.concatenate(self._obj)
+
+    @property
+    def sense(self):
+        return np.concatenate(self._sense)
+
+    @property
+    def rhs(self):
+        return np.concatenate(self._rhs)
+
+    def release(self):
+        """drop the coefficients, bounds, objective and right hand sides, e.g. once the LP is loaded into a solver.
+
+        The variable and constraint families (var, con, dims, axes) and the expressions are kept, so solution vectors
+        can still be split into families, but the matrix and vectors of the LP cannot be built any more.
+        """
+        for data in (self._lb, self._ub, self._obj, self._rows, self._cols, self._vals, self._sense, self._rhs):
+            data.clear()
+
+    def shift_permutation(self, k):
+        """get index arrays to shift a basis or solution of this LP k timesteps to the front.
+
+        Entries of time-indexed families take the value of the same entry k timesteps later, entries of the last k
+        timesteps and of all other families keep their own value. Used to warm start the next rolling horizon window.
+
+        Arguments:
+            k -- number of timesteps to shift
+
+        Returns:
+            var_perm -- array such that x[var_perm] is the shifted vector of variable values
+            con_perm -- array such that y[con_perm] is the shifted vector of constraint values
+        """
+        var_perm = np.arange(self.num_vars)
+        for name, dims in self.dims.items():
+            if dims[0] == 'T' and k < len(self.axes['T']):
+                idx = self.var[name]
+                var_perm[idx[:-k]] = idx[k:]
+        con_perm = np.arange(self.num_constrs)
+        for name in self.timed:
+            rows = self.con[name]
+            if k < len(rows):
+                con_perm[rows[:-k]] = rows[k:]
+        return var_perm, con_perm
+
+    def values(self, x, name):
+        """get the values of the variable family name as array with the shape of its dimensions out of the solution vector x."""
+        return np.asarray(x)[self.var[name]]
+
+
+### input arrays
+def make_input_arrays(T, S, EE, EV, c):
+    """make numpy arrays out of the model inputs.
+
+    Arguments:
+        T -- list or range of timesteps
+        S -- list of countries
+        EE -- dictionary with hourly electricity generation data for each country, or ModelInputs
+        EV -- dictionary with hourly electricity demand data for each country, or ModelInputs
+        c -- dictionary of costs
+
+    Returns:
+        EE_cost -- array of shape (T, S) with the operational costs of the given generation
+        EE_sum -- array of shape (T, S) with the total generation
+        EV_arr -- array of shape (T, S) with the demand
+    """
+    if isinstance(EE, ModelInputs):
+        inputs = EE.select(T)
+        return inputs.cost(c), inputs.generation('sum'), inputs.EV
+    EE_cost = np.array([[sum( EE[t,s][source]*c['EE_'+source] for source in COST_SOURCES ) for s in S] for t in T], dtype=float)
+    EE_sum = np.array([[EE[t,s]['sum'] for s in S] for t in T], dtype=float)
+    EV_arr = np.array([[EV[t,s] for s in S] for t in T], dtype=float)
+    return EE_cost, EE_sum, EV_arr
+
+
+def make_durations(t_horizon, resolution):
+    """get the hours each timestep of a window with variable resolution lasts.
+
+    Arguments:
+        t_horizon -- length of the window in hours
+        resolution -- list of pairs (block_length, until): timesteps of block_length hours up to hour until of the window,
+                      None for the end of the window; e.g. [(1, 24), (6, 96), (24, None)] gives 24 hourly timesteps, 12 timesteps
+                      of 6 hours and timesteps of 24 hours for the rest; a timestep that would pass until is shortened
+
+    Returns:
+        durations -- integer array with the hours of each timestep, summing to t_horizon
+    """
+    durations = []
+    start = 0
+    for block_length, until in resolution:
+        until = t_horizon if until is None else min(until, t_horizon)
+        while start < until:
+            durations.append(min(block_length, until - start))
+            start += durations[-1]
+    if start < t_horizon:
+        raise ValueError(str('The resolution ends at hour '+str(start)+' before the end of the window at hour '+str(t_horizon)))
+    return np.array(durations, dtype=int)
+
+def aggregate_window(arr, durations):
+    """get the hourly averages of the hourly array arr of shape (sum(durations), ...) over timesteps lasting durations hours."""
+    starts = np.concatenate(([0], np.cumsum(durations)[:-1]))
+    return np.add.reduceat(arr, starts, axis=0)/np.reshape(durations, (-1,) + (1,)*(np.ndim(arr)-1))
+
+
+### model formulation
+def make_pairs(S, S_neighbours):
+    """make the ordered pairs of countries used to index the transport variables.
+
+    Returns:
+        pairs -- list of all ordered pairs (s, s2) with s != s2
+        p_from -- array with the index in S of the country each pair starts in
+        p_rev -- array with the index of the reversed pair of each pair
+        p_closed -- boolean array, True for pairs of countries that are not neighbours
+    """
+    pairs = [(s,s2) for s in S for s2 in S if s2 != s]
+    p_from = np.array([S.index(s) for (s,_) in pairs], dtype=int)
+    p_rev = np.array([pairs.index((s2,s)) for (s,s2) in pairs], dtype=int)
+    p_closed = np.array([(s,s2) not in S_neighbours and (s2,s) not in S_neighbours for (s,s2) in pairs], dtype=bool)
+    return pairs, p_from, p_rev, p_closed
+
+def make_links(S, S_neighbours, network='pairs'):
+    """make the transport links used to index the transport variables.
+
+    Arguments:
+        S -- list of countries
+        S_neighbours -- list of neighbouring countries
+        network -- 'pairs' for all ordered pairs of countries, with transport between non-neighbours fixed to zero, or
+                   'edges' for one link per entry of S_neighbours, so the model grows linearly with the number of links
+
+    Returns:
+        links -- list of links (s, s2)
+        l_from -- array with the index in S of the country each link starts in
+        l_to -- array with the index in S of the country each link ends in
+        l_closed -- boolean array, True for links between countries that are not neighbours
+    """
+    if network == 'pairs':
+        links, l_from, _, l_closed = make_pairs(S, S_neighbours)
+    elif network == 'edges':
+        links = [tuple(link) for link in S_neighbours]
+        l_from = np.array([S.index(s) for (s,_) in links], dtype=int)
+        l_closed = np.zeros(len(links), dtype=bool)
+    else:
+        raise ValueError(str('Unknown network '+str(network)+", options: 'pairs', 'edges'"))
+    l_to = np.array([S.index(s2) for (_,s2) in links], dtype=int)
+    return links, l_from, l_to, l_closed
+
+def _add_flow(lp, rows, name, coef, network, l_from, l_to, t=slice(None)):
+    """add coef times the transport of family name ('ET' or 'HT') leaving each country to rows of shape (T, S).
+
+    With network 'pairs' the transport from s to s2 is P - N of the pair (s, s2); with network 'edges' it is the
+    transport of the link, which enters its end country with the opposite sign. t selects the timesteps of the
+    transport if rows only cover some of them.
+    """
+    if network == 'pairs':
+        lp.add_coef(rows[:,l_from], lp.var[name+'P'][t], coef)
+        lp.add_coef(rows[:,l_from], lp.var[name+'N'][t], -coef)
+    else:
+        lp.add_coef(rows[:,l_from], lp.var[name][t], coef)
+        lp.add_coef(rows[:,l_to], lp.var[name][t], -coef)
+
+def _add_dH(lp, rows, t, coef, eta, network, l_from, l_to):
+    """add coef times the change of stored hydrogen dH in the timesteps t to rows of shape (len(t), S).
+
+    In the compact formulation there is no dH variable, and the change is the hydrogen balance (5) itself:
+    dH = PtG - GtP/eta_fuelcell + HI - HX - hydrogen transport leaving each country.
+    """
+    t = np.atleast_1d(t)
+    rows = np.asarray(rows).reshape(len(t), -1)
+    if 'dH' in lp.var:
+        lp.add_coef(rows, lp.var['dH'][t], coef)
+        return
+    for name, sign in [('PtG', 1.0), ('GtP', -1/eta['fuelcell']), ('HI', 1.0), ('HX', -1.0)]:
+        lp.add_coef(rows, lp.var[name][t], np.multiply(coef, sign))
+    _add_flow(lp, rows, 'HT', np.multiply(coef, -1.0), network, l_from, l_to, t)
+
+def _add_operation(lp, EE_cost, EE_sum, EV_arr, c, eta, network, l_from, l_to, H_lb=0.0, H_ub=np.inf, GtP_ub=np.inf, PtG_ub=np.inf, ET_ub=np.inf, HT_ub=np.inf,
+                   Cv_obj=1.0, t_links=None, durations=None, compact=False):
+    """add the operational variables and the constraints shared by basismodell and dispatch model to lp.
+
+    These are the variable costs (2), the energy balances (4), (5), (7) and, for network 'pairs', the transport
+    symmetry (10), (14); for network 'edges' one transport variable per link and direction of flow replaces them.
+    Cv_obj weights the variable costs of each timestep in the objective and t_links are the positions of the
+    timesteps that follow on the previous timestep (default all but the first); both differ from the defaults
+    only for representative periods, see build_basismodell_lp_aggregated. durations are the hours each timestep
+    lasts (default one hour each): the variables of a longer timestep are its hourly averages, so the storage
+    changes by durations times dH over the timestep, see build_dispatch_lp.
+
+    With compact, the definitional variables Cv and dH and their rows (2), (5) are left out: the variable costs are
+    objective coefficients of the variables they depend on, with the costs of the given generation as constant
+    lp.offset, and the hydrogen balance (5) is substituted into (7), see _add_dH. The optimal objective is the same;
+    Cv and dH are expressions (see LinearProgram.add_expression), calculated after the solve.
+    """
+    nT, nS, nE = lp.shape(('T','S','E'))
+    if t_links is None:
+        t_links = np.arange(1, nT)
+    if durations is None:
+        durations = np.ones(nT)
+
+    costs = [('EI',c['EE_import']), ('EX',-c['EE_export']), ('HI',c['H_import']), ('HX',-c['H_export']), ('GtP',c['GtP']), ('PtG',c['PtG']), ('H',c['H'])]
+    obj = dict()
+    if compact:                                                                             # (2) in the objective
+        W = np.broadcast_to(np.asarray(Cv_obj, dtype=float), (nT,nS))                      # weight of the variable costs of each timestep and country
+        lp.offset += float((W*EE_cost).sum())                                               # costs of the given generation
+        obj = {name: W*cost for name, cost in costs}
+        for name in ['ET','HT']:                                                            # half of the transport costs are paid by the country the transport leaves
+            if network == 'pairs':
+                obj[name+'P'] = 0.5*c[name]*W[:,l_from]
+                obj[name+'N'] = -0.5*c[name]*W[:,l_from]
+            else:
+                obj[name] = 0.5*c[name]*(W[:,l_from] - W[:,l_to])
+
+    ### initialize variables
+    if not compact:
+        Cv = lp.add_var('Cv', ('T','S'), lb=-10**9, obj=Cv_obj)    # variable cost in timestep t and location s; part of (1)
+    H = lp.add_var('H', ('T','S'), lb=H_lb, ub=H_ub, obj=obj.get('H', 0.0))     # stored hydrogen
+    if not compact:
+        dH = lp.add_var('dH', ('T','S'), lb=-10**9)                 # change of stored hydrogen
+    GtP = lp.add_var('GtP', ('T','S'), ub=GtP_ub, obj=obj.get('GtP', 0.0))      # gas to power
+    PtG = lp.add_var('PtG', ('T','S'), ub=PtG_ub, obj=obj.get('PtG', 0.0))      # power to gas
+    EI = lp.add_var('EI', ('T','S'), obj=obj.get('EI', 0.0))                    # electricity imports
+    EX = lp.add_var('EX', ('T','S'), obj=obj.get('EX', 0.0))                    # electricity exports
+    HI = lp.add_var('HI', ('T','S'), obj=obj.get('HI', 0.0))                    # hydrogen imports
+    HX = lp.add_var('HX', ('T','S'), obj=obj.get('HX', 0.0))                    # hydrogen exports
+    if network == 'pairs':
+        ETP = lp.add_var('ETP', ('T','E'), ub=ET_ub, obj=obj.get('ETP', 0.0))   # positive electricity transport
+        HTP = lp.add_var('HTP', ('T','E'), ub=HT_ub, obj=obj.get('HTP', 0.0))   # positive hydrogen transport
+        ETN = lp.add_var('ETN', ('T','E'), ub=ET_ub, obj=obj.get('ETN', 0.0))   # negative electricity transport
+        HTN = lp.add_var('HTN', ('T','E'), ub=HT_ub, obj=obj.get('HTN', 0.0))   # negative hydrogen transport
+    else:
+        lp.add_var('ET', ('T','E'), lb=-np.asarray(ET_ub), ub=ET_ub, obj=obj.get('ET', 0.0))    # electricity transport from s to s2, negative from s2 to s
+        lp.add_var('HT', ('T','E'), lb=-np.asarray(HT_ub), ub=HT_ub, obj=obj.get('HT', 0.0))    # hydrogen transport from s to s2, negative from s2 to s
+
+    ### add constraints; equation comments refer to LP-formulation in paper
+    if not compact:
+        rows = lp.add_constr('Cv', (nT,nS), '=', EE_cost, timed=True)                       # (2) - variable costs calculation
+        lp.add_coef(rows, Cv, 1.0)
+        for name, cost in costs:
+            lp.add_coef(rows, lp.var[name], -cost)
+        for name in ['ET','HT']:
+            _add_flow(lp, rows, name, -0.5*c[name], network, l_from, l_to)
+    else:                                                                                   # Cv and dH are calculated after the solve
+        rows = lp.add_expression('Cv', ('T','S'), EE_cost)                                  # (2) - variable costs calculation
+        for name, cost in costs:
+            lp.expressions.add_coef(rows, lp.var[name], cost)
+        for name in ['ET','HT']:
+            _add_flow(lp.expressions, rows, name, 0.5*c[name], network, l_from, l_to)
+        rows = lp.add_expression('dH', ('T','S'))                                           # (5) - hydrogen energy balance for each t and s
+        _add_dH(lp.expressions, rows, np.arange(nT), 1.0, eta, network, l_from, l_to)
+
+    rows = lp.add_constr('balance_E', (nT,nS), '=', EV_arr - EE_sum, timed=True)           # (4) - electricity energy balance for each t and s
+    lp.add_coef(rows, GtP, 1.0)
+    lp.add_coef(rows, PtG, -1/eta['electrolysis'])
+    lp.add_coef(rows, EI, 1.0)
+    lp.add_coef(rows, EX, -1.0)
+    _add_flow(lp, rows, 'ET', -1.0, network, l_from, l_to)
+
+    if not compact:
+        rows = lp.add_constr('balance_H', (nT,nS), '=', timed=True)                         # (5) - hydrogen energy balance for each t and s
+        lp.add_coef(rows, dH, 1.0)
+        lp.add_coef(rows, PtG, -1.0)
+        lp.add_coef(rows, GtP, 1/eta['fuelcell'])
+        lp.add_coef(rows, HI, -1.0)
+        lp.add_coef(rows, HX, 1.0)
+        _add_flow(lp, rows, 'HT', 1.0, network, l_from, l_to)
+
+    rows = lp.add_constr('storage', (len(t_links),nS), '=', timed=True)                      # (7) - hydrogen energy balance accross timesteps
+    lp.add_coef(rows, H[t_links], 1.0)
+    lp.add_coef(rows, H[t_links-1], -1.0)
+    _add_dH(lp, rows, t_links, -durations[t_links,None], eta, network, l_from, l_to)
+
+    if network == 'pairs':
+        links = lp.axes['E']
+        p_rev = np.array([links.index((s2,s)) for (s,s2) in links], dtype=int)
+        for P, N, name in [(ETP, ETN, 'ET'), (HTP, HTN, 'HT')]:
+            rows = lp.add_constr(name+'_symmetry', (nT,nE), '=', timed=True)                # (10), (14) - positive transport in one direction means negative transport in the other direction
+            lp.add_coef(rows, P, 1.0)
+            lp.add_coef(rows, N, -1.0)
+            lp.add_coef(rows, N[:,p_rev], -1.0)
+            lp.add_coef(rows, P[:,p_rev], 1.0)
+
+def _add_investment(lp, c, ramp, network, l_from, l_to, l_closed, t_links, investment_costs=True):
+    """add the investment variables and the constraints of the basismodell that use them to lp, except the storage limit (20).
+
+    These are the investment costs (3), the ramps (16)-(19) between the timesteps t_links and their predecessors, the
+    power limits (21), (22) and the transport limits (8), (9), (11)-(13), (15). For network 'edges' a link carries
+    the transport in both directions, so both of its countries pay for its capacity, like for the two pairs (s, s2)
+    and (s2, s) of network 'pairs'. Without investment_costs, Cf and (3) are left out, e.g. for the time blocks of
+    decomposition.solve_basismodell_benders, whose limits are fixed by the master problem.
+    """
+    nT, nS, nE = lp.shape(('T','S','E'))
+    GtP, PtG = lp.var['GtP'], lp.var['PtG']
+
+    ### initialize investment variables
+    if investment_costs:
+        Cf = lp.add_var('Cf', ('S',), lb=-10**9, obj=1.0)          # investment cost in location s; part of (1)
+    HL = lp.add_var('HL', ('S',))                                   # hydrogen storage limit
+    GtPL = lp.add_var('GtPL', ('S',))                               # fuel cell power limit
+    PtGL = lp.add_var('PtGL', ('S',))                               # electrolysis power limit
+    ETL = lp.add_var('ETL', ('E',))                                 # electricity transport limit
+    HTL = lp.add_var('HTL', ('E',))                                 # hydrogen transport limit
+
+    ### add constraints
+    for name, var, limit, r in [('GtP_ramp', GtP, GtPL, ramp['fuelcell']), ('PtG_ramp', PtG, PtGL, ramp['electrolysis'])]:
+        rows = lp.add_constr(name+'_up', (len(t_links),nS), '<', timed=True)                # (16), (18) - ramping up
+        lp.add_coef(rows, var[t_links], 1.0)
+        lp.add_coef(rows, var[t_links-1], -1.0)
+        lp.add_coef(rows, limit, -r)
+        rows = lp.add_constr(name+'_down', (len(t_links),nS), '>', timed=True)              # (17), (19) - ramping down
+        lp.add_coef(rows, var[t_links], 1.0)
+        lp.add_coef(rows, var[t_links-1], -1.0)
+        lp.add_coef(rows, limit, r)
+
+    for name, var, limit in [('GtPL', GtP, GtPL), ('PtGL', PtG, PtGL)]:                    # (21), (22) - power limits
+        rows = lp.add_constr(name, (nT,nS), '<', timed=True)
+        lp.add_coef(rows, var, 1.0)
+        lp.add_coef(rows, limit, -1.0)
+
+    for L, name in [(ETL, 'ET'), (HTL, 'HT')]:
+        if network == 'pairs':
+            directions = [('P', lp.var[name+'P'], 1.0), ('N', lp.var[name+'N'], 1.0)]
+        else:
+            directions = [('P', lp.var[name], 1.0), ('N', lp.var[name], -1.0)]
+        for suffix, var, sign in directions:                                                # (8), (9), (12), (13) - transport below capacity limit
+            rows = lp.add_constr(name+suffix+'L', (nT,nE), '<', timed=True)
+            lp.add_coef(rows, var, sign)
+            lp.add_coef(rows, L, -1.0)
+        if l_closed.any():
+            lp.add_coef(lp.add_constr(name+'L_closed', (int(l_closed.sum()),), '='), L[l_closed], 1.0)    # (11), (15) - no transport between non-neighbours
+
+    if not investment_costs:
+        return
+    rows = lp.add_constr('Cf', (nS,), '=')                                                  # (3) - investment costs calculation
+    lp.add_coef(rows, Cf, 1.0)
+    lp.add_coef(rows, HL, -c['HL'])
+    lp.add_coef(rows, GtPL, -c['GtPL'])
+    lp.add_coef(rows, PtGL, -c['PtGL'])
+    for L, name in [(ETL, 'ETL'), (HTL, 'HTL')]:
+        lp.add_coef(rows[l_from], L, -c[name])
+        if network == 'edges':
+            lp.add_coef(rows[l_to], L, -c[name])
+
+def build_basismodell_lp(T, S, S_neighbours, EE, EV, c, eta, ramp, network='pairs', compact=False):
+    """build the LP of the basismodell, equations (1)-(22), as sparse matrix.
+
+    Same formulation as grb_model.solve_basismodell, but every variable and constraint family is created as a whole
+    block indexed by (time, region) or (time, edge).
+
+    Arguments:
+        T -- range of timesteps
+        S -- list of countries
+        S_neighbours -- list of neighbouring countries
+        EE, EV -- dictionaries with hourly electricity generation and demand data for each country, or ModelInputs
+        c, eta, ramp -- dictionaries of costs, efficiencies and ramps
+        network -- 'pairs' or 'edges', see make_links
+        compact -- if True, without the variables Cv and dH, see _add_operation
+
+    Returns:
+        lp -- LinearProgram
+    """
+    EE_cost, EE_sum, EV_arr = make_input_arrays(T, S, EE, EV, c)
+    links, l_from, l_to, l_closed = make_links(S, S_neighbours, network)
+    nT, nS = len(T), len(S)
+
+    lp = LinearProgram("optimal sizing and operation of energy system")
+    lp.set_axis('T', T)
+    lp.set_axis('S', S)
+    lp.set_axis('E', links)
+
+    _add_operation(lp, EE_cost, EE_sum, EV_arr, c, eta, network, l_from, l_to, compact=compact)
+    _add_investment(lp, c, ramp, network, l_from, l_to, l_closed, np.arange(1, nT))
+    if compact:                                                                             # the hydrogen balance of the first timestep is not linked to the storage (6),
+        for name in ['Cv','dH']:                                                            # so it is bounded only by the lower bounds of Cv and dH
+            lp.add_expression_constr(name+'_lb', name, 0, '>', -10**9)
+    H, GtP, HL = lp.var['H'], lp.var['GtP'], lp.var['HL']
+
+    ### add storage constraints
+    lp.add_coef(lp.add_constr('H_start', (nS,), '='), H[0], 1.0)                            # (6) - no hydrogen storage at first timestep
+    lp.add_coef(lp.add_constr('GtP_start', (nS,), '='), GtP[0], 1.0)
+    lp.add_coef(lp.add_constr('H_end', (nS,), '='), H[-1], 1.0)                             # all hydrogen should be spent in the end
+
+    rows = lp.add_constr('HL', (nT,nS), '<', timed=True)                                    # (20) - storage limit
+    lp.add_coef(rows, H, 1.0)
+    lp.add_coef(rows, HL, -1.0)
+
+    return lp
+
+def build_block_lp(T, S, S_neighbours, EE, EV, c, eta, ramp, limits, previous=None, following=None, network='pairs'):
+    """build the LP of the operation of the basismodell in a block of consecutive timesteps with fixed limits, as sparse matrix.
+
+    The block is a part of the timeline of build_basismodell_lp with the investment limits fixed to the given values
+    and without investment costs. Its coupling to the neighbouring blocks is fixed, too: the stored hydrogen and the
+    power of fuel cells and electrolysis in the timestep before the block (previous) enter the storage balance (7) and
+    the ramps (16)-(19) of its first timestep, and its last timestep has to reach the values given by following.
+    The limits and coupling values are variables fixed by their bounds, so their reduced costs are the derivatives
+    of the operational costs of the block, see decomposition.solve_basismodell_benders.
+
+    Arguments:
+        T -- range of timesteps of the block
+        S, S_neighbours, EE, EV, c, eta, ramp, network -- see build_basismodell_lp
+        limits -- dictionary with arrays of the limits 'HL','GtPL','PtGL' per country and 'ETL','HTL' per link
+        previous -- dictionary with arrays 'H' and, for the ramps, 'GtP','PtG' per country in the timestep before the
+                    block; None for the first block, which starts without stored hydrogen and fuel cell power like (6)
+        following -- dictionary with arrays of the same keys as previous per country in the last timestep of the block;
+                     None for the last block, which ends without stored hydrogen
+
+    Returns:
+        lp -- LinearProgram with the fixed variables 'HL','GtPL','PtGL','ETL','HTL' and '<name>_previous' and
+              '<name>_following' for the keys of previous and following
+    """
+    EE_cost, EE_sum, EV_arr = make_input_arrays(T, S, EE, EV, c)
+    links, l_from, l_to, l_closed = make_links(S, S_neighbours, network)
+    nT, nS = len(T), len(S)
+
+    lp = LinearProgram("operation of energy system in a block of timesteps")
+    lp.set_axis('T', T)
+    lp.set_axis('S', S)
+    lp.set_axis('E', links)
+
+    _add_operation(lp, EE_cost, EE_sum, EV_arr, c, eta, network, l_from, l_to)
+    _add_investment(lp, c, ramp, network, l_from, l_to, l_closed, np.arange(1, nT), investment_costs=False)
+    for name in ['HL','GtPL','PtGL','ETL','HTL']:
+        lp.fix(name, limits[name])
+    H, GtP, PtG, HL = lp.var['H'], lp.var['GtP'], lp.var['PtG'], lp.var['HL']
+
+    ### add coupling to the previous block
+    if previous is None:
+        lp.add_coef(lp.add_constr('H_start', (nS,), '='), H[0], 1.0)                        # (6) - no hydrogen storage at first timestep
+        lp.add_coef(lp.add_constr('GtP_start', (nS,), '='), GtP[0], 1.0)
+    else:
+        for name in previous:
+            lp.add_var(name+'_previous', ('S',))
+            lp.fix(name+'_previous', previous[name])
+        rows = lp.add_constr('storage_previous', (nS,), '=')                                 # (7) - hydrogen energy balance accross the start of the block
+        lp.add_coef(rows, H[0], 1.0)
+        lp.add_coef(rows, lp.var['H_previous'], -1.0)
+        _add_dH(lp, rows, 0, -1.0, eta, network, l_from, l_to)
+        for name, var, limit, r in [('GtP_ramp', GtP, lp.var['GtPL'], ramp['fuelcell']), ('PtG_ramp', PtG, lp.var['PtGL'], ramp['electrolysis'])]:
+            if name[:3] not in previous:
+                continue
+            previous_var = lp.var[name[:3]+'_previous']
+            rows = lp.add_constr(name+'_up_previous', (nS,), '<')                           # (16), (18) - ramping up from the previous block
+            lp.add_coef(rows, var[0], 1.0)
+            lp.add_coef(rows, previous_var, -1.0)
+            lp.add_coef(rows, limit, -r)
+            rows = lp.add_constr(name+'_down_previous', (nS,), '>')                         # (17), (19) - ramping down from the previous block
+            lp.add_coef(rows, var[0], 1.0)
+            lp.add_coef(rows, previous_var, -1.0)
+            lp.add_coef(rows, limit, r)
+
+    ### add coupling to the following block
+    if following is None:
+        lp.add_coef(lp.add_constr('H_end', (nS,), '='), H[-1], 1.0)                         # all hydrogen should be spent in the end
+    else:
+        for name in following:
+            following_var = lp.add_var(name+'_following', ('S',))
+            lp.fix(name+'_following', following[name])
+            rows = lp.add_constr(name+'_following', (nS,), '=')
+            lp.add_coef(rows, lp.var[name][-1], 1.0)
+            lp.add_coef(rows, following_var, -1.0)
+
+    rows = lp.add_constr('HL', (nT,nS), '<', timed=True)                                    # (20) - storage limit
+    lp.add_coef(rows, H, 1.0)
+    lp.add_coef(rows, HL, -1.0)
+
+    return lp
+
+def build_basismodell_lp_aggregated(aggregation, S, S_neighbours, c, eta, ramp, network='pairs', compact=False):
+    """build the LP of the basismodell on representative periods as sparse matrix.
+
+    The operation is optimized only for the timesteps of the representative periods; their variable costs are weighted
+    with the number of times they occur in the full timeline. Ramps (16)-(19) only link timesteps within a period.
+    The seasonal storage is kept with inter-period storage state linking: H holds the storage level relative to the
+    start of its representative period, SOC the absolute storage level at the start of every period of the full
+    timeline, and SOC of consecutive periods differ by the change of storage over the representative period.
+    The storage limit (20) is met with the lowest (Hmin) and highest (Hmax) relative level of each representative period,
+    so the absolute level SOC + H stays within 0 and HL in every timestep of the full timeline.
+
+    Arguments:
+        aggregation -- aggregation.Aggregation with the representative periods
+        S -- list of countries
+        S_neighbours -- list of neighbouring countries
+        c, eta, ramp -- dictionaries of costs, efficiencies and ramps
+        network -- 'pairs' or 'edges', see make_links
+        compact -- if True, without the variables Cv and dH, see _add_operation
+
+    Returns:
+        lp -- LinearProgram
+    """
+    inputs = aggregation.inputs
+    L = aggregation.period_length
+    EE_cost, EE_sum, EV_arr = make_input_arrays(inputs.T, S, inputs, inputs, c)
+    links, l_from, l_to, l_closed = make_links(S, S_neighbours, network)
+    nT, nS = len(inputs.T), len(S)
+    nP, nK = aggregation.num_periods, aggregation.num_representatives
+    t_all = np.arange(nT)
+    t_starts = t_all[t_all % L == 0]                                                        # first timestep of each representative period
+    t_ends = aggregation.order*L + aggregation.lengths - 1                                  # last timestep of each period of the full timeline
+
+    lp = LinearProgram("optimal sizing and operation of energy system with representative periods")
+    lp.set_axis('T', inputs.T)
+    lp.set_axis('S', S)
+    lp.set_axis('E', links)
+    lp.set_axis('K', range(nK))
+    lp.set_axis('P', range(nP+1))
+
+    _add_operation(lp, EE_cost, EE_sum, EV_arr, c, eta, network, l_from, l_to, H_lb=-10**9,
+                   Cv_obj=aggregation.weights.reshape(nT, 1), t_links=t_all[t_all % L != 0], compact=compact)
+    _add_investment(lp, c, ramp, network, l_from, l_to, l_closed, t_all[t_all % L != 0])
+    H, HL = lp.var['H'], lp.var['HL']
+
+    ### initialize storage state variables
+    SOC_obj = np.append(c['H']*aggregation.lengths, 0.0)[:,None]                            # storage costs of the absolute levels; the relative levels are part of Cv
+    SOC = lp.add_var('SOC', ('P','S'), obj=SOC_obj)                                         # stored hydrogen at the start of each period
+    Hmin = lp.add_var('Hmin', ('K','S'), lb=-10**9)                                         # lowest storage level relative to the start of the representative period
+    Hmax = lp.add_var('Hmax', ('K','S'), lb=-10**9)                                         # highest storage level relative to the start of the representative period
+
+    ### add storage constraints
+    rows = lp.add_constr('H_period_start', (nK,nS), '=')                                    # (6) - storage level relative to the start of the representative period
+    lp.add_coef(rows, H[t_starts], 1.0)
+    _add_dH(lp, rows, t_starts, -1.0, eta, network, l_from, l_to)
+
+    rows = lp.add_constr('SOC_link', (nP,nS), '=')                                          # (7) - hydrogen energy balance accross periods
+    lp.add_coef(rows, SOC[1:], 1.0)
+    lp.add_coef(rows, SOC[:-1], -1.0)
+    lp.add_coef(rows, H[t_ends], -1.0)
+
+    lp.add_coef(lp.add_constr('H_start', (nS,), '='), SOC[0], 1.0)                          # no hydrogen storage at the start
+    lp.add_coef(lp.add_constr('H_end', (nS,), '='), SOC[-1], 1.0)                           # all hydrogen should be spent in the end
+
+    k_of_t = t_all // L
+    rows = lp.add_constr('Hmin', (nT,nS), '>')
+    lp.add_coef(rows, H, 1.0)
+    lp.add_coef(rows, Hmin[k_of_t], -1.0)
+    rows = lp.add_constr('Hmax', (nT,nS), '<')
+    lp.add_coef(rows, H, 1.0)
+    lp.add_coef(rows, Hmax[k_of_t], -1.0)
+
+    rows = lp.add_constr('SOC_lb', (nP,nS), '>')                                            # absolute storage level not negative
+    lp.add_coef(rows, SOC[:-1], 1.0)
+    lp.add_coef(rows, Hmin[aggregation.order], 1.0)
+    rows = lp.add_constr('HL', (nP,nS), '<')                                                # (20) - storage limit
+    lp.add_coef(rows, SOC[:-1], 1.0)
+    lp.add_coef(rows, Hmax[aggregation.order], 1.0)
+    lp.add_coef(rows, HL, -1.0)
+
+    return lp
+
+def build_dispatch_lp(T, S, S_neighbours, EE_cost, EE_sum, EV_arr, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step, network='pairs',
+                      durations=None, compact=False):
+    """build the LP of the dispatch model with given limits as sparse matrix.
+
+    Same formulation as grb_model.solve_dispatch; the limits (20)-(22), (8), (9), (12), (13) are given as variable bounds.
+    With durations, a timestep can last several hours: its variables and inputs are hourly averages, its variable costs
+    are weighted with its duration in the objective, the storage changes by duration times dH, and the ramps (16)-(19)
+    between two timesteps allow the change of the hourly averages of ramping at full speed from the middle of one
+    timestep to the middle of the next.
+
+    Arguments:
+        T -- list of timesteps
+        S -- list of countries
+        S_neighbours -- list of neighbouring countries
+        EE_cost, EE_sum, EV_arr -- arrays of shape (T, S) as returned by make_input_arrays, or by aggregate_window for durations
+        c, eta, ramp -- dictionaries of costs, efficiencies and ramps
+        HTL, ETL, GtPL, PtGL, HL -- dictionaries with transport, power and storage limits; transport limits of links
+                                    that are missing in HTL and ETL are taken from the reversed link, else zero
+        H0 -- dictionary with stored hydrogen before the first timestep
+        last_step -- if True, all hydrogen has to be spent in the last timestep
+        network -- 'pairs' or 'edges', see make_links
+        durations -- array with the hours each timestep lasts, see make_durations; default one hour each
+        compact -- if True, without the variables Cv and dH, see _add_operation
+
+    Returns:
+        lp -- LinearProgram
+    """
+    links, l_from, l_to, _ = make_links(S, S_neighbours, network)
+    nT, nS = len(T), len(S)
+    durations = np.ones(nT) if durations is None else np.asarray(durations, dtype=float)
+    HL_arr, GtPL_arr, PtGL_arr = (np.array([limit[s] for s in S], dtype=float) for limit in (HL, GtPL, PtGL))
+    ETL_arr, HTL_arr = (np.array([limit.get((s,s2), limit.get((s2,s), 0.0)) for (s,s2) in links], dtype=float) for limit in (ETL, HTL))  # limits of the basismodell with either network
+
+    lp = LinearProgram("optimal operation of energy system")
+    lp.set_axis('T', T)
+    lp.set_axis('S', S)
+    lp.set_axis('E', links)
+
+    _add_operation(lp, EE_cost, EE_sum, EV_arr, c, eta, network, l_from, l_to,
+                   H_ub=HL_arr, GtP_ub=GtPL_arr, PtG_ub=PtGL_arr, ET_ub=ETL_arr, HT_ub=HTL_arr,            # (20)-(22), (8), (9), (12), (13) as bounds
+                   Cv_obj=durations[:,None], durations=durations, compact=compact)
+    H, GtP, PtG = lp.var['H'], lp.var['GtP'], lp.var['PtG']
+
+    rows = lp.add_constr('H_start', (nS,), '=', [H0[s] for s in S])                        # (6) - hydrogen energy balance accross timesteps
+    lp.add_coef(rows, H[0], 1.0)
+    _add_dH(lp, rows, 0, -durations[0], eta, network, l_from, l_to)
+
+    steps = (durations[1:] + durations[:-1])[:,None]/2                                     # hours between the middles of consecutive timesteps
+    for name, var, limit, r in [('GtP_ramp', GtP, GtPL_arr, ramp['fuelcell']), ('PtG_ramp', PtG, PtGL_arr, ramp['electrolysis'])]:
+        rows = lp.add_constr(name+'_up', (nT-1,nS), '<', limit*r*steps, timed=True)         # (16), (18) - ramping up
+        lp.add_coef(rows, var[1:], 1.0)
+        lp.add_coef(rows, var[:-1], -1.0)
+        rows = lp.add_constr(name+'_down', (nT-1,nS), '>', -limit*r*steps, timed=True)      # (17), (19) - ramping down
+        lp.add_coef(rows, var[1:], 1.0)
+        lp.add_coef(rows, var[:-1], -1.0)
+
+    if last_step == True:
+        lp.add_coef(lp.add_constr('H_end', (nS,), '='), H[-1], 1.0)                         # all hydrogen should be spent in the end
+
+    return lp
@@ -0,0 +1,294 @@
+import time
+import numpy as np
+
+import lp_matrix
+import solve_cache
+from solution import make_solution
+
+
+SOLVERS = ['gurobi', 'highs']       # solvers a lp_matrix.LinearProgram can be handed to
+THREADS_OPTION = {'gurobi': 'Threads', 'highs': 'threads'}      # solver option limiting the threads of a solve
+
+
+### solver backends
+def load_gurobi(model, lp):
+    """add the variables, constraints and objective of lp to an empty gurobi model.
+
+    The constant lp.offset is the objective constant ObjCon, so model.ObjVal is the objective value of lp.
+
+    Returns:
+        x -- gurobi MVar with all variables
+        constrs -- gurobi MConstr with all constraints
+    """
+    import gurobipy as gp
+
+    x = model.addMVar(lp.num_vars, lb=lp.lb, ub=lp.ub, obj=lp.obj, vtype="C")
+    constrs = model.addMConstr(lp.A, x, lp.sense, lp.rhs)
+    model.ObjCon = lp.offset
+    model.ModelSense = gp.GRB.MINIMIZE                                                  # (1) - objective function
+    return x, constrs
+
+def _solve_gurobi(lp, reduced_costs, duals, print_result, options, lean=False, telemetry=None, label='lp', build_time=0.0):
+    """solve lp with gurobi; gurobipy is only imported here, so the other backends work without it.
+
+    With lean, the model gets its own gurobi environment, lp is released once it is loaded (see
+    lp_matrix.LinearProgram.release), and model and environment are disposed as soon as the solution is extracted.
+    With telemetry, the solve is optimized and recorded by it as label, see telemetry.SolveTelemetry.
+
+    Returns:
+        objective, X, RC, Pi -- optimal objective value and solution vectors; RC and Pi are None if not requested
+        load_time, solve_time -- time to load the matrix into the solver and solve time
+        iterations -- dictionary with the number of simplex and barrier iterations
+    """
+    import gurobipy as gp
+
+    start = time.perf_counter()
+    env = None
+    if lean:
+        env = gp.Env(empty=True)
+        env.setParam('OutputFlag', int(print_result))
+        env.start()
+    model = gp.Model(lp.name, env=env)
+    try:
+        if not print_result:
+            model.setParam('OutputFlag', False)
+        for name, value in options.items():
+            model.setParam(name, value)
+        x, constrs = load_gurobi(model, lp)
+        if lean:
+            lp.release()                                                                # gurobi keeps its own copy of the coefficients
+        load_time = time.perf_counter() - start
+        if telemetry is not None:
+            optimize_time, phases = telemetry.optimize(model)
+        else:
+            model.optimize()
+        if model.Status != gp.GRB.OPTIMAL:
+            raise RuntimeError(str('gurobi did not find an optimal solution, status '+str(model.Status)))
+        start = time.perf_counter()
+        X = x.X
+        RC = x.RC if reduced_costs else None
+        Pi = constrs.Pi if duals else None
+        iterations = {'simplex_iterations': int(model.IterCount), 'barrier_iterations': int(model.BarIterCount)}
+        if telemetry is not None:
+            telemetry.record(model, label, build_time + load_time, optimize_time, time.perf_counter() - start, phases, solver='gurobi')
+        return model.ObjVal, X, RC, Pi, load_time, model.Runtime, iterations
+    finally:
+        if lean:
+            model.dispose()
+            env.dispose()
+
+def _solve_highs(lp, reduced_costs, duals, print_result, options, lean=False, telemetry=None, label='lp', build_time=0.0):
+    """solve lp with HiGHS via highspy; returns the same as _solve_gurobi.
+
+    With lean, lp and the copies of its matrix are released once they are passed to HiGHS, and the solver is
+    cleared as soon as the solution is extracted. With telemetry, the timings, model size and iterations of the solve
+    are recorded as label, see telemetry.SolveTelemetry.record_info.
+    """
+    import highspy
+
+    start = time.perf_counter()
+    A = lp.A.tocsc()
+    size = {'rows': lp.num_constrs, 'columns': lp.num_vars, 'nonzeros': A.nnz}
+    sense, rhs = lp.sense, lp.rhs
+    model = highspy.HighsLp()
+    model.num_col_ = lp.num_vars
+    model.num_row_ = lp.num_constrs
+    model.col_cost_ = lp.obj
+    model.offset_ = lp.offset
+    model.col_lower_ = lp.lb
+    model.col_upper_ = lp.ub
+    model.row_lower_ = np.where(sense == '<', -highspy.kHighsInf, rhs)
+    model.row_upper_ = np.where(sense == '>', highspy.kHighsInf, rhs)
+    model.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    model.a_matrix_.start_ = A.indptr
+    model.a_matrix_.index_ = A.indices
+    model.a_matrix_.value_ = A.data
+    h = highspy.Highs()
+    h.setOptionValue('output_flag', bool(print_result))
+    for name, value in options.items():
+        h.setOptionValue(name, value)
+    h.passModel(model)
+    if lean:
+        del model, A
+        lp.release()                                                                    # HiGHS keeps its own copy of the coefficients
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    h.run()
+    solve_time = time.perf_counter() - start
+    status = h.getModelStatus()
+    if status != highspy.HighsModelStatus.kOptimal:
+        raise RuntimeError(str('HiGHS did not find an optimal solution, status '+h.modelStatusToString(status)))
+    start = time.perf_counter()
+    result = h.getSolution()
+    RC = result.col_dual if reduced_costs else None
+    Pi = result.row_dual if duals else None
+    info = h.getInfo()
+    objective = info.objective_function_value
+    iterations = {'simplex_iterations': int(info.simplex_iteration_count), 'barrier_iterations': int(info.ipm_iteration_count)}
+    if telemetry is not None:
+        telemetry.record_info(label, build_time + load_time, solve_time, time.perf_counter() - start, solver='highs',
+                              status=h.modelStatusToString(status), runtime=solve_time, **size, **iterations)
+    if lean:
+        h.clear()
+    return objective, result.col_value, RC, Pi, load_time, solve_time, iterations
+
+_BACKENDS = {'gurobi': _solve_gurobi, 'highs': _solve_highs}
+
+
+def solve_lp(lp, solver='gurobi', reduced_costs=False, duals=False, print_result=True, options=None, lean=False, telemetry=None, label='lp',
+             build_time=0.0):
+    """hand a sparse linear program to a solver and get its solution.
+
+    Arguments:
+        lp -- lp_matrix.LinearProgram
+        solver -- one of SOLVERS
+        reduced_costs -- if True, also get the reduced costs of all variables
+        duals -- if True, also get the dual values of all constraints
+        print_result -- if False, the solver log is suppressed
+        options -- dictionary of solver specific parameters, e.g. {'Method': 2} for gurobi or {'solver': 'ipm'} for HiGHS
+        lean -- if True, lower the peak memory: lp is released once it is loaded into the solver and the solver model
+                (and for gurobi its own environment) is freed as soon as the solution is extracted
+        telemetry -- None or telemetry.SolveTelemetry, which records the solve as label
+        label -- name of the model in the telemetry record
+        build_time -- wall time spent building lp, added to the load time in the telemetry record
+
+    Returns:
+        solution -- solution.Solution with one array per variable family
+        info -- dictionary with the solver, the time to load the matrix into the solver ('load_time'), the solve time ('solve_time'),
+                the time to split the solution vectors into variable families ('extraction_time') and the number of
+                'simplex_iterations' and 'barrier_iterations'
+
+    Side effects:
+        raises RuntimeError if the solver does not find an optimal solution; with lean, lp is released, see lp_matrix.LinearProgram.release
+    """
+    if solver not in _BACKENDS:
+        raise ValueError(str('Unknown solver '+str(solver)+', options: '+', '.join(SOLVERS)))
+    objective, X, RC, Pi, load_time, solve_time, iterations = _BACKENDS[solver](lp, reduced_costs, duals, print_result, options or dict(), lean,
+                                                                                       telemetry, label, build_time)
+    start = time.perf_counter()
+    solution = make_solution(lp, X, RC, Pi, objective)
+    extraction_time = time.perf_counter() - start
+    info = {'solver': solver, 'load_time': load_time, 'solve_time': solve_time, 'extraction_time': extraction_time}
+    info.update(iterations)
+    return solution, info
+
+
+def _solve_cached(cache, inputs, solver, solve):
+    """get the solution of a model from cache, or solve it with solve() and put it into the cache.
+
+    Arguments:
+        cache -- solve_cache.SolveCache or None
+        inputs -- list of everything the solution depends on, see solve_cache.input_key
+        solver -- one of SOLVERS
+        solve -- function without arguments that builds and solves the model and returns solution and info
+
+    Returns:
+        solution -- solution.Solution; without lp on a cache hit
+        info -- dictionary as returned by solve, or only the solver on a cache hit; always with the content hash of the
+                inputs ('input_key'), which identifies the run, and whether the solution was taken from cache ('cache_hit')
+    """
+    key = solve_cache.input_key(*inputs)
+    if cache is not None:
+        solution, _ = cache.get(key)
+        if solution is not None:
+            return solution, {'solver': solver, 'input_key': key, 'cache_hit': True}
+    solution, info = solve()
+    if cache is not None:
+        cache.put(key, solution, {'solver': solver})
+    info.update(input_key=key, cache_hit=False)
+    return solution, info
+
+
+### models
+def solve_basismodell(T, S, S_neighbours, EE, EV, c, eta, ramp, solver='gurobi', reduced_costs=False, duals=False, print_result=True, options=None,
+                      network='pairs', lean=False, cache=None, compact=False, telemetry=None):
+    """solve the basismodell, equations (1)-(22), with any of SOLVERS.
+
+    Same formulation as grb_model.solve_basismodell, see lp_matrix.build_basismodell_lp.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp -- see grb_model.solve_basismodell
+        solver, reduced_costs, duals, print_result, options, lean -- see solve_lp
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        cache -- solve_cache.SolveCache; if given, a solution of the same inputs is taken from it without building the
+                 model, and a new solution is stored in it; not used if reduced costs or duals are requested
+        compact -- if True, solve the formulation without the variables Cv and dH, see lp_matrix._add_operation; the
+                   solution is the same, with Cv and dH calculated after the solve
+        telemetry -- None or telemetry.SolveTelemetry, which records the solve as 'basismodell'; a cache hit is not recorded
+
+    Returns:
+        solution -- solution.Solution with one array per variable family
+        info -- dictionary as returned by solve_lp, with the time to build the sparse matrix ('build_time'), 'input_key' and 'cache_hit',
+                see _solve_cached
+    """
+    def solve():
+        start = time.perf_counter()
+        lp = lp_matrix.build_basismodell_lp(T, S, S_neighbours, EE, EV, c, eta, ramp, network, compact)
+        build_time = time.perf_counter() - start
+        solution, info = solve_lp(lp, solver, reduced_costs, duals, print_result, options, lean, telemetry, 'basismodell', build_time)
+        info['build_time'] = build_time
+        return solution, info
+
+    if reduced_costs or duals:
+        cache = None
+    inputs = ['basismodell', network, compact, solver, options, T, S, S_neighbours, EE, EV, c, eta, ramp]
+    return _solve_cached(cache, inputs, solver, solve)
+
+def solve_basismodell_aggregated(aggregation, S, S_neighbours, c, eta, ramp, solver='gurobi', print_result=True, options=None, network='pairs',
+                                 lean=False, cache=None, compact=False, telemetry=None):
+    """solve the basismodell on representative periods with any of SOLVERS and expand the solution to the full timeline.
+
+    See grb_model.solve_basismodell_aggregated; cache, compact and telemetry see solve_basismodell, the expanded solution is
+    cached and the solve is recorded as 'basismodell_aggregated'.
+
+    Returns:
+        solution -- solution.Solution with one array per variable family; time-indexed families cover the full timeline
+        info -- dictionary as returned by solve_basismodell
+    """
+    def solve():
+        start = time.perf_counter()
+        lp = lp_matrix.build_basismodell_lp_aggregated(aggregation, S, S_neighbours, c, eta, ramp, network, compact)
+        build_time = time.perf_counter() - start
+        solution, info = solve_lp(lp, solver, print_result=print_result, options=options, lean=lean, telemetry=telemetry,
+                                  label='basismodell_aggregated', build_time=build_time)
+        info['build_time'] = build_time
+        return aggregation.expand_solution(solution), info
+
+    inputs = ['basismodell_aggregated', network, compact, solver, options, aggregation, S, S_neighbours, c, eta, ramp]
+    return _solve_cached(cache, inputs, solver, solve)
+
+def solve_dispatch(T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step,
+                   solver='gurobi', reduced_costs=False, duals=False, print_result=False, options=None, network='pairs', lean=False, cache=None,
+                   compact=False, telemetry=None):
+    """solve the dispatch model with given limits with any of SOLVERS.
+
+    Same formulation as grb_model.solve_dispatch, see lp_matrix.build_dispatch_lp.
+
+    Arguments:
+        T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step -- see grb_model.solve_dispatch
+        solver, reduced_costs, duals, print_result, options, lean -- see solve_lp
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        cache -- solve_cache.SolveCache, see solve_basismodell; the limits and H0 are part of the key
+        compact -- see solve_basismodell
+        telemetry -- see solve_basismodell, the solve is recorded as 'dispatch'
+
+    Returns:
+        solution -- solution.Solution with one array per variable family
+        info -- dictionary as returned by solve_lp, with the time to build the sparse matrix ('build_time'), 'input_key' and 'cache_hit',
+                see _solve_cached
+    """
+    def solve():
+        start = time.perf_counter()
+        EE_cost, EE_sum, EV_arr = lp_matrix.make_input_arrays(T, S, EE, EV, c)
+        lp = lp_matrix.build_dispatch_lp(list(T), S, S_neighbours, EE_cost, EE_sum, EV_arr, c, eta, ramp,
+                                         HTL, ETL, GtPL, PtGL, HL, H0, last_step, network, compact=compact)
+        build_time = time.perf_counter() - start
+        solution, info = solve_lp(lp, solver, reduced_costs, duals, print_result, options, lean, telemetry, 'dispatch', build_time)
+        info['build_time'] = build_time
+        return solution, info
+
+    if reduced_costs or duals:
+        cache = None
+    inputs = ['dispatch', network, compact, solver, options, T, S, S_neighbours, EE, EV, c, eta, ramp, HTL, ETL, GtPL, PtGL, HL, H0, last_step]
+    return _solve_cached(cache, inputs, solver, solve)
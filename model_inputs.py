@@ -0,0 +1,89 @@
+import numpy as np
+
+
+COST_SOURCES = ['fossil','solar','wind','wind_onshore','wind_offshore','otherRE','nuclear']     # electricity sources with operational costs, in the order used by (2)
+
+
+class ModelInputs:
+    """array-backed model inputs, replacing the EE and EV dictionaries of helperfun.make_EE_dict and make_EV_dict.
+
+    Generation is held as a dense float array of shape (T, S, sources), demand as an array of shape (T, S).
+    The first source is always 'sum', the total generation used in the electricity energy balance (4).
+    Windows for the rolling horizon are numpy views, so slicing does not copy any data.
+
+    ModelInputs can be passed as EE and EV to the model builders in grb_model and lp_matrix.
+    """
+    def __init__(self, T, S, sources, EE, EV):
+        self.T = T                  # timestep labels
+        self.S = S                  # list of countries
+        self.sources = sources      # list of electricity sources, starting with 'sum'
+        self.EE = EE                # array of shape (T, S, sources) with hourly electricity generation
+        self.EV = EV                # array of shape (T, S) with hourly electricity demand
+        self._source_index = {source: k for k, source in enumerate(sources)}
+        self._position = None       # timestep label -> position, built on first use of select
+
+    def __len__(self):
+        return len(self.T)
+
+    @property
+    def nbytes(self):
+        return self.EE.nbytes + self.EV.nbytes
+
+    def generation(self, source):
+        """get the generation of source as array of shape (T, S)."""
+        return self.EE[:,:,self._source_index[source]]
+
+    def cost(self, c, sources=None):
+        """get the operational costs of the generation as array of shape (T, S).
+
+        Arguments:
+            c -- dictionary of costs with an entry 'EE_'+source for each source
+            sources -- sources to include; default all COST_SOURCES
+        """
+        if sources is None:
+            sources = COST_SOURCES
+        EE_cost = np.zeros(self.EV.shape)
+        for source in sources:
+            EE_cost += self.generation(source)*c['EE_'+source]
+        return EE_cost
+
+    def window(self, start, stop):
+        """get the inputs of the timesteps with positions start, ..., stop-1 without copying the data."""
+        return ModelInputs(self.T[start:stop], self.S, self.sources, self.EE[start:stop], self.EV[start:stop])
+
+    def select(self, T):
+        """get the inputs of the timestep labels T; a view if T is a contiguous run of timesteps."""
+        if self._position is None:
+            self._position = {t: i for i, t in enumerate(self.T)}
+        positions = np.array([self._position[t] for t in T], dtype=int)
+        if len(positions) > 0 and (np.diff(positions) == 1).all():
+            return self.window(positions[0], positions[-1]+1)
+        return ModelInputs([self.T[i] for i in positions], self.S, self.sources, self.EE[positions], self.EV[positions])
+
+    def make_dicts(self):
+        """make EE and EV dictionaries like helperfun.make_EE_dict and make_EV_dict, for the loop-based model builders."""
+        EE = {(t,s): dict(zip(self.sources, self.EE[i,j].tolist())) for i, t in enumerate(self.T) for j, s in enumerate(self.S)}
+        EV = {(t,s): self.EV[i,j] for i, t in enumerate(self.T) for j, s in enumerate(self.S)}
+        return EE, EV
+
+
+def make_model_inputs(settings, timeseries_2030):
+    """make array-backed model inputs.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+
+    Returns:
+        inputs -- ModelInputs with hourly electricity generation and demand data for each country
+
+    Side effects:
+        None
+    """
+    T = settings['timesteps']
+    S = settings['countries']
+    sources = ['sum'] + list(settings['electricity_sources'])
+    columns = [s+'_EE_sum' if source == 'sum' else s+'_'+source for s in S for source in sources]
+    EE = timeseries_2030.loc[T, columns].to_numpy(dtype=float).reshape(len(T), len(S), len(sources))
+    EV = timeseries_2030.loc[T, [s+'_load' for s in S]].to_numpy(dtype=float)
+    return ModelInputs(T, S, sources, EE, EV)
@@ -0,0 +1,157 @@
+import os
+import json
+import numpy as np
+
+from solution import make_frame
+
+
+CHUNK = 24*30               # timesteps per stored block of a time-indexed variable; a time slice only decompresses the blocks it overlaps
+INDEX = '__index__'         # member with the dimensions, axes, shapes and metadata of all variables
+T_AXIS = '__T__'            # member with the labels of the time axis
+
+
+### writing
+def write_results(path, values, dims, axes, metadata=None, chunk=CHUNK):
+    """write the results of a run to one compressed result store.
+
+    The store is a compressed .npz archive: every time-indexed variable is split into blocks of chunk timesteps, all
+    other variables are stored whole, and an index member holds the dimension names, the axis labels, the shapes and
+    the metadata of the run as json. See ResultStore for reading it.
+
+    Arguments:
+        path -- path of the store, e.g. './data/internal_data/results/Basismodell/results.npz'
+        values -- dictionary with one array per variable, e.g. solution.Solution.values
+        dims -- dictionary with the tuple of dimension names of each variable, e.g. ('T','S')
+        axes -- dictionary with the labels of each dimension; pairs of countries are tuples
+        metadata -- json-serializable dictionary describing the run, e.g. settings and objective value
+        chunk -- number of timesteps per block of a time-indexed variable
+
+    Returns:
+        None
+
+    Side effects:
+        writes path; the directory is created if missing
+    """
+    members = dict()
+    for name, arr in values.items():
+        arr = np.asarray(arr, dtype=float)
+        if dims[name][0] == 'T':
+            for k, start in enumerate(range(0, len(arr), chunk)):
+                members[str(name+'/'+str(k))] = arr[start:start+chunk]
+        else:
+            members[name] = arr
+    used = {dim for name in values for dim in dims[name]}
+    index = {'chunk': chunk,
+             'dims': {name: list(dims[name]) for name in values},
+             'shapes': {name: list(np.shape(values[name])) for name in values},
+             'axes': {dim: [list(x) if isinstance(x, tuple) else x for x in axes[dim]] for dim in used if dim != 'T'},
+             'metadata': metadata or dict()}
+    members[INDEX] = np.array(json.dumps(index))
+    if 'T' in used:
+        members[T_AXIS] = np.asarray(list(axes['T']))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.savez_compressed(path, **members)
+
+def write_solution(path, solution, metadata=None, chunk=CHUNK):
+    """write all variable families of a solution.Solution to a result store, see write_results.
+
+    The objective value of the solution is added to the metadata.
+    """
+    metadata = dict(metadata or dict())
+    if solution.objective is not None:
+        metadata['objective'] = float(solution.objective)
+    write_results(path, solution.values, solution.dims, solution.axes, metadata, chunk)
+
+
+### reading
+class ResultStore:
+    """lazy reader of a result store written by write_results.
+
+    Opening the store only reads its index; read() decompresses a single variable, and for time-indexed variables only
+    the blocks overlapping the requested time slice.
+
+    Example:
+        with ResultStore('./data/internal_data/results/Basismodell/results.npz') as results:
+            H0 = results.read('H', 4380, 4381)[0]
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = np.load(path)
+        index = json.loads(str(self._file[INDEX]))
+        self.chunk = index['chunk']
+        self.dims = {name: tuple(dims) for name, dims in index['dims'].items()}
+        self.shapes = {name: tuple(shape) for name, shape in index['shapes'].items()}
+        self.axes = {dim: [tuple(x) if isinstance(x, list) else x for x in labels] for dim, labels in index['axes'].items()}
+        if T_AXIS in self._file.files:
+            self.axes['T'] = self._file[T_AXIS].tolist()
+        self.metadata = index['metadata']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def keys(self):
+        return self.dims.keys()
+
+    def read(self, name, start=None, stop=None):
+        """read the values of a variable, for time-indexed variables optionally only the timesteps start, ..., stop-1.
+
+        Arguments:
+            name -- name of the variable
+            start, stop -- positions on the time axis, as in a slice; ignored for variables without time dimension
+
+        Returns:
+            arr -- array with the values
+        """
+        if name not in self.dims:
+            raise KeyError(str('The result store '+self.path+' has no variable '+name))
+        if self.dims[name][0] != 'T':
+            return self._file[name]
+        shape = self.shapes[name]
+        start, stop, _ = slice(start, stop).indices(shape[0])
+        if stop <= start:
+            return np.zeros((0,) + shape[1:])
+        first, last = start // self.chunk, (stop-1) // self.chunk
+        arr = np.concatenate([self._file[str(name+'/'+str(k))] for k in range(first, last+1)])
+        return arr[start-first*self.chunk:stop-first*self.chunk]
+
+    def frame(self, name, start=None, stop=None, S_neighbours=None):
+        """read a variable as dataframe with labelled rows and columns, see solution.Solution.frame and read()."""
+        arr = self.read(name, start, stop)
+        axes = dict(self.axes)
+        if self.dims[name][0] == 'T':
+            axes['T'] = self.axes['T'][slice(start, stop)]
+        return make_frame(arr, self.dims[name], axes, S_neighbours)
+
+
+### spreadsheets
+def export_spreadsheets(V_df, directory, formats=('csv',)):
+    """export dataframes of results as spreadsheets, e.g. for plot_generator.m.
+
+    Arguments:
+        V_df -- dictionary of dataframes, e.g. as returned by solution.Solution.frames or ResultStore.frame
+        directory -- directory of the results; the files are written to its subdirectories CSVs and XLSXs
+        formats -- formats to export, 'csv' and/or 'xlsx'
+
+    Returns:
+        None
+
+    Side effects:
+        writes one file per dataframe and format
+    """
+    for fmt in formats:
+        if fmt not in ['csv', 'xlsx']:
+            raise ValueError(str('Unknown spreadsheet format '+str(fmt)+', options: csv, xlsx'))
+        os.makedirs(os.path.join(directory, fmt.upper()+'s'), exist_ok=True)
+    for key, df in V_df.items():
+        if 'csv' in formats:
+            df.to_csv(os.path.join(directory, 'CSVs', key+'.csv'), sep=',')
+        if 'xlsx' in formats:
+            df.to_excel(os.path.join(directory, 'XLSXs', key+'.xlsx'))
@@ -0,0 +1,177 @@
+import os
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+import costs
+import datageneration
+import lp_solvers
+import model_inputs
+
+
+PARAMETERS = {'c': datageneration.get_costs, 'eta': datageneration.get_efficiencies, 'ramp': datageneration.get_ramps}     # parameter dictionaries a scenario can override
+
+
+### scenarios
+def make_grid(grid):
+    """make one scenario for every combination of the values of a grid.
+
+    Arguments:
+        grid -- dictionary with a list of values per parameter, e.g. {'c.PtGL': [5, 10], 'eta.electrolysis': [0.7, 0.84]}
+
+    Returns:
+        scenarios -- list of dictionaries with one value per parameter
+    """
+    return [dict(zip(grid.keys(), values)) for values in itertools.product(*grid.values())]
+
+def apply_overrides(settings, overrides):
+    """get the costs, efficiencies and ramps of settings with the values of a scenario.
+
+    Arguments:
+        settings -- dictionary of settings
+        overrides -- dictionary with the values of the scenario, keyed '<dictionary>.<key>', e.g. 'c.PtGL', 'eta.electrolysis' or 'ramp.fuelcell'
+
+    Returns:
+        c, eta, ramp -- dictionaries of costs, efficiencies and ramps
+    """
+    parameters = {name: get(settings) for name, get in PARAMETERS.items()}
+    for name, value in overrides.items():
+        group, _, key = name.partition('.')
+        if group not in parameters or key not in parameters[group]:
+            raise ValueError(str('Unknown parameter '+name+', options: '+', '.join(str(group+'.'+key) for group in parameters for key in parameters[group])))
+        parameters[group][key] = value
+    return parameters['c'], parameters['eta'], parameters['ramp']
+
+
+### workers
+_shared = dict()                        # inputs shared by all scenarios of a worker process, set once by _init_worker
+
+def _init_worker(shared):
+    _shared.clear()
+    _shared.update(shared)
+
+def _solve_scenario(overrides):
+    """solve the model of the shared inputs with the values of one scenario and reduce the solution to costs and limits."""
+    settings, inputs, model, solver, options, network, limits = (_shared[key] for key in
+                                                                  ['settings', 'inputs', 'model', 'solver', 'options', 'network', 'limits'])
+    S = settings['countries']
+    S_neighbours = settings['neighbours']
+    T = settings['timesteps']
+    c, eta, ramp = apply_overrides(settings, overrides)
+    if model == 'basismodell':
+        solution, info = lp_solvers.solve_basismodell(T, S, S_neighbours, inputs, inputs, c, eta, ramp, solver=solver,
+                                                      print_result=False, options=options, network=network)
+    else:
+        solution, info = lp_solvers.solve_dispatch(T, S, S_neighbours, inputs, inputs, c, eta, ramp, *limits, {s: 0 for s in S},
+                                                   last_step=True, solver=solver, options=options, network=network)
+    links = solution.axes['E']
+    costs_v = costs.variable_costs(inputs, solution.values, c, links).sum()                 # summed over all timesteps
+    result = {'objective': solution.objective, 'costs_v': costs_v, 'build_time': info['build_time'],
+              'solve_time': info['load_time'] + info['solve_time']}
+    if model == 'basismodell':
+        result['costs_f'] = costs.investment_costs(solution.values, c, S, links).stack()
+        result['limits'] = {key: pd.Series(solution[key], index=[str(x[0]+' --> '+x[1]) if isinstance(x, tuple) else x for x in solution.axes[solution.dims[key][0]]])
+                            for key in costs.INVESTMENT_COST_TECHNOLOGIES}
+    return result
+
+
+def run_sweep(settings, timeseries_2030, scenarios, model='basismodell', limits=None, solver='gurobi', options=None, network='pairs',
+              num_workers=None, threads=None):
+    """solve the basismodell or the dispatch model for many scenarios of costs, efficiencies and ramps in parallel.
+
+    The model inputs are made once from timeseries_2030 and sent once to every worker process; each worker then solves
+    its share of the scenarios, with at most threads solver threads per solve so the workers do not oversubscribe the cores.
+    A scenario that fails, e.g. because it is infeasible, is recorded with its error and the sweep continues.
+
+    Arguments:
+        settings -- dictionary of settings
+        timeseries_2030 -- dataframe with timeseries data for 2030
+        scenarios -- list of dictionaries with the values of each scenario, see apply_overrides and make_grid
+        model -- 'basismodell' or 'dispatch'
+        limits -- tuple HTL, ETL, GtPL, PtGL, HL as returned by helperfun.get_limits; only for the dispatch model
+        solver -- solver to use, see lp_solvers.SOLVERS
+        options -- dictionary of solver specific parameters, see lp_solvers.solve_lp
+        network -- 'pairs' or 'edges', see lp_matrix.make_links
+        num_workers -- number of worker processes; default: number of cores, at most one per scenario; 1 solves in this process
+        threads -- number of solver threads per solve; default: number of cores divided by num_workers
+
+    Returns:
+        sweep -- dictionary of dataframes, all indexed by scenario:
+                 'summary' -- values of the scenario, objective value, variable and investment costs, build and solve time and error
+                 'costs' -- variable and investment costs per country and technology
+                 'limits' -- optimal limits 'HL','GtPL','PtGL' per country and 'ETL','HTL' per link; only for the basismodell
+
+    Side effects:
+        None
+    """
+    if model not in ['basismodell', 'dispatch']:
+        raise ValueError(str('Unknown model '+str(model)+', options: basismodell, dispatch'))
+    if model == 'dispatch' and limits is None:
+        raise ValueError('The dispatch model needs limits, see helperfun.get_limits')
+    for overrides in scenarios:
+        apply_overrides(settings, overrides)                                            # check all parameters before starting the workers
+    if num_workers is None:
+        num_workers = min(os.cpu_count(), len(scenarios))
+    if threads is None:
+        threads = max(1, os.cpu_count()//num_workers)
+    options = dict(options or dict())
+    options.setdefault(lp_solvers.THREADS_OPTION[solver], threads)
+
+    shared = {'settings': settings, 'inputs': model_inputs.make_model_inputs(settings, timeseries_2030), 'model': model,
+              'solver': solver, 'options': options, 'network': network, 'limits': limits}
+    start = time.perf_counter()
+    if num_workers == 1:
+        _init_worker(shared)
+        results = [_try_scenario(overrides) for overrides in scenarios]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(shared,)) as executor:
+            results = list(executor.map(_try_scenario, scenarios))
+    print(str( 'Solved '+str(len(scenarios))+' scenarios with '+str(num_workers)+' workers in '+str(round(time.perf_counter()-start, 1))+' s' ))
+    return _collect(scenarios, results)
+
+def _try_scenario(overrides):
+    try:
+        return _solve_scenario(overrides)
+    except Exception as error:                                                          # record the failed scenario and go on with the next one
+        return {'error': str(type(error).__name__+': '+str(error))}
+
+def _collect(scenarios, results):
+    """gather the results of all scenarios into dataframes indexed by scenario."""
+    index = pd.RangeIndex(len(scenarios), name='scenario')
+    summary = pd.DataFrame(scenarios, index=index)
+    for key in ['objective', 'build_time', 'solve_time']:
+        summary[key] = [result.get(key, np.nan) for result in results]
+    summary['variable_costs'] = [result['costs_v'].sum() if 'costs_v' in result else np.nan for result in results]
+    summary['investment_costs'] = [result['costs_f'].sum() if 'costs_f' in result else np.nan for result in results]
+    summary['error'] = [result.get('error') for result in results]
+
+    sweep = {'summary': summary}
+    ok = [k for k, result in enumerate(results) if 'error' not in result]
+    if ok:
+        costs_v = pd.DataFrame([results[k]['costs_v'] for k in ok], index=index[ok])
+        costs_v.columns = pd.MultiIndex.from_tuples([('variable',)+tuple(x) for x in costs_v.columns], names=['kind','country','technology'])
+        frames = [costs_v]
+        if 'costs_f' in results[ok[0]]:
+            costs_f = pd.DataFrame([results[k]['costs_f'] for k in ok], index=index[ok])
+            costs_f.columns = pd.MultiIndex.from_tuples([('investment',)+tuple(x) for x in costs_f.columns], names=['kind','country','technology'])
+            frames.append(costs_f)
+            sweep['limits'] = pd.DataFrame([pd.concat(results[k]['limits']) for k in ok], index=index[ok])
+        sweep['costs'] = pd.concat(frames, axis=1)
+    return sweep
+
+
+if __name__ == '__main__':
+    ### settings
+    settings = dict()
+    settings['countries'] = ['DE', 'FR', 'NL']
+    settings['neighbours'] = [('DE', 'FR'),('DE','NL')]
+    settings['electricity_sources'] = ['wind','wind_onshore','wind_offshore','solar','otherRE','fossil','nuclear']
+    settings['reference_year'] = '2017'
+    settings['timesteps'] = range(24*365)
+
+    grid = {'c.PtGL': [2.5, 5, 10], 'eta.electrolysis': [0.7, 0.84], 'ramp.fuelcell': [0.5, 1]}
+    timeseries_2030 = datageneration.load_2030_timeseries(settings)
+    sweep = run_sweep(settings, timeseries_2030, make_grid(grid))
+    print(sweep['summary'])
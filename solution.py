@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+
+class Solution:
+    """solution of a lp_matrix.LinearProgram as one array per variable family.
+
+    The arrays have the shape of the dimensions of their family, e.g. (T, S) for H or (T, pairs) for ETP, and can be
+    turned into labelled dataframes with frame(). ET and HT are derived as ETP - ETN and HTP - HTN.
+    """
+    def __init__(self, lp, values, reduced_costs=None, duals=None, objective=None, axes=None, dims=None):
+        self.lp = lp                            # None for a solution read from a solve_cache.SolveCache
+        self.values = values                    # variable family -> array of optimal values
+        self.reduced_costs = reduced_costs      # variable family -> array of reduced costs, if requested
+        self.duals = duals                      # constraint family -> array of dual values, if requested
+        self.objective = objective
+        self.dims = dict(lp.dims) if lp is not None else dict()     # variable family -> tuple of dimension names
+        self.axes = dict(lp.axes) if lp is not None else dict()     # dimension name -> list of labels; can differ from lp.axes, e.g. for expanded representative periods
+        if dims is not None:
+            self.dims.update(dims)
+        if axes is not None:
+            self.axes.update(axes)
+        for derived, P, N in [('ET','ETP','ETN'), ('HT','HTP','HTN')]:
+            if P in values:
+                self.values[derived] = values[P] - values[N]
+                self.dims[derived] = self.dims[P]
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def keys(self):
+        return self.values.keys()
+
+    def frame(self, name, S_neighbours=None, values=None):
+        """get the values of a variable family as dataframe with labelled rows and columns.
+
+        Time-indexed families get one row per timestep, all other families a single row. Pairs of countries are labelled
+        's1 --> s2'; for time-indexed transport families only the pairs in S_neighbours are kept, if given.
+
+        Arguments:
+            name -- name of the variable family
+            S_neighbours -- list of neighbouring countries
+            values -- dictionary of arrays to take the values from; default self.values
+
+        Returns:
+            df -- dataframe with the values
+        """
+        if values is None:
+            values = self.values
+        return make_frame(values[name], self.dims[name], self.axes, S_neighbours)
+
+    def frames(self, names, S_neighbours=None):
+        """get a dictionary of dataframes for the variable families names, see frame()."""
+        return {name: self.frame(name, S_neighbours) for name in names}
+
+    def to_dicts(self):
+        """make dictionaries of variable values keyed like the variables of grb_model.solve_basismodell.
+
+        Returns:
+            V -- dictionary of dictionaries with all optimal variable values
+            C -- dictionary of dictionaries with variable ('v') and, if part of the model, investment ('f') costs
+        """
+        V = dict()
+        for name, arr in self.values.items():
+            dims = self.dims[name]
+            if len(dims) == 1:
+                V[name] = dict(zip(self.axes[dims[0]], arr.tolist()))
+            else:
+                V[name] = {(t,k): v for t, row in zip(self.axes[dims[0]], arr.tolist()) for k, v in zip(self.axes[dims[1]], row)}
+        C = dict()
+        C['v'] = V.pop('Cv')
+        if 'Cf' in V:
+            C['f'] = V.pop('Cf')
+        return V, C
+
+
+def make_frame(arr, dims, axes, S_neighbours=None):
+    """make a dataframe with labelled rows and columns from the values of a variable family, see Solution.frame.
+
+    Arguments:
+        arr -- array with the values of the variable family
+        dims -- tuple of dimension names of the variable family
+        axes -- dictionary with the labels of each dimension; the labels of 'T' must match the rows of arr
+        S_neighbours -- list of neighbouring countries
+
+    Returns:
+        df -- dataframe with the values
+    """
+    labels = axes[dims[-1]]
+    if dims[-1] == 'E':
+        if dims[0] == 'T' and S_neighbours is not None:
+            arr = arr[:, [labels.index(x) for x in S_neighbours]]
+            labels = S_neighbours
+        labels = [str(x[0]+' --> '+x[1]) for x in labels]
+    if dims[0] == 'T':
+        return pd.DataFrame(arr, index=axes['T'], columns=labels)
+    return pd.DataFrame([arr], columns=labels)
+
+def make_solution(lp, X, RC=None, Pi=None, objective=None):
+    """split solution vectors of any solver into one array per variable and constraint family; expression families
+    of lp (see lp_matrix.LinearProgram.add_expression) are evaluated.
+
+    Arguments:
+        lp -- LinearProgram the solution belongs to
+        X -- array with the optimal values of all variables
+        RC -- array with the reduced costs of all variables, if available
+        Pi -- array with the dual values of all constraints, if available
+        objective -- optimal objective value
+
+    Returns:
+        solution -- Solution
+    """
+    X = np.asarray(X)
+    values = {name: X[idx] for name, idx in lp.var.items()}
+    values.update(lp.evaluate(X))                                                       # e.g. Cv and dH of the compact formulation
+    solution_rc = None
+    if RC is not None:
+        RC = np.asarray(RC)
+        solution_rc = {name: RC[idx] for name, idx in lp.var.items()}
+    solution_duals = None
+    if Pi is not None:
+        Pi = np.asarray(Pi)
+        solution_duals = {name: Pi[rows] for name, rows in lp.con.items()}
+    dims = lp.expressions.dims if lp.expressions is not None else None
+    return Solution(lp, values, solution_rc, solution_duals, objective, dims=dims)
+
+def extract_solution(lp, x, constrs=None, reduced_costs=False, duals=False):
+    """get the solution of a solved gurobi matrix model with one batched attribute call per attribute.
+
+    Arguments:
+        lp -- LinearProgram the model was built from
+        x -- gurobi MVar with all variables of the model
+        constrs -- gurobi MConstr with all constraints of the model; only needed for duals
+        reduced_costs -- if True, also get the reduced costs of all variables
+        duals -- if True, also get the dual values of all constraints
+
+    Returns:
+        solution -- Solution
+    """
+    RC = x.RC if reduced_costs else None
+    Pi = constrs.Pi if duals else None
+    return make_solution(lp, x.X, RC, Pi)
@@ -0,0 +1,116 @@
+import os
+import hashlib
+import numpy as np
+
+import result_store
+from solution import Solution
+
+
+CACHE_DIR = './data/internal_data/solve_cache/'
+MAX_BYTES = 2*1024**3       # default size bound of a cache directory
+
+
+### keys
+def _update(hasher, obj):
+    """feed a canonical byte representation of obj to hasher; dictionaries are hashed independent of their order."""
+    if isinstance(obj, np.ndarray):
+        hasher.update(str(('ndarray', obj.dtype.str, obj.shape)).encode())
+        hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        hasher.update(b'dict')
+        for key in sorted(obj, key=repr):
+            _update(hasher, key)
+            _update(hasher, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(str((type(obj).__name__, len(obj))).encode())
+        for x in obj:
+            _update(hasher, x)
+    elif isinstance(obj, range):
+        hasher.update(str(('range', obj.start, obj.stop, obj.step)).encode())
+    elif obj is None or isinstance(obj, (bool, int, float, str, np.generic)):
+        hasher.update(repr(obj.item() if isinstance(obj, np.generic) else obj).encode())
+    else:                                                                               # e.g. ModelInputs: its public attributes
+        hasher.update(type(obj).__name__.encode())
+        _update(hasher, {key: value for key, value in vars(obj).items() if not key.startswith('_')})
+
+def input_key(*inputs):
+    """get the content hash of the inputs of a solve.
+
+    Arguments:
+        inputs -- everything the solution depends on, e.g. the model variant, timesteps, model_inputs.ModelInputs, the
+                  dictionaries c, eta and ramp and the limits; arrays, dictionaries, lists, ranges, scalars and objects
+                  (by their public attributes) can be hashed
+
+    Returns:
+        key -- hexadecimal sha256 hash; equal inputs give the same key in every run
+    """
+    hasher = hashlib.sha256()
+    _update(hasher, list(inputs))
+    return hasher.hexdigest()
+
+def cache_path(key, directory=CACHE_DIR):
+    """get the result store of the solution key in the cache directory, without creating the directory."""
+    return os.path.join(directory, key+'.npz')
+
+
+### cache
+class SolveCache:
+    """cache of solutions keyed by the content hash of their inputs (see input_key), bounded in size.
+
+    Every solution is a result store <key>.npz in directory. A hit marks the file as recently used, and after each put
+    the least recently used solutions are removed until the cache fits into max_bytes.
+    """
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return cache_path(key, self.directory)
+
+    def get(self, key):
+        """get the solution stored under key.
+
+        Returns:
+            solution -- solution.Solution without lp, or None if key is not in the cache
+            metadata -- dictionary stored with the solution, or None
+        """
+        path = self.path(key)
+        try:
+            results = result_store.ResultStore(path)
+        except FileNotFoundError:
+            return None, None
+        with results:
+            values = {name: results.read(name) for name in results.keys()}
+            solution = Solution(None, values, objective=results.metadata.get('objective'), axes=results.axes, dims=results.dims)
+            metadata = results.metadata
+        os.utime(path)                                                                  # most recently used
+        return solution, metadata
+
+    def put(self, key, solution, metadata=None):
+        """store a solution under key and evict the least recently used solutions beyond max_bytes."""
+        path = self.path(key)
+        result_store.write_solution(path+'.tmp.npz', solution, dict(metadata or dict(), input_key=key))
+        os.replace(path+'.tmp.npz', path)                                               # readers never see a partly written file
+        self.evict()
+
+    def evict(self):
+        """remove the least recently used solutions until the cache fits into max_bytes.
+
+        Returns:
+            removed -- list of the keys of the removed solutions
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+            removed.append(name[:-len('.npz')])
+        return removed
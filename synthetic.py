@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+from datageneration import GENERATION_SOURCES, EE_SUM_SOURCES
+
+
+### synthetic network
+def make_synthetic_network(num_regions, num_nearest=2, seed=0):
+    """make regions at random locations and a random meshed transport network between them.
+
+    The network is the minimum spanning tree of the regions, so that all regions are connected, plus links from every
+    region to its num_nearest nearest regions, so that, like a transmission grid, it mostly links neighbouring regions
+    and has about 1.5 links per region.
+
+    Arguments:
+        num_regions -- number of regions
+        num_nearest -- number of nearest regions every region is linked to
+        seed -- seed of the random number generator
+
+    Returns:
+        S -- list of region names 'R00', 'R01', ...
+        S_neighbours -- list of linked regions (s1, s2), s1 before s2 in S
+        locations -- array of shape (S, 2) with the locations of the regions in the unit square
+
+    Side effects:
+        None
+    """
+    rng = np.random.default_rng(seed)
+    locations = rng.uniform(size=(num_regions, 2))
+    distance = np.linalg.norm(locations[:,None] - locations[None], axis=2)
+    tree = minimum_spanning_tree(distance).toarray() > 0
+    links = tree | tree.T
+    nearest = np.argsort(distance, axis=1)[:, 1:num_nearest+1]
+    links[np.arange(num_regions)[:,None], nearest] = True
+    links = np.triu(links | links.T, 1)
+
+    width = len(str(num_regions-1))
+    S = [str('R'+str(k).zfill(max(width, 2))) for k in range(num_regions)]
+    S_neighbours = [(S[i], S[j]) for i, j in zip(*np.nonzero(links))]
+    return S, S_neighbours, locations
+
+
+### synthetic timeseries
+def _weather(rng, correlation, num_timesteps, persistence):
+    """AR(1) processes with unit variance, one per region, whose innovations are correlated between nearby regions."""
+    noise = rng.standard_normal((num_timesteps, len(correlation))) @ np.linalg.cholesky(correlation).T
+    scale = np.sqrt(1 - persistence**2)
+    noise[0] /= scale                                                                       # start in the stationary distribution
+    return lfilter([scale], [1, -persistence], noise, axis=0)
+
+def make_synthetic_timeseries(S, locations, num_timesteps=8760, seed=0):
+    """make synthetic hourly generation and load timeseries with the columns of datageneration.create_2030_timeseries.
+
+    Load follows a seasonal, a daily and a weekly pattern. Solar follows the daylight hours of the season, reduced by
+    clouds; wind speeds are log-normal, stronger in winter and turned into generation with a power curve. Clouds and
+    wind speeds are autocorrelated in time and correlated between nearby regions. The yearly generation of every
+    source is a random share of the yearly load of its region, so that regions import and export electricity.
+
+    Arguments:
+        S -- list of region names
+        locations -- array of shape (S, 2) with the locations of the regions in the unit square, see make_synthetic_network
+        num_timesteps -- number of hourly timesteps, starting at the beginning of a year
+        seed -- seed of the random number generator
+
+    Returns:
+        timeseries_2030 -- dataframe with timeseries data of the same form as datageneration.create_2030_timeseries
+
+    Side effects:
+        None
+    """
+    rng = np.random.default_rng(seed)
+    num_regions = len(S)
+    hours = np.arange(num_timesteps)
+    hour_of_day = (hours % 24)[:,None]
+    winter = np.cos(2*np.pi*hours/(24*365))[:,None]                                     # 1 at the beginning of the year, -1 in summer
+    weekend = ((hours // 24) % 7 >= 5)[:,None]
+    distance = np.linalg.norm(locations[:,None] - locations[None], axis=2)
+    correlation = np.exp(-distance/0.3) + 1e-9*np.eye(num_regions)                         # weather is similar in nearby regions
+
+    # load
+    mean_load = rng.uniform(5e3, 6e4, num_regions)                                          # MW
+    load = mean_load*(1 + 0.12*winter - 0.12*np.cos(2*np.pi*(hour_of_day-4)/24) - 0.08*weekend
+                      + 0.03*_weather(rng, correlation, num_timesteps, 0.9))
+
+    # solar: daylight between sunrise and sunset, 8 hours in winter to 16 hours in summer, reduced by clouds
+    day_length = 12 - 4*winter
+    daylight = np.clip(np.sin(np.pi*(hour_of_day - 12 + day_length/2)/day_length), 0, None)
+    clearness = np.clip(0.7 + 0.25*_weather(rng, correlation, num_timesteps, 0.97), 0.05, 1)
+    solar = daylight*clearness*(1 - 0.3*locations[:,1])                                     # less sun in the north
+
+    # wind: log-normal wind speeds, turned into generation between cut-in (3 m/s) and rated (12 m/s) speed
+    def wind_power(mean_speed):
+        speed = mean_speed*(1 + 0.2*winter)*np.exp(0.4*_weather(rng, correlation, num_timesteps, 0.98))
+        return np.where(speed < 25, np.clip((speed - 3)/9, 0, 1)**3, 0)
+    wind_onshore = wind_power(6.5)
+    wind_offshore = wind_power(9)
+
+    # yearly generation as share of the yearly load
+    yearly_load = load.sum(axis=0)
+    shares = {'wind_onshore': rng.uniform(0.2, 0.45, num_regions),
+              'wind_offshore': rng.uniform(0, 0.2, num_regions)*(rng.uniform(size=num_regions) < 0.5),     # only some regions are at the coast
+              'solar': rng.uniform(0.08, 0.25, num_regions),
+              'otherRE': rng.uniform(0.03, 0.1, num_regions),
+              'fossil': rng.uniform(0.05, 0.2, num_regions),
+              'nuclear': rng.uniform(0.1, 0.5, num_regions)*(rng.uniform(size=num_regions) < 0.4)}          # only some regions have nuclear power
+    generation = dict()
+    for source, profile in [('wind_onshore', wind_onshore), ('wind_offshore', wind_offshore), ('solar', solar)]:
+        generation[source] = profile/np.maximum(profile.sum(axis=0), 1e-9)*shares[source]*yearly_load
+    for source in ['otherRE', 'fossil', 'nuclear']:
+        generation[source] = np.tile(shares[source]*yearly_load/num_timesteps, (num_timesteps, 1))
+    generation['wind'] = generation['wind_onshore'] + generation['wind_offshore']
+    generation['load'] = load
+
+    timeseries_2030 = pd.DataFrame({str(s+'_'+source): generation[source][:,i] for i, s in enumerate(S) for source in GENERATION_SOURCES+['load']})
+    for s in S:
+        timeseries_2030[s+'_EE_sum'] = sum(timeseries_2030[s+'_'+source] for source in EE_SUM_SOURCES)
+    return timeseries_2030
+
+
+def make_synthetic_case(num_regions, num_timesteps=8760, seed=0):
+    """make settings and timeseries data of a synthetic model with num_regions regions, see make_synthetic_network and make_synthetic_timeseries.
+
+    Returns:
+        settings -- dictionary of settings with 'countries', 'neighbours', 'electricity_sources' and 'timesteps'
+        timeseries_2030 -- dataframe with timeseries data for the regions
+    """
+    S, S_neighbours, locations = make_synthetic_network(num_regions, seed=seed)
+    settings = dict()
+    settings['countries'] = S
+    settings['neighbours'] = S_neighbours
+    settings['electricity_sources'] = list(GENERATION_SOURCES)
+    settings['timesteps'] = range(num_timesteps)
+    return settings, make_synthetic_timeseries(S, locations, num_timesteps, seed)
@@ -0,0 +1,154 @@
+import json
+import time
+
+
+METHODS = {-1: 'automatic', 0: 'primal simplex', 1: 'dual simplex', 2: 'barrier', 3: 'concurrent',
+           4: 'deterministic concurrent', 5: 'deterministic concurrent simplex'}          # values of the gurobi parameter Method
+
+
+class SolveTelemetry:
+    """collects one record per solve, with wall time per phase, model size and solver statistics.
+
+    Pass an instance as telemetry to the solve functions of grb_model or lp_solvers; gurobipy is only imported for
+    gurobi solves. Solves with other solvers are recorded by record_info. Every record is a dictionary with
+        label, step -- the model ('basismodell', 'dispatch', 'rolling_horizon') and, for the rolling horizon, the step of the window
+        build_time, optimize_time, extraction_time -- wall time of the python model building, of model.optimize() and of
+                                                      getting the solution
+        rows, columns, nonzeros -- model size
+        status, runtime, work -- gurobi status, solver runtime and deterministic work units
+        method, method_used -- value of the parameter Method and the algorithm that solved the model
+        simplex_iterations, barrier_iterations -- iteration counts (with barrier, the simplex iterations are crossover)
+        presolve_rows_removed, presolve_columns_removed -- presolve reductions
+        presolve_time, barrier_time, simplex_time -- solver time spent in presolve, barrier and simplex (or crossover), as
+                                                     seen by the callback; only if phase_times is True
+    and the entries of context. The records are appended to the json lines file path, if given, and handed to
+    on_record, if given.
+    """
+    def __init__(self, path=None, on_record=None, phase_times=True, context=None):
+        self.path = path                        # json lines file the records are appended to
+        self.on_record = on_record              # function called with every record
+        self.phase_times = phase_times          # if True, a callback tracks presolve reductions and the time of the solver phases; costs a little time per iteration
+        self.context = context or dict()        # entries added to every record, e.g. the scenario
+        self.records = []
+        self._file = None
+
+    def optimize(self, model):
+        """optimize model, with the callback collecting presolve reductions and phase times if phase_times is True.
+
+        Returns:
+            optimize_time -- wall time of model.optimize()
+            phases -- dictionary with the presolve reductions and the first and last solver runtime seen in each phase
+        """
+        from gurobipy import GRB
+
+        phases = dict()
+        def callback(model, where):
+            if where == GRB.Callback.PRESOLVE:
+                phases['presolve_rows_removed'] = model.cbGet(GRB.Callback.PRE_ROWDEL)
+                phases['presolve_columns_removed'] = model.cbGet(GRB.Callback.PRE_COLDEL)
+                name = 'presolve'
+            elif where == GRB.Callback.BARRIER:
+                name = 'barrier'
+            elif where == GRB.Callback.SIMPLEX:
+                name = 'simplex'
+            else:
+                return
+            runtime = model.cbGet(GRB.Callback.RUNTIME)
+            first, _ = phases.get(name, (runtime, runtime))
+            phases[name] = (first, runtime)
+
+        start = time.perf_counter()
+        if self.phase_times:
+            model.optimize(callback)
+        else:
+            model.optimize()
+        return time.perf_counter() - start, phases
+
+    def record(self, model, label, build_time, optimize_time, extraction_time, phases=None, **entries):
+        """make the record of a solved model, store it, append it to path and hand it to on_record.
+
+        Arguments:
+            model -- solved gurobi model
+            label -- name of the model
+            build_time, optimize_time, extraction_time -- wall times of the phases
+            phases -- dictionary as returned by optimize()
+            entries -- further entries of the record, e.g. step
+
+        Returns:
+            record -- dictionary, see SolveTelemetry
+        """
+        from gurobipy import GurobiError
+
+        record = dict(self.context, label=label, **entries)
+        record.update(build_time=build_time, optimize_time=optimize_time, extraction_time=extraction_time,
+                      rows=model.NumConstrs, columns=model.NumVars, nonzeros=model.NumNZs,
+                      status=model.Status, runtime=model.Runtime, work=model.Work,
+                      simplex_iterations=int(model.IterCount), barrier_iterations=int(model.BarIterCount),
+                      method=METHODS.get(model.Params.Method, model.Params.Method))
+        try:
+            win = model.ConcurrentWinMethod                                             # -1 if no concurrent optimizer was run
+        except (GurobiError, AttributeError):
+            win = -1
+        if win >= 0:
+            record['method_used'] = METHODS.get(win, win)
+        else:
+            record['method_used'] = 'barrier' if model.BarIterCount > 0 else 'simplex'
+        if phases:
+            record['presolve_rows_removed'] = int(phases.get('presolve_rows_removed', 0))
+            record['presolve_columns_removed'] = int(phases.get('presolve_columns_removed', 0))
+            record['presolve_time'] = phases['presolve'][1] if 'presolve' in phases else 0.0
+            for name in ['barrier', 'simplex']:
+                first, last = phases.get(name, (0.0, 0.0))
+                record[name+'_time'] = last - first
+        return self._store(record)
+
+    def record_info(self, label, build_time, optimize_time, extraction_time, **entries):
+        """make the record of a solve with another solver than gurobi from the statistics it reports, see record().
+
+        Arguments:
+            label -- name of the model
+            build_time, optimize_time, extraction_time -- wall times of the phases
+            entries -- the statistics of the solver, e.g. rows, columns, nonzeros, status, runtime and the iterations
+
+        Returns:
+            record -- dictionary, see SolveTelemetry
+        """
+        record = dict(self.context, label=label, build_time=build_time, optimize_time=optimize_time, extraction_time=extraction_time)
+        record.update(entries)
+        return self._store(record)
+
+    def _store(self, record):
+        self.records.append(record)
+        if self.path is not None:
+            if self._file is None:
+                self._file = open(self.path, 'a')
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+        if self.on_record is not None:
+            self.on_record(record)
+        return record
+
+    def extend(self, records):
+        """add records made by another SolveTelemetry, e.g. in a worker process."""
+        for record in records:
+            record = dict(self.context, **record)
+            self.records.append(record)
+            if self.path is not None:
+                if self._file is None:
+                    self._file = open(self.path, 'a')
+                self._file.write(json.dumps(record) + '\n')
+            if self.on_record is not None:
+                self.on_record(record)
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """close the json lines file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getstate__(self):                                                            # open files can not be sent to worker processes
+        state = dict(self.__dict__)
+        state['_file'] = None
+        return state